@@ -1,12 +1,63 @@
 # -*- coding: utf-8 -*-
 '''Things go in. Things happen. Things come out.'''
 
-from knife.lazy import lazyknife
-from knife.active import activeknife
+from sys import modules, version_info
+from types import ModuleType
 
-knife = activeknife
+# public names resolved from their modules on first access
+LAZY = {
+    'knife': ('knife.active', 'activeknife'),
+    'activeknife': ('knife.active', 'activeknife'),
+    'lazyknife': ('knife.lazy', 'lazyknife'),
+    '__': ('knife.lazy', 'lazyknife'),
+    'cache_stats': ('knife._cache', 'cache_stats'),
+    'cache_clear': ('knife._cache', 'cache_clear'),
+}
 
-__ = lazyknife
+__all__ = (
+    'knife', 'activeknife', 'lazyknife', '__', 'cache_stats', 'cache_clear',
+)
+
+# async knives need async generators
+if version_info >= (3, 6):
+    LAZY['asyncknife'] = ('knife.aio', 'asyncknife')
+    __all__ += ('asyncknife',)
 
-__all__ = ('knife', 'activeknife', 'lazyknife', '__')
 __version__ = (0, 5, 2)
+
+
+class _LazyModule(ModuleType):
+
+    '''knife package importing knives on first attribute access'''
+
+    def __getattr__(self, name, lazy=LAZY):
+        try:
+            module, attr = lazy[name]
+        except KeyError:
+            raise AttributeError('module {0!r} has no attribute {1!r}'.format(
+                self.__name__, name,
+            ))
+        __import__(module)
+        thing = getattr(modules[module], attr)
+        # later lookups skip __getattr__
+        setattr(self, name, thing)
+        return thing
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(LAZY))
+
+
+def _install(name=__name__):
+    package = modules[name]
+    try:
+        package.__class__ = _LazyModule
+    except TypeError:
+        # modules can't change class before Python 3.5
+        lazy = _LazyModule(name, package.__doc__)
+        lazy.__dict__.update(package.__dict__)
+        # keep old module alive so its globals aren't cleared
+        lazy._module = package
+        modules[name] = lazy
+
+
+_install()
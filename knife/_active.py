@@ -1,51 +1,79 @@
 # -*- coding: utf-8 -*-
 '''active knives'''
 
-from threading import local
 from collections import deque
 from contextlib import contextmanager
 
 from stuf.utils import clsname
 
-from knife._compat import loads, optimize
+from knife._sink import drain
+from knife._profile import size
+from knife._snapshot import cowstore
 
 
-class _ActiveMixin(local):
+class _ActiveMixin(object):
 
     '''active knife mixin'''
 
+    __slots__ = ()
+
     def __init__(self, *things, **kw):
         '''
         Initialize :mod:`knife`.
 
         :argument things: incoming things
         :keyword integer snapshots: snapshots to keep (default: ``5``)
+        :keyword boolean history: take snapshots so changes can be undone
+          (default: :const:`True`)
+        :keyword store: snapshot store (default: copy-on-write snapshots)
         '''
         incoming = deque()
         incoming.extend(things)
+        store = kw.pop('store', cowstore)
         super(_ActiveMixin, self).__init__(incoming, deque(), **kw)
         # working things
         self._work = deque()
         # holding things
         self._hold = deque()
+        # snapshot store
+        self._store = store
+        # snapshot of current incoming things (if taken)
+        self._version = None
 
-    @property
     @contextmanager
-    def _chain(self, d=optimize):
-        # take snapshot
-        snapshot = d(self._in)
-        # rebalance incoming with outcoming
-        if self._history:
-            self._in.clear()
-            self._in.extend(self._out)
-        # make snapshot original snapshot?
+    def _chain(self, method):
+        profile = self._profile
+        if profile is not None:
+            step = profile.start(self, method)
+        if self._history is None:
+            # rebalance incoming with outcoming without taking snapshots
+            if self._chained:
+                self._in.clear()
+                self._in.extend(self._out)
         else:
-            self._original = snapshot
-        # place snapshot at beginning of snapshot stack
-        self._history.appendleft(snapshot)
+            # take snapshot
+            stale = self._version is None
+            snapshot = self._take()
+            if profile is not None and stale:
+                step.snapshot = size(snapshot)
+            # make snapshot original snapshot?
+            if self._original is None:
+                self._original = snapshot
+            # rebalance incoming with outcoming like without snapshots
+            if self._chained:
+                self._in.clear()
+                self._in.extend(self._out)
+                # incoming things changed so snapshot is stale
+                self._version = None
+            # place snapshot at beginning of snapshot stack
+            self._history.appendleft(snapshot)
+        self._chained = True
         # move incoming things to working things
         self._work.extend(self._in)
+        incoming = len(self._work)
         yield
+        # parallel engine and batching only run one step
+        self._parallel = self._chunked = None
         out = self._out
         # clear outgoing things
         out.clear()
@@ -55,6 +83,13 @@ class _ActiveMixin(local):
         self._work.clear()
         # clear holding things
         self._hold.clear()
+        if profile is not None:
+            profile.stop(step, incoming, len(out))
+
+    @property
+    def _worksize(self, len_=len):
+        # number of working things
+        return len_(self._work)
 
     @property
     def _iterable(self):
@@ -76,34 +111,48 @@ class _ActiveMixin(local):
         self._hold.extend(things)
         return self
 
-    def _prependit(self, things, d=optimize):
+    def _take(self):
+        # snapshot incoming things unless they're unchanged since last time
+        version = self._version
+        if version is None:
+            version = self._version = self._store.take(self._in)
+        return version
+
+    def _remember(self):
+        # snapshots disabled
+        if self._history is None:
+            return None
         # take snapshot
-        snapshot = d(self._in)
+        snapshot = self._take()
         # make snapshot original snapshot?
         if self._original is None:
             self._original = snapshot
         # place snapshot at beginning of snapshot stack
         self._history.appendleft(snapshot)
+        return snapshot
+
+    def _prependit(self, things):
+        snapshot = self._remember()
         # place thing before other holding things
         self._in.extendleft(reversed(things))
+        # derive snapshot of incoming things from the prior snapshot
+        if snapshot is not None:
+            self._version = self._store.prepend(snapshot, things)
         return self
 
-    def _appendit(self, things, d=optimize):
-        # take snapshot
-        snapshot = d(self._in)
-        # make snapshot original snapshot?
-        if self._original is None:
-            self._original = snapshot
-        # place snapshot at beginning of snapshot stack
-        self._history.appendleft(snapshot)
+    def _appendit(self, things):
+        snapshot = self._remember()
         # place things after other incoming things
         self._in.extend(things)
+        # derive snapshot of incoming things from the prior snapshot
+        if snapshot is not None:
+            self._version = self._store.append(snapshot, things)
         return self
 
     def _pipeit(self, knife):
         knife.clear()
-        knife._history.clear()
-        knife._history.extend(self._history)
+        knife._store = self._store
+        self._copysp(knife)
         knife._original = self._original
         knife._baseline = self._baseline
         knife._out.extend(self._out)
@@ -117,8 +166,8 @@ class _ActiveMixin(local):
     def _unpipeit(self):
         piped = self._pipe
         piped.clear()
-        piped._history.clear()
-        piped._history.extend(self._history)
+        piped._store = self._store
+        self._copysp(piped)
         piped._original = self._original
         piped._baseline = self._baseline
         piped._out.extend(self._out)
@@ -149,30 +198,30 @@ class _OutMixin(_ActiveMixin):
 
     '''active output mixin'''
 
-    def _undo(self, snapshot=0, loads_=loads):
+    __slots__ = ()
+
+    def _undo(self, snapshot=0):
         # clear everything
         self.clear()
         # if specified, use a specific snapshot
         if snapshot:
             self._history.rotate(-(snapshot - 1))
-        self._in.extend(loads_(self._history.popleft()))
-        return self
+        return self._restore(self._history.popleft())
 
-    def _snapshot(self, d=optimize):
+    def _snapshot(self):
         # take baseline snapshot of incoming things
-        self._baseline = d(self._in)
+        self._baseline = self._take()
         return self
 
-    def _rollback(self, loads_=loads):
+    def _rollback(self):
         # clear everything
         self.clear()
         # clear snapshots
         self._clearsp()
         # revert to baseline snapshot of incoming things
-        self._in.extend(loads_(self._baseline))
-        return self
+        return self._restore(self._baseline)
 
-    def _revert(self, loads_=loads):
+    def _revert(self):
         # clear everything
         self.clear()
         # clear snapshots
@@ -180,7 +229,13 @@ class _OutMixin(_ActiveMixin):
         # clear baseline
         self._baseline = None
         # restore original snapshot of incoming things
-        self._in.extend(loads_(self._original))
+        return self._restore(self._original)
+
+    def _restore(self, snapshot):
+        # restore incoming things from snapshot
+        self._in.extend(self._store.load(snapshot))
+        # restored incoming things match the snapshot
+        self._version = snapshot
         return self
 
     def _clear(self, list_=list):
@@ -202,6 +257,10 @@ class _OutMixin(_ActiveMixin):
         self._hold.clear()
         # clear outgoing things
         self._out.clear()
+        # clear snapshot of incoming things
+        self._version = None
+        # start over
+        self._chained = False
         return self
 
     def _iterate(self, iter_=iter):
@@ -220,3 +279,7 @@ class _OutMixin(_ActiveMixin):
         self._each = False
         self._wrapper = list_
         return value[0] if len_(value) == 1 else value
+
+    def _sink(self, sink, drain_=drain):
+        # outgoing things are let go as they're written
+        return sink(drain_(self._out))
@@ -0,0 +1,421 @@
+# -*- coding: utf-8 -*-
+'''asynchronously evaluated knives (Python 3.6 or later)'''
+
+from operator import truth
+from collections import deque
+from inspect import isawaitable
+from contextlib import contextmanager
+from asyncio import ensure_future, isfuture
+from inspect import isasyncgenfunction
+
+from stuf.utils import clsname
+
+from knife._cache import memoize
+from knife._base import SLOTS as _SLOTS
+from knife._mixins import _MapMixin, _FilterMixin, _SliceMixin
+
+SLOTS = _SLOTS + ['_limit']
+# marker for things filtered out
+_SKIP = object()
+
+
+def source(things):
+    '''Async iterable over sync or async iterable `things`.'''
+    if hasattr(things, '__aiter__'):
+        return things
+    return _aiterate(things)
+
+
+async def _aiterate(things):
+    for thing in things:
+        yield thing
+
+
+async def achain(*iterables):
+    '''Chain sync or async `iterables` into one async iterable.'''
+    for iterable in iterables:
+        async for thing in source(iterable):
+            yield thing
+
+
+async def aclose(things, getattr_=getattr):
+    '''Close async generator `things` so whatever it's awaiting is let go.'''
+    close = getattr_(things, 'aclose', None)
+    if close is not None:
+        await close()
+
+
+def aislice(start, stop=None, step=1):
+    '''
+    Async generator function slicing sync or async iterables like
+    :func:`~itertools.islice`, closing them once `stop` is reached instead of
+    reading on.
+    '''
+    if start < 0 or (stop is not None and stop < 0) or step < 1:
+        raise ValueError('indexes must be at least 0 and steps at least 1')
+    async def aislice_(things):
+        things = source(things)
+        try:
+            if stop is not None and stop <= start:
+                return
+            index = 0
+            async for thing in things:
+                if index >= start and not (index - start) % step:
+                    yield thing
+                index += 1
+                if index == stop:
+                    break
+        finally:
+            await aclose(things)
+    return aislice_
+
+
+async def collect(things, list_=list, isinstance_=isinstance):
+    ''':class:`list` of sync or async iterable `things`.'''
+    if isinstance_(things, list_):
+        return things
+    return [thing async for thing in source(things)]
+
+
+def amap(apply, limit, finish=None):
+    '''
+    Async generator function feeding each incoming thing to `apply` and
+    awaiting up to `limit` awaitable results at once while keeping incoming
+    order.
+
+    :argument apply: callable returning a result or awaitable result
+    :argument integer limit: most awaitable results awaited at once
+    :keyword finish: callable turning thing and result into outgoing thing
+      (:data:`_SKIP` to drop thing)
+    '''
+    async def amap_(aiterable, skip_=_SKIP):
+        pending = deque()
+        popleft = pending.popleft
+        async def settle(): #@IgnorePep8
+            thing, result = popleft()
+            if isfuture(result):
+                result = await result
+            return result if finish is None else finish(thing, result)
+        things = source(aiterable)
+        try:
+            async for thing in things:
+                result = apply(thing)
+                # start awaitable results so they overlap
+                if isawaitable(result):
+                    result = ensure_future(result)
+                pending.append((thing, result))
+                if len(pending) >= limit:
+                    result = await settle()
+                    if result is not skip_:
+                        yield result
+            while pending:
+                result = await settle()
+                if result is not skip_:
+                    yield result
+        finally:
+            # don't leave results nobody will collect running
+            for _, result in pending:
+                if isfuture(result):
+                    result.cancel()
+            await aclose(things)
+    return amap_
+
+
+def _synced(call, one):
+    # run synchronous knife step on collected incoming things
+    async def synced(aiterable, iter_=iter):
+        things = iter_(await collect(aiterable))
+        if one:
+            yield call(things)
+        else:
+            for thing in call(things):
+                yield thing
+    return synced
+
+
+def _noengine(engine):
+    if engine is not None:
+        raise ValueError(
+            'async knives await coroutine workers instead of parallel()'
+        )
+
+
+class _AsyncMixin(object):
+
+    '''async knife mixin'''
+
+    __slots__ = ()
+
+    def __init__(self, *things, **kw):
+        '''
+        Initialize :mod:`knife`.
+
+        :argument things: incoming things (a single async iterable is
+          iterated over asynchronously)
+        :keyword integer limit: most coroutine :meth:`worker` results awaited
+          at once (default: ``16``)
+        '''
+        if len(things) == 1:
+            things = things[0] if hasattr(things[0], '__aiter__') else [
+                things[0]
+            ]
+        else:
+            things = list(things)
+        # most awaitable results awaited at once
+        self._limit = kw.pop('limit', 16)
+        # async iterables can't be snapshotted
+        kw['history'] = False
+        super(_AsyncMixin, self).__init__(things, [], **kw)
+        # working things
+        self._work = []
+        # holding things
+        self._hold = []
+
+    @contextmanager
+    def _chain(self, method):
+        # rebalance incoming with outcoming
+        if self._chained:
+            self._in = self._out
+        # stream incoming things straight to working things
+        self._work, self._in = self._in, []
+        self._chained = True
+        yield
+        self._parallel = self._chunked = None
+        # extend outgoing things with holding things
+        self._out = self._hold
+        # clear working and holding things
+        self._work = []
+        self._hold = []
+
+    @property
+    def _iterable(self):
+        # iterable derived from link in chain
+        return source(self._work)
+
+    def _step(self, call, one):
+        # async steps run as is, synchronous steps run on collected things
+        if not isasyncgenfunction(call):
+            call = _synced(call, one)
+        self._hold = call(self._iterable)
+        return self
+
+    # number of working things is unknown until they're awaited
+    _worksize = None
+
+    def _iter(self, call, size=None):
+        return self._step(call, False)
+
+    def _one(self, call):
+        return self._step(call, True)
+
+    def _many(self, call, size=None):
+        return self._step(call, False)
+
+    def _prependit(self, things):
+        # place things before other incoming things
+        self._in = achain(things, self._in)
+        return self
+
+    def _appendit(self, things):
+        # place things after other incoming things
+        self._in = achain(self._in, things)
+        return self
+
+    def _pipeit(self, knife):
+        knife.clear()
+        knife._out = self._out
+        knife._worker = self._worker
+        knife._args = self._args
+        knife._kw = self._kw
+        knife._wrapper = self._wrapper
+        knife._chained = self._chained
+        knife._pipe = self
+        return knife
+
+    def _unpipeit(self):
+        piped = self._pipe
+        piped.clear()
+        piped._out = self._out
+        piped._worker = self._worker
+        piped._args = self._args
+        piped._kw = self._kw
+        piped._wrapper = self._wrapper
+        piped._chained = self._chained
+        return piped
+
+    def _repr(self, clsname_=clsname, isinstance_=isinstance, list_=list):
+        # object representation without running async things
+        def show(things): #@IgnorePep8
+            return things if isinstance_(things, list_) else '...'
+        return self._REPR.format(
+            self.__module__,
+            clsname_(self),
+            show(self._in),
+            show(self._work),
+            show(self._hold),
+            show(self._out),
+        )
+
+    def _len(self, isinstance_=isinstance, list_=list):
+        # length of incoming things if known without running async things
+        if isinstance_(self._in, list_):
+            return len(self._in)
+        raise TypeError(
+            'async knives can only count incoming things after peek()'
+        )
+
+
+class _OutMixin(_AsyncMixin):
+
+    '''async output mixin'''
+
+    __slots__ = ()
+
+    def __aiter__(self):
+        '''Iterate asynchronously (once) over outgoing things.'''
+        return source(self._out)
+
+    def _clear(self):
+        # clear worker
+        self._worker = None
+        # clear worker positional arguments
+        self._args = ()
+        # clear worker keyword arguments
+        self._kw = {}
+        # revert to default iterable wrapper
+        self._wrapper = list
+        # clear pipe
+        self._pipe = None
+        # clear incoming, working, holding and outgoing things
+        self._in = []
+        self._work = []
+        self._hold = []
+        self._out = []
+        # start over
+        self._chained = False
+        return self
+
+    def _iterate(self):
+        raise TypeError('iterate over async knives with "async for"')
+
+    def _wrapped(self, things, list_=list):
+        wrap = self._wrapper
+        value = list_(wrap(i) for i in things) if self._each else wrap(
+            things
+        )
+        # reset each flag
+        self._each = False
+        # reset wrapper
+        self._wrapper = list_
+        return value[0] if len(things) == 1 else value
+
+    async def _peek(self):
+        self._in = await collect(self._in)
+        return self._wrapped(self._in)
+
+    async def _get(self):
+        self._out = await collect(self._out)
+        return self._wrapped(self._out)
+
+    async def _sink(self, sink):
+        out, self._out = await collect(self._out), []
+        return sink(out)
+
+
+class _AsyncMapMixin(_MapMixin):
+
+    '''async mapping mixin'''
+
+    __slots__ = ()
+
+    def _argmap(self, call, curr, arg, engine):
+        _noengine(engine)
+        if curr:
+            def argmap(args):
+                return call(*(args + arg))
+        else:
+            argmap = lambda x: call(*x)
+        return amap(argmap, self._limit)
+
+    def _invoke(self, name, args, engine, getattr_=getattr):
+        _noengine(engine)
+        args, kw = args
+        def invoke(thing): #@IgnorePep8
+            return getattr_(thing, name)(*args, **kw)
+        return amap(
+            invoke, self._limit, lambda x, y: x if y is None else y,
+        )
+
+    def _kwargmap(self, call, curr, arg, kw, engine):
+        _noengine(engine)
+        if curr:
+            def kwargmap(params):
+                args, kwargs = params
+                kwargs.update(kw)
+                return call(*(args + arg), **kwargs)
+        else:
+            kwargmap = lambda x: call(*x[0], **x[1])
+        return amap(kwargmap, self._limit)
+
+    def _map(self, call, engine, chunked):
+        _noengine(engine)
+        if chunked is not None:
+            raise ValueError(
+                'async knives await coroutine workers instead of chunked()'
+            )
+        return amap(call, self._limit)
+
+
+class _AsyncFilterMixin(_FilterMixin):
+
+    '''async filtering mixin'''
+
+    __slots__ = ()
+
+    def _filter(self, true, false, engine, truth_=truth, skip_=_SKIP):
+        _noengine(engine)
+        if false:
+            finish = lambda x, y: skip_ if truth_(y) else x
+        else:
+            finish = lambda x, y: x if truth_(y) else skip_
+        return amap(true, self._limit, finish)
+
+
+class _AsyncSliceMixin(_SliceMixin):
+
+    '''async slicing mixin'''
+
+    __slots__ = ()
+
+    @staticmethod
+    @memoize
+    def _at(n, default, source_=source, aclose_=aclose):
+        if n < 0:
+            raise ValueError('indexes must be at least 0')
+        async def at(aiterable): #@IgnorePep8
+            things, index = source_(aiterable), 0
+            try:
+                # stop reading once the thing at `n` turns up
+                async for thing in things:
+                    if index == n:
+                        yield thing
+                        return
+                    index += 1
+                yield default
+            finally:
+                await aclose_(things)
+        return at
+
+    @staticmethod
+    @memoize
+    def _first(n=0, aislice_=aislice):
+        return aislice_(0, n or 1)
+
+    _rest = staticmethod(aislice(1))
+
+    @staticmethod
+    def _slice(start, stop, step, aislice_=aislice):
+        if stop:
+            return aislice_(start, stop, step or 1)
+        # like islice, a lone index is where slicing stops
+        return aislice_(0, start)
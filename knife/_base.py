@@ -2,26 +2,26 @@
 '''base base knife mixins'''
 
 from operator import truth
-from threading import local
 from collections import deque
-from fnmatch import translate
-from re import compile as rcompile
 
 from stuf.six import map
-from parse import compile as pcompile
 
-from knife._compat import memoize
+from knife._cache import memoize
+from knife._match import compiled, matcher
 
 SLOTS = [
      '_in', '_work', '_hold', '_out', '_original', '_baseline', '_each', '_kw',
-     '_history', '_worker', '_wrapper', '_args', '_pipe',
+     '_history', '_worker', '_wrapper', '_args', '_pipe', '_store', '_version',
+     '_chained', '_vectorize', '_parallel', '_plan', '_profile', '_chunked',
 ]
 
 
-class _KnifeMixin(local):
+class _KnifeMixin(object):
 
     '''base knife mixin'''
 
+    __slots__ = ()
+
     def __init__(self, ins, outs, **kw):
         super(_KnifeMixin, self).__init__()
         # incoming things
@@ -35,7 +35,13 @@ class _KnifeMixin(local):
         # original and baseline snapshots
         self._original = self._baseline = None
         # maximum number of history snapshots to keep (default: 5)
-        self._history = deque(maxlen=kw.pop('snapshots', 5))
+        snapshots = kw.pop('snapshots', 5)
+        # history snapshots (if not disabled)
+        self._history = deque(maxlen=snapshots) if kw.pop(
+            'history', True
+        ) else None
+        # whether incoming things have been through a chained operation
+        self._chained = False
         # worker default
         self._worker = None
         # position arguments default
@@ -44,6 +50,14 @@ class _KnifeMixin(local):
         self._kw = {}
         # default wrapper default
         self._wrapper = list
+        # reduce numbers with NumPy
+        self._vectorize = False
+        # parallel engine settings for the next mapping or filtering step
+        self._parallel = None
+        # batch settings for the next mapping step
+        self._chunked = None
+        # profiler recording chained steps
+        self._profile = None
 
     @property
     def _identity(self):
@@ -57,14 +71,17 @@ class _KnifeMixin(local):
 
     @staticmethod
     @memoize
-    def _pattern(pat, type, flag, t=translate, r=rcompile, p=pcompile):
-        # compile glob pattern into regex
-        if type == 'glob':
-            pat = t(pat)
-            type = 'regex'
-        return r(pat, flag).search if type == 'regex' else p(pat).search
-
-    def _iter(self, call, iter_=iter, _imap=map):
+    def _pattern(pat, type, flag, c=compiled):
+        # compile pattern into its cheapest search
+        return c(pat, type, flag)
+
+    @staticmethod
+    @memoize
+    def _patterns(pats, type, flag, m=matcher):
+        # compile patterns into one matcher
+        return m(pats, type, flag)
+
+    def _iter(self, call, size=None, iter_=iter, _imap=map):
         # extend fetch with incoming things if knifing them as one thing
         return self._xtend(iter_(call(self._iterable)))
 
@@ -72,7 +89,7 @@ class _KnifeMixin(local):
         # append incoming things to fetch if knifing them as one thing
         return self._append(call(self._iterable))
 
-    def _many(self, call, _imap=map):
+    def _many(self, call, size=None, _imap=map):
         # extend fetch with incoming things if knifing them as one thing
         return self._xtend(call(self._iterable))
 
@@ -80,5 +97,22 @@ class _KnifeMixin(local):
 
     def _clearsp(self):
         # clear fetch snapshots
-        self._history.clear()
+        if self._history is not None:
+            self._history.clear()
         return self
+
+    def _needsnapshots(self):
+        # snapshots can't be restored if they were never taken
+        if self._history is None:
+            raise ValueError(
+                'snapshots are disabled for knives created with history=False'
+            )
+
+    def _copysp(self, knife):
+        # copy snapshots to another knife
+        if knife._history is not None:
+            knife._history.clear()
+            if self._history is not None:
+                knife._history.extend(self._history)
+        knife._chained = self._chained
+        return knife
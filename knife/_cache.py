@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+'''knife caching'''
+
+from sys import getsizeof
+from threading import Lock
+from functools import update_wrapper
+from collections import namedtuple
+
+from stuf.six import items
+from stuf.utils import OrderedDict
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize maxbytes size bytes')
+# caches keyed by name of the function they cache
+caches = OrderedDict()
+# marker for missing cache entries
+_MISSING = object()
+
+
+class LRUCache(object):
+
+    '''
+    Least recently used cache bounded by number of entries and by total size
+    in bytes of cached keys and values.
+    '''
+
+    def __init__(self, maxsize=128, maxbytes=None):
+        '''
+        :keyword integer maxsize: maximum number of entries (:const:`None` for
+          no limit)
+        :keyword integer maxbytes: maximum total size in bytes of cached
+          keys and values (:const:`None` for no limit)
+        '''
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = self.misses = self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):
+        '''Fetch value cached under `key`, marking it most recently used.'''
+        data = self._data
+        with self._lock:
+            try:
+                value, size = data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            data[key] = value, size
+            self.hits += 1
+            return value
+
+    def set(self, key, value, getsizeof_=getsizeof):
+        '''Cache `value` under `key`, evicting least recently used values.'''
+        size = getsizeof_(key, 0) + getsizeof_(value, 0)
+        maxbytes = self.maxbytes
+        # too big to ever be cached
+        if maxbytes is not None and size > maxbytes:
+            return value
+        data = self._data
+        with self._lock:
+            if key in data:
+                self.bytes -= data.pop(key)[1]
+            data[key] = value, size
+            self.bytes += size
+            maxsize = self.maxsize
+            while (
+                (maxsize is not None and len(data) > maxsize) or
+                (maxbytes is not None and self.bytes > maxbytes)
+            ):
+                self.bytes -= data.popitem(False)[1][1]
+        return value
+
+    def clear(self):
+        '''Empty cache and reset counters.'''
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.bytes = 0
+
+    def info(self):
+        '''Cache statistics.'''
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.maxsize,
+            self.maxbytes,
+            len(self._data),
+            self.bytes,
+        )
+
+
+def memoize(f=None, maxsize=128, maxbytes=None):
+    '''
+    Cache results of calling `f` in a bounded :class:`LRUCache`.
+
+    Usable as ``@memoize`` or, with per-function limits, as
+    ``@memoize(maxsize=..., maxbytes=...)``.
+    '''
+    if f is None:
+        return lambda f: memoize(f, maxsize, maxbytes)
+    cache = f.cache = LRUCache(maxsize, maxbytes)
+    caches['{0}.{1}'.format(f.__module__, f.__name__)] = cache
+    get, set_ = cache.get, cache.set
+    def memoize_(*args, **kw): #@IgnorePep8
+        key = (args, tuple(sorted(items(kw)))) if kw else args
+        # type each argument so 1, 1.0 and True don't share entries
+        key = (key, tuple(type(arg) for arg in args))
+        try:
+            value = get(key, _MISSING)
+        except TypeError:
+            # fall back to representation for unhashable arguments
+            key = repr(key)
+            value = get(key, _MISSING)
+        if value is _MISSING:
+            value = set_(key, f(*args, **kw))
+        return value
+    return update_wrapper(memoize_, f)
+
+
+def cache_stats():
+    '''
+    Statistics for every :mod:`knife` cache keyed by the name of the function
+    it caches.
+
+    :rtype: :class:`dict` of ``CacheInfo(hits, misses, maxsize, maxbytes,
+      size, bytes)`` :func:`~collections.namedtuple`
+    '''
+    return OrderedDict((k, v.info()) for k, v in items(caches))
+
+
+def cache_clear():
+    '''Empty every :mod:`knife` cache.'''
+    for cache in caches.values():
+        cache.clear()
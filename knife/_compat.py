@@ -2,53 +2,59 @@
 '''knife support'''
 
 from itertools import chain
-from pickletools import genops
-from functools import update_wrapper
-try:
-    import cPickle as pickle
-except ImportError:
-    import pickle  # @UnusedImport
-try:
-    import unittest2 as unittest
-except ImportError:
-    import unittest  # @UnusedImport
 from collections import MutableMapping, deque
 
-try:
-    from __builtin__ import intern
-except ImportError:
-    from sys import intern
-
 from stuf.six import items, map as imap, b
 from stuf.utils import OrderedDict, recursive_repr
 from stuf.six.moves import filterfalse, zip_longest  # @UnresolvedImport @UnusedImport @IgnorePep8
 
-
-def memoize(f, i=intern, z=items, r=repr, uw=update_wrapper):
-    f.cache = {}
-    def memoize_(*args, **kw): #@IgnorePep8
-        return f.cache.setdefault(
-            i(r(args, z(kw)) if kw else r(args)), f(*args, **kw)
-        )
-    return uw(f, memoize_)
-
+from knife._cache import memoize  # @UnusedImport
 
 ichain = chain.from_iterable
 ifilterfalse = filterfalse
-dumps = pickle.dumps
-protocol = pickle.HIGHEST_PROTOCOL
-loads = memoize(lambda x: pickle.loads(x))
+
+try:
+    unichr = unichr  # @UndefinedVariable
+except NameError:
+    # Python 3
+    unichr = chr
+
+
+def pickler():
+    # pickle is only loaded once snapshots are pickled
+    try:
+        import cPickle as pickle
+    except ImportError:
+        import pickle  # @Reimport
+    return pickle
+
+
+def regexparser():
+    # the regex parser is only loaded once a regex is analyzed
+    try:
+        from re import _parser as parser
+    except ImportError:
+        import sre_parse as parser  # @Reimport
+    return parser
+
+
+def loads(snapshot):
+    '''Restore things from pickled `snapshot`.'''
+    # not cached since every restore needs its own copy of mutable things
+    return pickler().loads(snapshot)
 
 
-@memoize
-def optimize(obj, d=dumps, p=protocol, s=set, q=deque, g=genops):
+@memoize(maxsize=8, maxbytes=1 << 24)
+def optimize(obj, s=set, q=deque):
     '''
     Optimize a pickle string by removing unused PUT opcodes.
 
     Raymond Hettinger Python cookbook recipe # 545418
     '''
+    from pickletools import genops
+    pickle = pickler()
     # set of args used by a GET opcode
-    this = d(obj, p)
+    this = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
     gets = s()
     gadd = gets.add
     # (arg, startpos, stoppos) for the PUT opcodes
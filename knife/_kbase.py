@@ -14,6 +14,32 @@ class KChainknife(AppspaceKey):
 
         :argument things: incoming things
         :keyword integer snapshots: snapshots to keep (default: ``5``)
+        :keyword boolean history: take snapshots so changes can be undone
+          (default: :const:`True`)
+        '''
+
+    def chunked(size=64, max_bytes=None):  # @NoSelf
+        '''
+        Feed :meth:`worker` batches of incoming things instead of one
+        incoming thing at a time in the next
+        :meth:`~knife.mixins.MapMixin.map`.
+
+        :meth:`worker` gets a :class:`list` of incoming things and gives back
+        an iterable of outgoing things (or :const:`None` for none) so
+        per-thing call overhead is paid once per batch.
+
+        :keyword integer size: most incoming things per batch (default:
+          ``64``)
+        :keyword integer max_bytes: most bytes per batch, measured with
+          :func:`sys.getsizeof` (default: no limit)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> from knife import __
+        >>> __(1, 2, 3, 4, 5).chunked(2).worker(
+        ...   lambda x: [sum(x)] * len(x)
+        ... ).map().get()
+        [3, 3, 7, 7, 5]
         '''
 
     def worker(worker):  # @NoSelf
@@ -41,10 +67,67 @@ class KChainknife(AppspaceKey):
         :rtype: :const:`self` (:obj:`knife` object)
         '''
 
+    def parallel(
+        workers=None, kind='process', chunksize=64, unordered=False,
+    ):  # @NoSelf
+        '''
+        Run the next :meth:`~knife.mixins.MapMixin.map`,
+        :meth:`~knife.mixins.MapMixin.argmap`,
+        :meth:`~knife.mixins.MapMixin.kwargmap`,
+        :meth:`~knife.mixins.MapMixin.invoke` or
+        :meth:`~knife.mixins.FilterMixin.filter` across a pool of workers.
+
+        Incoming things are fed to the pool in chunks. Process pools pickle
+        :meth:`worker`, :meth:`params` and incoming things so they must be
+        picklable (no lambdas).
+
+        :keyword integer workers: number of workers (default: number of
+          CPUs)
+        :keyword string kind: ``'process'`` or ``'thread'`` pool (default:
+          ``'process'``)
+        :keyword integer chunksize: incoming things per chunk (default:
+          ``64``)
+        :keyword boolean unordered: collect outgoing things as chunks finish
+          instead of in incoming order
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> from knife import __
+        >>> __(-1, -2, -3).parallel(2, chunksize=2).worker(abs).map().get()
+        [1, 2, 3]
+        '''
+
+    def profile(enable=True, callback=None):  # @NoSelf
+        '''
+        Toggle recording the method, :meth:`worker`, wall time, incoming and
+        outgoing things, snapshot bytes, and cache hits and misses of each
+        step chained from now on.
+
+        Lazy knives count things and time as they flow through each step so
+        their step profiles are complete once outgoing things are consumed.
+
+        :keyword boolean enable: record steps (default: :const:`True`)
+        :keyword callback: called with the profile of each step once it's
+          done
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> from knife import __
+        >>> test = __(1, 2, 3).profile().worker(lambda x: x > 1).filter()
+        >>> test.get()
+        [2, 3]
+        >>> step = test.report()[0]
+        >>> step['method'], step['incoming'], step['outgoing']
+        ('filter', 3, 2)
+        '''
+
     def pattern(pattern, type='parse', flags=0):  # @NoSelf
         '''
         Compile search `pattern` for use as :meth:`worker`.
 
+        Patterns are only searched for in things holding their longest
+        literal part.
+
         Global `positional <http://docs.python.org/glossary.html#term-
         positional-argument>`_ and `keyword <http://docs.python.org/glossary.
         html#term-keyword-argument>`_:meth:`params` are reset when a pattern
@@ -53,7 +136,7 @@ class KChainknife(AppspaceKey):
         :argument string pattern: search pattern
 
         :keyword string type: engine to compile `pattern` with. Valid options
-          are `'parse' <http://pypi.python.org/pypi/parse/>`_, `'re'
+          are `'parse' <http://pypi.python.org/pypi/parse/>`_, `'regex'
           <http://docs.python.org/library/re.html>`_, or `'glob' <http://docs.
           python.org/library/fnmatch.html>`_
 
@@ -74,6 +157,46 @@ class KChainknife(AppspaceKey):
         'third test'
         '''
 
+    def patterns(patterns, type='parse', flags=0):  # @NoSelf
+        '''
+        Compile search `patterns` into one matcher for use as :meth:`worker`
+        that gives the pattern that matched or :const:`None` if none did.
+
+        Literal strings are searched for all at once with an `Aho-Corasick
+        <https://en.wikipedia.org/wiki/Aho-Corasick_algorithm>`_ automaton, so
+        each thing is read once however many patterns there are. Regular
+        expressions without special characters are searched for as literals.
+        Glob patterns are only tried on things holding their longest literal
+        part. Patterns matched ignoring case are searched for one at a time.
+        Where several patterns match, the first of them is given.
+
+        Global `positional <http://docs.python.org/glossary.html#term-
+        positional-argument>`_ and `keyword <http://docs.python.org/glossary.
+        html#term-keyword-argument>`_:meth:`params` are reset when patterns
+        are compiled.
+
+        :argument patterns: sequence of search patterns
+
+        :keyword string type: engine to compile `patterns` with. Valid
+          options are `'parse' <http://pypi.python.org/pypi/parse/>`_, `'regex'
+          <http://docs.python.org/library/re.html>`_, `'glob' <http://docs.
+          python.org/library/fnmatch.html>`_, or ``'literal'``
+
+        :keyword integer flags: regular expression `flags
+          <http://docs.python.org/library/re.html#re.DEBUG>`_ (only
+          :data:`re.IGNORECASE` applies to literals)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> test = __('first test', 'second test', 'third test')
+        >>> test.patterns(['first*', 'third*'], type='glob').filter().get()
+        ['first test', 'third test']
+        >>> test.original().patterns(
+        ...     ['second', 'third'], type='literal',
+        ... ).map().get()
+        [None, 'second', 'third']
+        '''
+
     def prepend(*things):  # @NoSelf
         '''
         Insert `things` **before** other incoming things.
@@ -148,6 +271,111 @@ class KOutput(KChainknife):
         with :meth:`wrap`.
         '''
 
+    def to_file(path, encoding='utf-8', newline='\n', flush=1024):  # @NoSelf
+        '''
+        Write outgoing things to a file one line per thing, `flush` lines at
+        a time, without holding every outgoing thing.
+
+        Outgoing things are used up once they are written.
+        Lazy knives drop their snapshots first so they don't hold on to them.
+
+        :argument path: path of file or binary file object to write to
+
+        :keyword string encoding: encoding of things that aren't bytes
+
+        :keyword string newline: separator written after every thing
+
+        :keyword integer flush: number of lines written at once
+
+        :return: number of lines written
+        '''
+
+    def to_jsonl(path, flush=1024, **kw):  # @NoSelf
+        '''
+        Write outgoing things to a file as `JSON lines
+        <http://jsonlines.org/>`_, `flush` lines at a time, without holding
+        every outgoing thing.
+
+        Outgoing things are used up once they are written.
+        Lazy knives drop their snapshots first so they don't hold on to them.
+
+        :argument path: path of file or binary file object to write to
+
+        :keyword integer flush: number of lines written at once
+
+        :keyword kw: keyword arguments for :func:`json.dumps`
+
+        :return: number of lines written
+        '''
+
+    def to_csv(
+        path, fields=None, encoding='utf-8', flush=1024, **kw
+    ):  # @NoSelf
+        '''
+        Write outgoing things to a CSV file one row per thing, `flush` rows at
+        a time, without holding every outgoing thing.
+
+        Outgoing things are used up once they are written.
+        Lazy knives drop their snapshots first so they don't hold on to them.
+
+        :argument path: path of file or file object to write to
+
+        :keyword fields: field names for writing :class:`dict` things with
+          a header row or :const:`None` for writing sequences
+
+        :keyword string encoding: file encoding (Python 3 only)
+
+        :keyword integer flush: number of rows written at once
+
+        :keyword kw: keyword arguments for :func:`csv.writer`
+
+        :return: number of rows written
+        '''
+
+    def to_sqlite(database, table, columns=None, flush=1024):  # @NoSelf
+        '''
+        Insert outgoing things as rows into an existing SQLite table with
+        one :meth:`~sqlite3.Cursor.executemany` per `flush` rows, all in one
+        transaction.
+
+        Outgoing things are used up once they are inserted.
+        Lazy knives drop their snapshots first so they don't hold on to them.
+
+        :argument database: path of database or :class:`sqlite3.Connection`
+
+        :argument string table: name of table
+
+        :keyword columns: names of columns filled in or :const:`None` for
+          every column
+
+        :keyword integer flush: number of rows inserted at once
+
+        :return: number of rows inserted
+        '''
+
+    def to_queue(queue, flush=1):  # @NoSelf
+        '''
+        Put outgoing things on a queue so a bounded queue holds back the
+        pipeline until they are taken.
+
+        Outgoing things are used up once they are put on the queue.
+        Lazy knives drop their snapshots first so they don't hold on to them.
+
+        :argument queue: queue like :class:`queue.Queue`
+
+        :keyword integer flush: put things one at a time if ``1`` or as lists
+          of up to `flush` things
+
+        :return: number of things put on `queue`
+        '''
+
+    def report():  # @NoSelf
+        '''
+        Return profiles of steps recorded since :meth:`profile` was invoked.
+
+        :rtype: :class:`list` of :class:`dict`
+        '''
+
     def wrap(wrapper):  # @NoSelf
         '''
         Assign :class:`object`, :class:`type`, or :obj:`class` used to wrap
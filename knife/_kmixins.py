@@ -32,7 +32,24 @@ class KCompare(AppspaceKey):
         True
         '''
 
-    def difference(symmetric=False):  # @NoSelf
+    def count_distinct(error=0.01):  # @NoSelf
+        '''
+        Estimate how many distinct incoming things there are using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Counts are estimated with `HyperLogLog <https://en.wikipedia.org/wiki/
+        HyperLogLog>`_ so memory stays fixed however many things come in.
+
+        :keyword float error: standard error of the estimate
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 1, 3, 1, 4).count_distinct().get()
+        4
+        '''
+
+    def difference(symmetric=False, presorted=False):  # @NoSelf
         '''
         Discover `difference <http://docs.python.org/library/stdtypes.html#
         set.difference>`_ within a series of `iterable <http://docs.python.
@@ -41,6 +58,9 @@ class KCompare(AppspaceKey):
         :keyword boolean symmetric: use `symmetric <http://docs.python.org/
           library/stdtypes.html#set.symmetric_difference>`_ difference
 
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> # default behavior
@@ -50,6 +70,11 @@ class KCompare(AppspaceKey):
         >>> # symmetric difference
         >>> test.original().difference(symmetric=True).get()
         [1, 2, 3, 4, 11]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3, 4, 5], [2, 5, 10], [2, 10, 11]).difference(
+        ...   presorted=True
+        ... ).get()
+        [1, 3, 4]
         '''
 
     def intersect():  # @NoSelf
@@ -64,21 +89,63 @@ class KCompare(AppspaceKey):
         [1, 2]
         '''
 
-    def union():  # @NoSelf
+    def intersection(presorted=False):  # @NoSelf
+        '''
+        Discover `intersection <http://docs.python.org/library/stdtypes.html#
+        set.intersection>`_ within a series of `iterable <http://docs.python.
+        org/glossary.html#term-iterable>`_ incoming things.
+
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __([1, 2, 3], [101, 2, 1, 10], [2, 1]).intersection().get()
+        [1, 2]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3], [1, 2, 10, 101], [1, 2]).intersection(
+        ...   presorted=True
+        ... ).get()
+        [1, 2]
+        '''
+
+    def union(presorted=False):  # @NoSelf
         '''
         Discover `union <http://docs.python.org/py3k/library/stdtypes.html#
         set.union>`_ within a series of `iterable <http://docs.python.org/
-        glossary.html#term-iterable>`_ incoming things.
+        glossary.html#term-iterable>`_ incoming things in the order they
+        first turn up.
+
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
 
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __([1, 2, 3], [101, 2, 1, 10], [2, 1]).union().get()
-        [1, 10, 3, 2, 101]
+        [1, 2, 3, 101, 10]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3], [1, 2, 10, 101], [1, 2]).union(presorted=True).get()
+        [1, 2, 3, 10, 101]
         '''
 
-    def unique():  # @NoSelf
+    def unique(
+        presorted=False, approx=False, capacity=1000000, error=0.001,
+    ):  # @NoSelf
         '''
-        Discover unique incoming things.
+        Discover unique incoming things in the order they first turn up.
+
+        :keyword boolean presorted: incoming things are already sorted so
+          drop repeats next to each other without remembering every thing
+
+        :keyword boolean approx: remember things in a fixed size `Bloom
+          filter <https://en.wikipedia.org/wiki/Bloom_filter>`_ instead of a
+          :class:`set` so some unique things may be mistaken for repeats
+
+        :keyword integer capacity: number of unique things the Bloom filter
+          is sized for
+
+        :keyword float error: rate unique things are mistaken for repeats
+          once `capacity` unique things have come in
 
         :rtype: :const:`self` (:obj:`knife` object)
 
@@ -88,6 +155,12 @@ class KCompare(AppspaceKey):
         >>> # using worker as key function
         >>> __(1, 2, 1, 3, 1, 4).worker(round).unique().get()
         [1, 2, 3, 4]
+        >>> # sorted incoming things
+        >>> __(1, 1, 2, 3, 3, 4).unique(presorted=True).get()
+        [1, 2, 3, 4]
+        >>> # fixed memory
+        >>> __(1, 2, 1, 3, 1, 4).unique(approx=True).get()
+        [1, 2, 3, 4]
         '''
 
 
@@ -149,10 +222,17 @@ class KMath(AppspaceKey):
         {'age': 60, 'name': 'curly'}
         '''
 
-    def median():  # @NoSelf
+    def median(approx=False, budget=None):  # @NoSelf
         '''
         Discover median value among incoming things.
 
+        :keyword boolean approx: estimate median in one pass and constant
+          memory instead of finding it exactly
+
+        :keyword integer budget: most incoming things held in memory at once
+          while sorting them through temporary files (default: hold every
+          incoming thing in memory)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(4, 5, 7, 2, 1).median().get()
@@ -191,6 +271,28 @@ class KMath(AppspaceKey):
         4
         '''
 
+    def quantile(q, approx=False, budget=None):  # @NoSelf
+        '''
+        Discover value below which fraction `q` of incoming things fall,
+        interpolating linearly between the closest incoming things.
+
+        :argument float q: quantile between ``0`` and ``1``
+
+        :keyword boolean approx: estimate quantile in one pass and constant
+          memory instead of finding it exactly
+
+        :keyword integer budget: most incoming things held in memory at once
+          while sorting them through temporary files (default: hold every
+          incoming thing in memory)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 3, 4, 5).quantile(0.25).get()
+        2
+        >>> __(1, 2, 3, 4).quantile(0.5).get()
+        2.5
+        '''
+
     def range():  # @NoSelf
         '''
         Discover length of the smallest interval that can contain the value of
@@ -202,6 +304,19 @@ class KMath(AppspaceKey):
         8
         '''
 
+    def stdev(population=False):  # @NoSelf
+        '''
+        Discover standard deviation of incoming things.
+
+        :keyword boolean population: standard deviation of all possible
+          things rather than of a sample of them
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).stdev(population=True).get()
+        2.0
+        '''
+
     def sum(start=0, precision=False):  # @NoSelf
         '''
         Discover total value of adding `start` and incoming things together.
@@ -224,16 +339,77 @@ class KMath(AppspaceKey):
         0.8
         '''
 
+    def variance(population=False):  # @NoSelf
+        '''
+        Discover variance of incoming things in one pass.
+
+        :keyword boolean population: variance of all possible things rather
+          than of a sample of them
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).variance().get()
+        4.571428571428571
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).variance(population=True).get()
+        4.0
+        '''
+
+    def vectorize(vectorize=True):  # @NoSelf
+        '''
+        Toggle reducing incoming numbers with `NumPy
+        <http://www.numpy.org/>`_ in later mathing methods.
+
+        Incoming things that aren't all integers or floats, or integers too
+        big for machine integers, are still reduced in pure Python as are all
+        incoming things if NumPy isn't installed.
+
+        :keyword boolean vectorize: reduce with NumPy if installed
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).vectorize().variance().get()
+        4.571428571428571
+        '''
+
 
 class KOrder(AppspaceKey):
 
     '''ordering knife mixin'''
 
-    def group():  # @NoSelf
+    def bottom(n=1):  # @NoSelf
+        '''
+        Slice off the `n` smallest incoming things, smallest first, using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Only `n` things are kept in memory so this is faster than
+        :meth:`sort` followed by :meth:`~knife.mixins.SliceMixin.first`.
+
+        :keyword integer n: number of incoming things
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(4, 6, 65, 3, 63, 2, 4).bottom(3).get()
+        [2, 3, 4]
+        '''
+
+    def group(reduce=None, initial=None, budget=None):  # @NoSelf
         '''
         Group incoming things using :meth:`worker` as the `key function
         <http://docs.python.org/glossary.html#term-key-function>`_.
 
+        Groups are collected in a hash table so keys only need to be
+        hashable. Groups come out in the order their keys first turn up.
+
+        :keyword reduce: binary function folding every group into one thing
+          as it is collected (default: keep every thing in a group)
+
+        :keyword initial: starting value for `reduce`, copied for every group
+
+        :keyword integer budget: most groups held in memory at once before
+          things with new keys are spilled to temporary files and regrouped
+          in the same order (default: hold every group in memory)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> from knife import __
@@ -244,6 +420,13 @@ class KOrder(AppspaceKey):
         >>> # use worker for key function
         >>> __(1.3, 2.1, 2.4).worker(floor).group().get()
         [Group(keys=1.0, groups=(1.3,)), Group(keys=2.0, groups=(2.1, 2.4))]
+        >>> # reduce groups as they are collected
+        >>> from operator import add
+        >>> __(1, 2, 3, 4, 5).worker(lambda x: x % 2).group(add).get()
+        [Group(keys=1, groups=9), Group(keys=0, groups=6)]
+        >>> # count things in every group
+        >>> __('a', 'b', 'a').group(lambda x, y: x + 1, 0).get()
+        [Group(keys='a', groups=2), Group(keys='b', groups=1)]
         '''
 
     def reverse():  # @NoSelf
@@ -256,30 +439,62 @@ class KOrder(AppspaceKey):
         [1, 2, 3, 4, 5]
         '''
 
-    def sort():  # @NoSelf
+    def sort(budget=None):  # @NoSelf
+        '''
+        Reorder incoming things using :meth:`worker` as the `key function
+        <http://docs.python.org/glossary.html#term-key-function>`_.
+
+        :keyword integer budget: most incoming things held in memory at once.
+          Sorted runs of `budget` incoming things are spilled to temporary
+          files and merged back (default: sort every incoming thing in
+          memory)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> # default sort
+        >>> __(4, 6, 65, 3, 63, 2, 4).sort().get()
+        [2, 3, 4, 4, 6, 63, 65]
+        >>> from math import sin
+        >>> # using worker as key function
+        >>> __(1, 2, 3, 4, 5, 6).worker(sin).sort().get()
+        [5, 4, 6, 3, 1, 2]
+        >>> # sort through temporary files
+        >>> __(4, 6, 65, 3, 63, 2, 4).sort(budget=3).get()
+        [2, 3, 4, 4, 6, 63, 65]
+        '''
+
+    def shuffle(seed=None):  # @NoSelf
         '''
         Randomly sort incoming things.
 
+        :keyword seed: seed for a private random number generator so the
+          order can be reproduced (default: shared generator of
+          :mod:`random`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
           >>> __(5, 4, 3, 2, 1).shuffle().get() # doctest: +SKIP
           [3, 1, 5, 4, 2]
         '''
 
-    def shuffle():  # @NoSelf
+    def top(n=1):  # @NoSelf
         '''
-        Reorder incoming things using :meth:`worker` as the `key function
-        <http://docs.python.org/glossary.html#term-key-function>`_.
+        Slice off the `n` largest incoming things, largest first, using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Only `n` things are kept in memory so this is faster than
+        :meth:`sort` followed by :meth:`~knife.mixins.SliceMixin.last`.
+
+        :keyword integer n: number of incoming things
 
         :rtype: :const:`self` (:obj:`knife` object)
 
-        >>> # default sort
-        >>> __(4, 6, 65, 3, 63, 2, 4).sort().get()
-        [2, 3, 4, 4, 6, 63, 65]
-        >>> from math import sin
+        >>> __(4, 6, 65, 3, 63, 2, 4).top(3).get()
+        [65, 63, 6]
         >>> # using worker as key function
-        >>> __(1, 2, 3, 4, 5, 6).worker(sin).sort().get()
-        [5, 4, 6, 3, 1, 2]
+        >>> __('moe', 'larry', 'curly').worker(len).top(2).get()
+        ['larry', 'curly']
         '''
 
 
@@ -428,10 +643,13 @@ class KMap(AppspaceKey):
         [270, 330, 390]
         '''
 
-    def map(self):  # @NoSelf
+    def map():  # @NoSelf
         '''
         Feed each incoming thing to :meth:`worker`.
 
+        After :meth:`~knife.base.ChainknifeMixin.chunked`, :meth:`worker` is
+        fed batches of incoming things instead.
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(1, 2, 3).worker(lambda x: x * 3).map().get()
@@ -606,15 +824,24 @@ class KReduce(AppspaceKey):
 
     '''reducing knife key'''
 
-    def flatten():  # @NoSelf
+    def flatten(depth=None, atoms=None):  # @NoSelf
         '''
         Reduce nested incoming things to flattened incoming things.
 
+        :keyword integer depth: most levels of nesting to flatten (default:
+          flatten every level)
+
+        :keyword tuple atoms: types not flattened besides strings (default:
+          bytes, :class:`bytearray`, and :class:`dict`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> from knife import __
         >>> __([[1, [2], [3, [[4]]]], 'here']).flatten().get()
         [1, 2, 3, 4, 'here']
+        >>> # flatten two levels
+        >>> __([[1, [2], [3, [[4]]]], 'here']).flatten(2).get()
+        [1, [2], [3, [[4]]], 'here']
         '''
 
     def merge():  # @NoSelf
@@ -699,10 +926,33 @@ class KSlice(AppspaceKey):
         11
         '''
 
-    def choice():  # @NoSelf
+    def batch(size, max_bytes=None):  # @NoSelf
+        '''
+        `Slice <http://docs.python.org/glossary.html#term-slice>`_ incoming
+        things into :class:`list` batches of up to `size` incoming things.
+
+        :argument integer size: most incoming things per batch
+
+        :keyword integer max_bytes: most bytes per batch, measured with
+          :func:`sys.getsizeof` (default: no limit)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __('moe', 'larry', 'curly', 30, 40, 50, True).batch(3).get()
+        [['moe', 'larry', 'curly'], [30, 40, 50], [True]]
+        '''
+
+    def choice(weighted=False, seed=None):  # @NoSelf
         '''
         Randomly `slice <http://docs.python.org/glossary.html#term-slice>`_
-        off **one** incoming thing.
+        off **one** incoming thing in one pass.
+
+        :keyword boolean weighted: use :meth:`worker` to weigh incoming things
+          so heavier things are likelier to be chosen
+
+        :keyword seed: seed for a private random number generator so the
+          choice can be reproduced (default: shared generator of
+          :mod:`random`)
 
         :rtype: :const:`self` (:obj:`knife` object)
 
@@ -783,17 +1033,29 @@ class KSlice(AppspaceKey):
         [4, 3, 2, 1]
         '''
 
-    def sample(n):  # @NoSelf
+    def sample(n, weighted=False, seed=None):  # @NoSelf
         '''
         Randomly `slice <http://docs.python.org/glossary.html#term-slice>`_ off
-        `n` incoming things.
+        `n` incoming things in one pass, keeping no more than `n` things in
+        memory.
 
         :argument integer n: sample size
 
+        :keyword boolean weighted: use :meth:`worker` to weigh incoming things
+          so heavier things are likelier to be sampled
+
+        :keyword seed: seed for a private random number generator so the
+          sample can be reproduced (default: shared generator of
+          :mod:`random`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(1, 2, 3, 4, 5, 6).sample(3).get() # doctest: +SKIP
         [2, 4, 5]
+        >>> __(1, 2, 3, 4, 5, 6).worker(lambda x: x).sample(
+        ...   3, weighted=True,
+        ... ).get() # doctest: +SKIP
+        [6, 4, 5]
         '''
 
     def slice(start, stop=False, step=False):  # @NoSelf
@@ -819,3 +1081,21 @@ class KSlice(AppspaceKey):
         >>> __(5, 4, 3, 2, 1).slice(2, 4, 2).get()
         3
         '''
+
+    def window(n, step=1):  # @NoSelf
+        '''
+        `Slice <http://docs.python.org/glossary.html#term-slice>`_ incoming
+        things into sliding windows of `n` incoming things.
+
+        :argument integer n: number of incoming things per window
+
+        :keyword integer step: number of incoming things between the starts
+          of windows
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 3, 4, 5).window(3).get()
+        [(1, 2, 3), (2, 3, 4), (3, 4, 5)]
+        >>> __(1, 2, 3, 4, 5).window(2, 3).get()
+        [(1, 2), (4, 5)]
+        '''
@@ -1,75 +1,256 @@
 # -*- coding: utf-8 -*-
 '''lazily evaluated knives'''
 
-from threading import local
 from itertools import tee, chain
 from contextlib import contextmanager
 
 from stuf.utils import clsname
 
 from knife._compat import count
+from knife._base import SLOTS as _SLOTS
+from knife._plan import ITER, ONE, MANY, compose
+from knife._source import (
+    BUFFERING, delimiter as split, decoded, readfile, readmap)
 
+# known numbers of incoming, outgoing, working and holding things
+SLOTS = _SLOTS + ['_size', '_outsize', '_worksize', '_holdsize']
 
-class _LazyMixin(local):
+
+def add(known, size):
+    # add to number of things unless either is unknown
+    return None if known is None or size is None else known + size
+
+
+class _LazyMixin(object):
 
     '''lazy knife mixin'''
 
+    __slots__ = ()
+
     def __init__(self, *things, **kw):
         '''
         Initialize :mod:`knife`.
 
         :argument things: incoming things
         :keyword integer snapshots: snapshots to keep (default: ``5``)
+        :keyword boolean history: take snapshots so changes can be undone
+          (default: :const:`True`)
+        :keyword boolean plan: record steps and run them, with adjacent
+          mapping and filtering steps fused into one loop, only when outgoing
+          things are needed (default: :const:`False`)
         '''
         incoming = iter([things[0]]) if len(things) == 1 else iter(things)
+        plan = kw.pop('plan', False)
         super(_LazyMixin, self).__init__(incoming, iter([]), **kw)
+        # steps recorded in plan mode
+        self._plan = [] if plan else None
         # working things
         self._work = iter([])
         # holding things
         self._hold = iter([])
+        # numbers of things (None if unknown)
+        self._size = len(things)
+        self._outsize = self._worksize = self._holdsize = 0
+
+    @classmethod
+    def _source(cls, things, **kw):
+        # knife streaming incoming things from an iterator
+        knife = cls(**kw)
+        knife._in = things
+        # number of things is unknown until they're read
+        knife._size = None
+        return knife
+
+    @classmethod
+    def from_file(
+        cls, path, mode='lines', size=None, delimiter=None, encoding=None,
+        buffering=BUFFERING, **kw
+    ):
+        '''
+        Knife streaming records read from the file at `path` in large
+        buffered blocks.
+
+        Records are zero-copy :class:`memoryview` slices of each block
+        unless an `encoding` is given. Then each record is decoded only when
+        it is pulled through the knife.
+
+        :argument string path: file path
+
+        :keyword string mode: ``'lines'`` splits records on newlines,
+          ``'records'`` on `delimiter`, and ``'fixed'`` into records of
+          `size` bytes (default: ``'lines'``)
+        :keyword integer size: bytes per record in ``'fixed'`` mode
+        :keyword bytes delimiter: bytes ending records in ``'records'`` mode
+        :keyword string encoding: encoding used to decode records (default:
+          records aren't decoded)
+        :keyword integer buffering: bytes read at once (default: 1 MiB)
+        :keyword kw: keyword arguments for the knife
+
+        :rtype: :obj:`knife` object
+        '''
+        end = split(mode, size, delimiter)
+        return cls._source(
+            decoded(encoding, readfile(path, end, size, buffering)), **kw
+        )
+
+    @classmethod
+    def from_mmap(
+        cls, path, mode='lines', size=None, delimiter=None, encoding=None,
+        **kw
+    ):
+        '''
+        Knife streaming records sliced from the file at `path` through a
+        read-only :mod:`mmap` so the operating system pages it in on demand.
+
+        Records are zero-copy :class:`memoryview` slices of the map unless
+        an `encoding` is given. Then each record is decoded only when it is
+        pulled through the knife.
+
+        :argument string path: file path
+
+        :keyword string mode: ``'lines'`` splits records on newlines,
+          ``'records'`` on `delimiter`, and ``'fixed'`` into records of
+          `size` bytes (default: ``'lines'``)
+        :keyword integer size: bytes per record in ``'fixed'`` mode
+        :keyword bytes delimiter: bytes ending records in ``'records'`` mode
+        :keyword string encoding: encoding used to decode records (default:
+          records aren't decoded)
+        :keyword kw: keyword arguments for the knife
+
+        :rtype: :obj:`knife` object
+        '''
+        end = split(mode, size, delimiter)
+        return cls._source(
+            decoded(encoding, readmap(path, end, size)), **kw
+        )
 
-    @property
     @contextmanager
-    def _chain(self, iter_=iter, tee_=tee):
-        # take snapshot
-        self._in, snapshot = tee_(self._in)
-        # rebalance incoming with outcoming
-        if self._history:
-            self._in, self._out = tee_(self._out)
-        # make snapshot original snapshot?
+    def _chain(self, method, iter_=iter, tee_=tee):
+        if self._plan is not None:
+            if not self._plan:
+                # number of things the plan starts with
+                self._worksize = (
+                    self._outsize if self._rebalance else self._size
+                )
+            # steps are recorded until the plan is compiled
+            yield
+            self._parallel = self._chunked = None
+            return
+        if self._history is None:
+            # rebalance incoming with outcoming without taking snapshots
+            if self._chained:
+                self._in = self._out
+                self._size = self._outsize
+            # stream incoming things straight to working things
+            self._work, self._in = self._in, iter_([])
+            self._worksize, self._size = self._size, 0
         else:
-            self._original = snapshot
-        # place snapshot at beginning of snapshot stack
-        self._history.appendleft(snapshot)
-        # move incoming things to working things
-        work, self._in = tee_(self._in)
-        self._work = work
+            # take snapshot
+            self._in, snapshot = tee_(self._in)
+            # make snapshot original snapshot?
+            if self._original is None:
+                self._original = snapshot
+            # rebalance incoming with outcoming like without snapshots
+            if self._chained:
+                self._in, self._out = tee_(self._out)
+                self._size = self._outsize
+            # place snapshot at beginning of snapshot stack
+            self._history.appendleft(snapshot)
+            # move incoming things to working things
+            work, self._in = tee_(self._in)
+            self._work = work
+            self._worksize = self._size
+        self._chained = True
+        profile = self._profile
+        if profile is not None:
+            step = profile.start(self, method)
+            self._work = profile.meter(step, self._work)
         yield
+        # parallel engine and batching only run one step
+        self._parallel = self._chunked = None
         # extend outgoing things with holding things
         self._out = self._hold
+        self._outsize = self._holdsize
+        if profile is not None:
+            profile.stop(step)
+            # count things as they flow out of this step
+            self._out = profile.metered(step, self._out)
         # clear working things
         del self._work
         self._work = iter_([])
         # clear holding things
         del self._hold
         self._hold = iter_([])
+        self._worksize = self._holdsize = 0
 
     @property
     def _iterable(self):
         # iterable derived from link in chain
         return self._work
 
-    def _xtend(self, things, chain_=chain):
+    @property
+    def _rebalance(self):
+        # whether the next step starts from outgoing things
+        return self._chained
+
+    def _sized(self, size):
+        # number of things a step gives if knowable
+        worksize = self._worksize
+        return None if size is None or worksize is None else size(worksize)
+
+    def _record(self, mode, call, size):
+        self._plan.append((mode, call))
+        # number of things the plan gives so far
+        self._worksize = 1 if mode is ONE else self._sized(size)
+        return self
+
+    def _iter(self, call, size=None, iter_=iter):
+        if self._plan is not None:
+            return self._record(ITER, call, size)
+        return self._xtend(iter_(call(self._iterable)), self._sized(size))
+
+    def _one(self, call):
+        if self._plan is not None:
+            return self._record(ONE, call, None)
+        return super(_LazyMixin, self)._one(call)
+
+    def _many(self, call, size=None):
+        if self._plan is not None:
+            return self._record(MANY, call, size)
+        return self._xtend(call(self._iterable), self._sized(size))
+
+    def _compile(self):
+        # run recorded steps as one link in the chain
+        plan = self._plan
+        if not plan:
+            return self
+        self._plan = None
+        # number of things recorded steps give
+        size = self._worksize
+        try:
+            with self._chain('plan'):
+                self._xtend(compose(plan, self._iterable), size)
+        finally:
+            self._plan = []
+        return self
+
+    def _xtend(self, things, size=None, chain_=chain):
         # place things after holding things
         self._hold = chain_(things, self._hold)
+        self._holdsize = add(self._holdsize, size)
         return self
 
     def _append(self, things, chain_=chain, iter_=iter):
         # append thing after other holding things
         self._hold = chain_(self._hold, iter_([things]))
+        self._holdsize = add(self._holdsize, 1)
         return self
 
-    def _prependit(self, things, tee_=tee, chain_=chain):
+    def _remember(self, tee_=tee):
+        self._compile()
+        # snapshots disabled
+        if self._history is None:
+            return
         # take snapshot
         self._in, snapshot = tee_(self._in)
         # make snapshot original snapshot?
@@ -77,29 +258,29 @@ class _LazyMixin(local):
             self._original = snapshot
         # place snapshot at beginning of snapshot stack
         self._history.appendleft(snapshot)
+
+    def _prependit(self, things, chain_=chain, len_=len):
+        self._remember()
         # place things before other incoming things
         self._in = chain_(things, self._in)
+        self._size = add(self._size, len_(things))
         return self
 
-    def _appendit(self, things, tee_=tee, chain_=chain):
-        # take snapshot
-        self._in, snapshot = tee_(self._in)
-        # make snapshot original snapshot?
-        if self._original is None:
-            self._original = snapshot
-        # place snapshot at beginning of snapshot stack
-        self._history.appendleft(snapshot)
+    def _appendit(self, things, chain_=chain, len_=len):
+        self._remember()
         # place things before other incoming things
         self._in = chain_(self._in, things)
+        self._size = add(self._size, len_(things))
         return self
 
     def _pipeit(self, knife):
+        self._compile()
         knife.clear()
-        knife._history.clear()
-        knife._history.extend(self._history)
+        self._copysp(knife)
         knife._original = self._original
         knife._baseline = self._baseline
         knife._out = self._out
+        knife._outsize = self._outsize
         knife._worker = self._worker
         knife._args = self._args
         knife._kw = self._kw
@@ -108,13 +289,14 @@ class _LazyMixin(local):
         return knife
 
     def _unpipeit(self):
+        self._compile()
         piped = self._pipe
         piped.clear()
-        piped._history.clear()
-        piped._history.extend(self._history)
+        self._copysp(piped)
         piped._original = self._original
         piped._baseline = self._baseline
         piped._out = self._out
+        piped._outsize = self._outsize
         piped._worker = self._worker
         piped._args = self._args
         piped._kw = self._kw
@@ -123,6 +305,7 @@ class _LazyMixin(local):
 
     def _repr(self, tee_=tee, l=list, clsname_=clsname):
         # object representation
+        self._compile()
         self._in, in2 = tee_(self._in)
         self._out, out2 = tee_(self._out)
         self._work, work2 = tee_(self._work)
@@ -138,21 +321,30 @@ class _LazyMixin(local):
 
     def _len(self, tee_=tee, count_=count):
         # length of incoming things
+        self._compile()
+        if self._size is not None:
+            return self._size
         self._in, incoming = tee_(self._in)
-        return count_(incoming)
+        self._size = count_(incoming)
+        return self._size
 
 
 class _OutMixin(_LazyMixin):
 
     '''lazy output mixin'''
 
+    __slots__ = ()
+
     def _undo(self, snapshot=0, iter_=iter):
+        self._compile()
         # clear everything
         self.clear()
         # if specified, use a specific snapshot
         if snapshot:
             self._history.rotate(-(snapshot - 1))
         self._in = self._history.popleft()
+        # snapshots don't keep their sizes
+        self._size = None
         # clear outgoing things
         del self._out
         self._out = iter_([])
@@ -160,6 +352,7 @@ class _OutMixin(_LazyMixin):
 
     def _snapshot(self, tee_=tee):
         # take baseline snapshot of incoming things
+        self._compile()
         self._in, self._baseline = tee_(self._in)
         return self
 
@@ -170,6 +363,7 @@ class _OutMixin(_LazyMixin):
         self._clearsp()
         # revert to baseline snapshot of incoming things
         self._in, self._baseline = tee_(self._baseline)
+        self._size = None
         return self
 
     def _revert(self, tee_=tee):
@@ -181,6 +375,7 @@ class _OutMixin(_LazyMixin):
         self._baseline = None
         # restore original snapshot of incoming things
         self._in, self._original = tee_(self._original)
+        self._size = None
         return self
 
     def _clear(self, iter_=iter, list_=list):
@@ -206,28 +401,61 @@ class _OutMixin(_LazyMixin):
         # clear outgoing things
         del self._out
         self._out = iter_([])
+        self._size = self._outsize = self._worksize = self._holdsize = 0
+        # start over
+        self._chained = False
+        # forget recorded steps
+        if self._plan is not None:
+            self._plan = []
         return self
 
     def _iterate(self, tee_=tee):
+        self._compile()
         self._out, outs = tee_(self._out)
         return outs
 
     def _peek(self, tee_=tee, list_=list, count_=count):
-        tell, self._in, out = tee_(self._in, 3)
+        self._compile()
+        size = self._size
+        if size is None:
+            tell, self._in, out = tee_(self._in, 3)
+            size = self._size = count_(tell)
+        else:
+            self._in, out = tee_(self._in)
         wrap = self._wrapper
         value = list_(wrap(i) for i in out) if self._each else wrap(out)
         # reset each flag
         self._each = False
         # reset wrapper
         self._wrapper = list_
-        return value[0] if count_(tell) == 1 else value
+        return value[0] if size == 1 else value
 
     def _get(self, tee_=tee, list_=list, count_=count):
-        tell, self._out, out = tee_(self._out, 3)
+        self._compile()
+        size = self._outsize
+        if size is None:
+            tell, self._out, out = tee_(self._out, 3)
+            size = self._outsize = count_(tell)
+        else:
+            self._out, out = tee_(self._out)
         wrap = self._wrapper
         value = list_(wrap(i) for i in out) if self._each else wrap(out)
         # reset each flag
         self._each = False
         # reset wrapper
         self._wrapper = list_
-        return value[0] if count_(tell) == 1 else value
+        return value[0] if size == 1 else value
+
+    def _sink(self, sink, iter_=iter):
+        self._compile()
+        # outgoing things are written as they're pulled instead of teed
+        out, self._out = self._out, iter_([])
+        self._outsize = 0
+        # snapshots and incoming things are tees of outgoing things that would
+        # buffer everything written so they're let go first
+        self._clearsp()
+        self._original = self._baseline = None
+        del self._in
+        self._in = iter_([])
+        self._size = 0
+        return sink(out)
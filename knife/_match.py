@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+'''knife pattern matching'''
+
+import re
+from fnmatch import translate
+from re import IGNORECASE, DOTALL, compile as rcompile, escape
+
+from knife._compat import regexparser, unichr
+
+# characters making a regex more than a literal string
+_SPECIAL = frozenset('.^$*+?{}[]\\|()')
+# flags changing which characters match a literal
+_CASE = IGNORECASE | re.LOCALE | re.UNICODE | getattr(re, 'ASCII', 0)
+# parse fields, escaped braces and lone braces
+_FIELDS = rcompile(r'({{|}}|{[^{}]*}|[{}])')
+# literal sets this small are faster searched for one at a time
+SMALL = 200
+
+
+class Automaton(object):
+
+    '''
+    `Aho-Corasick <https://en.wikipedia.org/wiki/Aho-Corasick_algorithm>`_
+    automaton finding which of many literals are in a string in one pass.
+    '''
+
+    __slots__ = ('delta', 'out')
+
+    def __init__(self, literals, len_=len, tuple_=tuple, sorted_=sorted):
+        '''
+        :argument literals: sequence of literal strings
+        '''
+        # trie of literals
+        goto, out = [{}], [[]]
+        for index, literal in enumerate(literals):
+            state = 0
+            for char in literal:
+                following = goto[state].get(char)
+                if following is None:
+                    following = goto[state][char] = len_(goto)
+                    goto.append({})
+                    out.append([])
+                state = following
+            out[state].append(index)
+        # fold failure links into transitions so every char is one lookup
+        delta = [None] * len_(goto)
+        delta[0] = dict(goto[0])
+        level = [(state, 0) for state in goto[0].values()]
+        while level:
+            following = []
+            for state, failure in level:
+                transitions = delta[state] = dict(delta[failure])
+                transitions.update(goto[state])
+                # literals ending in a suffix of this state end here too
+                out[state].extend(out[failure])
+                for char, child in goto[state].items():
+                    following.append((child, delta[failure].get(char, 0)))
+            level = following
+        self.delta = delta
+        self.out = [tuple_(sorted_(indexes)) for indexes in out]
+
+    def find(self, text, set_=set):
+        '''Indexes of literals found in `text`.'''
+        delta, out = self.delta, self.out
+        found = set_(out[0])
+        update, state = found.update, 0
+        for char in text:
+            state = delta[state].get(char, 0)
+            if out[state]:
+                update(out[state])
+        return found
+
+
+def literals(patterns, flags, A=Automaton, len_=len, min_=min):
+    '''Index of the first of literal `patterns` in a thing.'''
+    if flags & IGNORECASE:
+        # lowercasing doesn't fold case the way regular expressions do
+        return each([contains(p, flags) for p in patterns])
+    if len_(patterns) < SMALL:
+        def search(thing): #@IgnorePep8
+            for index, pattern in enumerate(patterns):
+                if pattern in thing:
+                    return index
+            return None
+        return search
+    find = A(patterns).find
+    def search(thing): #@IgnorePep8
+        found = find(thing)
+        return min_(found) if found else None
+    return search
+
+
+def segment(glob, len_=len, max_=max):
+    '''Longest run of literal characters in `glob`.'''
+    runs, run, i, n = [], [], 0, len_(glob)
+    while i < n:
+        char = glob[i]
+        i += 1
+        if char in '*?':
+            runs.append(''.join(run))
+            run = []
+        elif char == '[':
+            # character classes match one of many characters
+            end = i + (glob[i:i + 1] == '!')
+            end += glob[end:end + 1] == ']'
+            end = glob.find(']', end)
+            if end == -1:
+                # unclosed brackets are literal
+                run.append(char)
+            else:
+                runs.append(''.join(run))
+                run, i = [], end + 1
+        else:
+            run.append(char)
+    runs.append(''.join(run))
+    return max_(runs, key=len_)
+
+
+def globs(patterns, flags, A=Automaton):
+    '''
+    Index of the first of glob `patterns` matching a thing, with only the
+    globs whose longest literal run is in it tried.
+    '''
+    searches = [glob(p, flags) for p in patterns]
+    if flags & IGNORECASE:
+        # lowercasing doesn't fold case the way regular expressions do so
+        # each glob checks for its own literal run instead
+        return each(searches)
+    # globs sharing a literal run share its literal
+    runs, always = {}, set()
+    for index, pattern in enumerate(patterns):
+        run = segment(pattern)
+        if run:
+            runs.setdefault(run, []).append(index)
+        else:
+            always.add(index)
+    keys = list(runs)
+    owners = [runs[key] for key in keys]
+    find = A(keys).find
+    def search(thing, sorted_=sorted): #@IgnorePep8
+        candidates = set(always)
+        for found in find(thing):
+            candidates.update(owners[found])
+        for index in sorted_(candidates):
+            if searches[index](thing) is not None:
+                return index
+        return None
+    return search
+
+
+def regexes(patterns, flags, s=_SPECIAL, L=literals):
+    '''
+    Index of the first of regex `patterns` matching a thing, with regexes
+    that are only literals searched for all at once.
+    '''
+    if not flags and not any(s.intersection(p) for p in patterns):
+        return L(patterns, flags)
+    return each([regex(p, flags) for p in patterns])
+
+
+def each(searches, enumerate_=enumerate):
+    '''Index of the first of `searches` finding something.'''
+    def search(thing):
+        for index, find in enumerate_(searches):
+            if find(thing) is not None:
+                return index
+        return None
+    return search
+
+
+def contains(literal, flags, r=rcompile, e=escape):
+    '''Check for `literal` in a thing, ignoring case if `flags` say so.'''
+    if flags & IGNORECASE:
+        return r(e(literal), flags & _CASE).search
+    return lambda thing: literal in thing
+
+
+def prefiltered(check, search):
+    '''Only `search` things passing the cheaper `check`.'''
+    return lambda thing: search(thing) if check(thing) else None
+
+
+def glob(
+    pattern, flags, t=translate, r=rcompile, c=contains, p=prefiltered,
+):
+    '''Search for glob `pattern` behind a check for its longest literal run.'''
+    search, literal = r(t(pattern), flags).search, segment(pattern)
+    return p(c(literal, flags), search) if literal else search
+
+
+def required(pattern, flags, max_=max, len_=len, getattr_=getattr):
+    '''
+    Longest literal every match of regex `pattern` holds and the flags it's
+    matched with.
+    '''
+    parser = regexparser()
+    parsed = parser.parse(pattern, flags)
+    state = getattr_(parsed, 'state', None) or parsed.pattern
+    binary = not isinstance(pattern, type(u''))
+    runs, run = [], []
+    # only literals outside groups, branches and repeats are in every match
+    for op, value in parsed:
+        if op == parser.LITERAL:
+            run.append(value)
+        else:
+            runs.append(run)
+            run = []
+    runs.append(run)
+    run = max_(runs, key=len_)
+    if binary:
+        return bytes(bytearray(run)), state.flags
+    return u''.join(map(unichr, run)), state.flags
+
+
+def regex(pattern, flags, r=rcompile, c=contains, p=prefiltered):
+    '''Search for regex `pattern` behind a check for its required literal.'''
+    search = r(pattern, flags).search
+    literal, flags = required(pattern, flags)
+    return p(c(literal, flags), search) if literal else search
+
+
+def formatted(pattern, max_=max, len_=len, f=_FIELDS.split):
+    '''Longest literal outside fields of parse `pattern`.'''
+    runs, run = [], []
+    for part in f(pattern):
+        if part == '{{' or part == '}}':
+            run.append(part[0])
+        elif part[:1] in ('{', '}'):
+            runs.append(''.join(run))
+            run = []
+        else:
+            run.append(part)
+    runs.append(''.join(run))
+    return max_(runs, key=len_)
+
+
+def parsed(pattern, c=contains, p=prefiltered):
+    '''
+    Search for parse `pattern` behind a check for its longest literal, which
+    parse matches ignoring case.
+    '''
+    # parse is only loaded once a parse pattern is compiled
+    from parse import compile
+    search, literal = compile(pattern).search, formatted(pattern)
+    return p(c(literal, IGNORECASE | DOTALL), search) if literal else search
+
+
+def compiled(pattern, type, flags):
+    '''
+    Search for `pattern`, with cheap literal checks ruling out most things
+    before the full search.
+
+    :argument type: 'parse', 'regex' or 'glob'
+    :argument flags: regular expression flags
+    '''
+    if type == 'glob':
+        return glob(pattern, flags)
+    if type == 'regex':
+        return regex(pattern, flags)
+    return parsed(pattern)
+
+
+def matcher(patterns, type, flags):
+    '''
+    Search for every one of `patterns` in a thing, giving the first pattern
+    matched or :const:`None`.
+
+    :argument patterns: sequence of patterns
+    :argument type: 'parse', 'regex', 'glob' or 'literal'
+    :argument flags: regular expression flags
+    '''
+    if not patterns:
+        raise ValueError('at least one pattern is needed')
+    if type == 'literal':
+        search = literals(patterns, flags)
+    elif type == 'glob':
+        search = globs(patterns, flags)
+    elif type == 'regex':
+        search = regexes(patterns, flags)
+    else:
+        search = each([parsed(p) for p in patterns])
+    def match(thing): #@IgnorePep8
+        index = search(thing)
+        return None if index is None else patterns[index]
+    return match
@@ -1,35 +1,46 @@
 # -*- coding: utf-8 -*-
 '''specific knife mixins'''
 
-from math import fsum
-from copy import deepcopy
-from threading import local
-from inspect import isclass, getmro
+from math import fsum, sqrt
+from collections import namedtuple
+from heapq import nlargest, nsmallest
 from functools import reduce, partial
-from random import shuffle, randrange
-from collections import deque, namedtuple
 from operator import methodcaller, itemgetter, attrgetter, truediv
 from itertools import (
-    groupby, islice, tee, starmap, repeat, combinations, permutations, chain)
+    islice, tee, starmap, repeat, combinations, permutations, chain)
 
 from stuf.six import (
-    strings, items, values, keys, filter, map)
-from stuf.utils import OrderedDict, selfname, deferiter, deferfunc
-
+    items, values, keys, filter, map)
+from stuf.utils import OrderedDict, selfname
+
+from knife._cache import memoize
+from knife._nested import ATOMS, flatten
+from knife._order import (
+    head, tail, initial, group, window, batch, unbatch, sort)
+from knife._sets import (
+    difference, symmetric, intersection, union, dedupe, sorted_difference,
+    sorted_symmetric, sorted_intersection, sorted_union)
+from knife._sketch import approxunique, distinct
+from knife._stats import (
+    moments, degrees, minmax, median, quantile, estimate, pack, vminmax,
+    generator, reservoir, weighted, spilledmedian, spilledquantile)
+from knife._parallel import (
+    fanout, mapchunk, argchunk, kwargchunk, invokechunk, filterchunk,
+    falsechunk)
 from knife._compat import (
-    Counter, ChainMap, ichain, ifilterfalse, zip_longest, count, memoize)
+    Counter, ChainMap, ichain, ifilterfalse, zip_longest)
 
 Count = namedtuple('Count', 'least most overall')
 MinMax = namedtuple('MinMax', 'min max')
 TrueFalse = namedtuple('TrueFalse', 'true false')
-GroupBy = namedtuple('Group', 'keys groups')
-slice = lambda x, y: next(islice(x, y, None))
 
 
-class _CmpMixin(local):
+class _CmpMixin(object):
 
     '''comparing mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     @memoize
     def _all(truth, all_=all, imap_=map):
@@ -44,25 +55,37 @@ class _CmpMixin(local):
 
     @staticmethod
     @memoize
-    def _difference(symmetric, reduce_=reduce, set_=set, partial_=partial):
-        if symmetric:
-            test = lambda x, y: set_(x).symmetric_difference(y)
-        else:
-            test = lambda x, y: set_(x).difference(y)
-        return partial_(reduce_, test)
+    def _count_distinct(key, error, partial_=partial, distinct_=distinct):
+        return partial_(distinct_, key, error)
 
     @staticmethod
-    def _intersection(iterable, set_=set, reduce_=reduce):
-        return reduce_(lambda x, y: set_(x).intersection(y), iterable)
+    @memoize
+    def _difference(symmetric_, presorted):
+        if presorted:
+            return sorted_symmetric if symmetric_ else sorted_difference
+        return symmetric if symmetric_ else difference
 
     @staticmethod
-    def _union(iterable, set_=set, reduce_=reduce):
-        return reduce_(lambda x, y: set_(x).union(y), iterable)
+    @memoize
+    def _intersection(presorted):
+        return sorted_intersection if presorted else intersection
 
     @staticmethod
     @memoize
-    def _unique(key, set_=set):
-        def unique(iterable):
+    def _union(presorted):
+        return sorted_union if presorted else union
+
+    @staticmethod
+    @memoize
+    def _unique(
+        key, presorted, approx, capacity, error, set_=set, partial_=partial,
+        dedupe_=dedupe, approxunique_=approxunique,
+    ):
+        if presorted:
+            return partial_(dedupe_, key=key)
+        if approx:
+            return partial_(approxunique_, key, capacity, error)
+        def unique(iterable): #@IgnorePep8
             seen = set_()
             seenadd, key_ = seen.add, key
             for element in iterable:
@@ -73,24 +96,47 @@ class _CmpMixin(local):
         return unique
 
 
-class _MathMixin(local):
+class _MathMixin(object):
 
     '''number mixin'''
 
+    __slots__ = ()
+
+    def _vector(self, call, reduction):
+        # reduce with NumPy if vectorizing and NumPy can do the reduction
+        if self._vectorize and reduction is not None:
+            return self._vectorized(call, reduction)
+        return call
+
     @staticmethod
-    def _average(iterable, s=sum, t=truediv, n=count, e=tee):
-        i1, i2 = e(iterable)
-        yield t(s(i1, 0.0), n(i2))
+    @memoize
+    def _vectorized(call, reduction, pack_=pack, list_=list):
+        def vectorized(iterable):
+            things = list_(iterable)
+            array = pack_(things)
+            # fall back on heterogeneous or non-numeric things
+            if array is None:
+                for thing in call(things):
+                    yield thing
+            else:
+                yield reduction(array)
+        return vectorized
+
+    @staticmethod
+    def _average(iterable, t=truediv):
+        total, n = 0.0, 0
+        for n, thing in enumerate(iterable, 1):
+            total += thing
+        yield t(total, n)
 
     @staticmethod
     def _count(iterable, counter_=Counter, count_=Count):
-        count = counter_(iterable)
-        commonality = count.most_common()
+        commonality = counter_(iterable).most_common()
         yield count_(
             # least common
-            commonality[:-2:-1][0][0],
+            commonality[-1][0],
             # most common (mode)
-            count.most_common(1)[0][0],
+            commonality[0][0],
             # overall commonality
             commonality,
         )
@@ -103,25 +149,49 @@ class _MathMixin(local):
         return imax
 
     @staticmethod
-    def _median(iterable, s=sorted, d=truediv, int=int, count=count):
-        i1, i2 = tee(s(iterable))
-        e = d(count(i1) - 1, 2)
-        p = int(e)
-        if e % 2 == 0:
-            yield slice(i2, p)
+    @memoize
+    def _median(approx, budget, e=estimate, m=median, l=list, s=spilledmedian):
+        if approx:
+            def imedian(iterable):
+                yield e(iterable, 0.5)
+        elif budget is not None:
+            def imedian(iterable):
+                yield s(budget, iterable)
         else:
-            i3, i4 = tee(i2)
-            yield truediv(slice(i3, p) + slice(i4, p + 1), 2)
+            def imedian(iterable):
+                yield m(l(iterable))
+        return imedian
+
+    @staticmethod
+    def _minmax(iterable, minmax_=minmax, mm_=MinMax):
+        yield mm_(*minmax_(iterable))
 
     @staticmethod
-    def _minmax(iterable, imin=min, imax=max, tee_=tee, minmax_=MinMax):
-        i1, i2 = tee_(iterable)
-        yield minmax_(imin(i1), imax(i2))
+    @memoize
+    def _quantile(
+        q, approx, budget, e=estimate, qt=quantile, l=list, s=spilledquantile,
+    ):
+        if not 0 <= q <= 1:
+            raise ValueError('quantile must be between 0 and 1')
+        if approx:
+            def iquantile(iterable):
+                yield e(iterable, q)
+        elif budget is not None:
+            def iquantile(iterable):
+                yield s(budget, q, iterable)
+        else:
+            def iquantile(iterable):
+                yield qt(l(iterable), q)
+        return iquantile
 
     @staticmethod
-    def _range(iterable, d=deque, sorted_=sorted):
-        i1, i2 = tee(sorted_(iterable))
-        yield d(i1, maxlen=1).pop() - next(i2)
+    def _vminmax(array, mm_=MinMax, vminmax_=vminmax):
+        return mm_(*vminmax_(array))
+
+    @staticmethod
+    def _range(iterable, minmax_=minmax):
+        low, high = minmax_(iterable)
+        yield high - low
 
     @staticmethod
     @memoize
@@ -138,18 +208,28 @@ class _MathMixin(local):
             yield summer_(iterable)
         return isum
 
+    @staticmethod
+    @memoize
+    def _variance(
+        population, root, m=moments, d=degrees, t=truediv, sqrt_=sqrt,
+    ):
+        def variance(iterable):
+            n, _, m2 = m(iterable)
+            value = t(m2, d(n, population))
+            yield sqrt_(value) if root else value
+        return variance
 
-class _OrderMixin(local):
+
+class _OrderMixin(object):
 
     '''order mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     @memoize
-    def _group(key, group_=groupby, sorted_=sorted, G=GroupBy, tuple_=tuple):
-        def grouper(iterable):
-            for k, g in group_(sorted_(iterable, key=key), key):
-                yield G(k, tuple_(g))
-        return grouper
+    def _group(key, reduce, initial, budget, partial_=partial, group_=group):
+        return partial_(group_, key, reduce, initial, budget)
 
     @staticmethod
     def _reverse(iterable, reversed_=reversed, tuple_=tuple):
@@ -157,30 +237,46 @@ class _OrderMixin(local):
             yield thing
 
     @staticmethod
-    def _shuffle(iterable, list_=list, shuffle_=shuffle):
-        iterable = list_(iterable)
-        shuffle_(iterable)
-        yield iterable
+    def _shuffle(seed, list_=list, g=generator):
+        rng = g(seed)
+        def shuffle(iterable): #@IgnorePep8
+            iterable = list_(iterable)
+            rng.shuffle(iterable)
+            yield iterable
+        return shuffle
 
     @staticmethod
     @memoize
-    def _sort(key, sorted_=sorted):
-        def isort(iterable):
-            yield sorted_(iterable, key=key)
-        return isort
+    def _sort(key, budget, partial_=partial, sorted_=sorted, sort_=sort):
+        if budget is not None:
+            return partial_(sort_, key, budget)
+        return partial_(sorted_, key=key)
+
+    @staticmethod
+    @memoize
+    def _bottom(n, key, partial_=partial, nsmallest_=nsmallest):
+        return partial_(nsmallest_, n, key=key)
+
+    @staticmethod
+    @memoize
+    def _top(n, key, partial_=partial, nlargest_=nlargest):
+        return partial_(nlargest_, n, key=key)
 
 
-class _RepeatMixin(local):
+class _RepeatMixin(object):
 
     '''repetition mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     def _combinations(n, combinations_=combinations):
         return lambda x: combinations_(x, n)
 
     @staticmethod
-    def _copy(iterable, deepcopy_=deepcopy, imap_=map):
-        return imap_(deepcopy_, iterable)
+    def _copy(iterable, imap_=map):
+        from copy import deepcopy
+        return imap_(deepcopy, iterable)
 
     @staticmethod
     def _permutations(n, permutations_=permutations):
@@ -194,13 +290,19 @@ class _RepeatMixin(local):
         return lambda x: r(t(x), n)
 
 
-class _MapMixin(local):
+class _MapMixin(object):
 
     '''mapping mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     @memoize
-    def _argmap(call, curr, arg, starmap_=starmap, partial_=partial):
+    def _argmap(call, curr, arg, engine, starmap_=starmap, partial_=partial):
+        if engine is not None:
+            return partial_(
+                fanout, engine, argchunk, (call, arg if curr else ()),
+            )
         if curr:
             def argmap(*args):
                 return call(*(args + arg))
@@ -210,16 +312,25 @@ class _MapMixin(local):
 
     @staticmethod
     @memoize
-    def _invoke(name, args, mc_=methodcaller, imap_=map, partial_=partial):
+    def _invoke(name, args, engine, mc_=methodcaller, imap_=map, p_=partial):
+        if engine is not None:
+            return p_(fanout, engine, invokechunk, (name,) + args)
         caller = mc_(name, *args[0], **args[1])
         def invoke(thing): #@IgnorePep8
             read = caller(thing)
             return thing if read is None else read
-        return partial_(imap_, invoke)
+        return p_(imap_, invoke)
 
     @staticmethod
     @memoize
-    def _kwargmap(call, curr, arg, kw, starmap_=starmap, partial_=partial):
+    def _kwargmap(call, curr, arg, kw, engine, s_=starmap, p_=partial):
+        if engine is not None:
+            return p_(
+                fanout,
+                engine,
+                kwargchunk,
+                (call, arg, kw) if curr else (call, (), None),
+            )
         if curr:
             def kwargmap(*params):
                 args, kwargs = params
@@ -227,12 +338,20 @@ class _MapMixin(local):
                 return call(*(args + arg), **kwargs)
         else:
             kwargmap = lambda x, y: call(*x, **y)
-        return partial_(starmap_, kwargmap)
+        return p_(s_, kwargmap)
 
     @staticmethod
     @memoize
-    def _map(call, imap_=map, partial_=partial):
-        return partial_(imap_, call)
+    def _map(call, engine, chunked, imap_=map, partial_=partial, b=batch):
+        if engine is not None:
+            mapper = partial_(fanout, engine, mapchunk, (call,))
+        else:
+            mapper = partial_(imap_, call)
+        if chunked is None:
+            return mapper
+        size, most = chunked
+        # worker gets whole batches and gives back an iterable for each
+        return lambda x: unbatch(mapper(b(size, most, x)))
 
     @staticmethod
     @memoize
@@ -244,10 +363,12 @@ class _MapMixin(local):
         return lambda x: starmap(call, c(m(i, x)))
 
 
-class _FilterMixin(local):
+class _FilterMixin(object):
 
     '''filtering mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     @memoize
     def _attributes(names, _attrgetter=attrgetter):
@@ -271,8 +392,11 @@ class _FilterMixin(local):
 
     @staticmethod
     @memoize
-    def _filter(true, false, f_=filter, ff_=ifilterfalse, partial_=partial):
-        return partial_(ff_, true) if false else partial_(f_, true)
+    def _filter(true, false, engine, f_=filter, ff_=ifilterfalse, p_=partial):
+        if engine is not None:
+            chunk = falsechunk if false else filterchunk
+            return p_(fanout, engine, chunk, (true,))
+        return p_(ff_, true) if false else p_(f_, true)
 
     @staticmethod
     @memoize
@@ -290,6 +414,7 @@ class _FilterMixin(local):
     @staticmethod
     @memoize
     def _traverse(test, invert, odict_=OrderedDict, chain_=chain, vars_=vars):
+        from inspect import isclass, getmro
         ifilter = ifilterfalse if invert else filter
         def members(iterable, beenthere=None): #@IgnorePep8
             isclass_ = isclass
@@ -345,25 +470,16 @@ class _FilterMixin(local):
         return traverse
 
 
-class _ReduceMixin(local):
+class _ReduceMixin(object):
 
     '''reduce mixin'''
 
-    @classmethod
-    def _flatten(cls, iterable, strings_=strings, isinstance_=isinstance):
-        smash_ = cls._flatten
-        for item in iterable:
-            try:
-                # don't recur over strings
-                if isinstance_(item, strings_):
-                    yield item
-                else:
-                    # do recur over other things
-                    for j in smash_(item):
-                        yield j
-            except TypeError:
-                # does not recur
-                yield item
+    __slots__ = ()
+
+    @staticmethod
+    @memoize
+    def _flatten(depth, atoms, partial_=partial, flatten_=flatten, A=ATOMS):
+        return partial_(flatten_, depth, A if atoms is None else atoms)
 
     @staticmethod
     def _merge(iterable, ichain_=ichain):
@@ -385,22 +501,36 @@ class _ReduceMixin(local):
         return zip_(*iterable)
 
 
-class _SliceMixin(local):
+class _SliceMixin(object):
 
     '''slicing mixin'''
 
+    __slots__ = ()
+
     @staticmethod
     @memoize
     def _at(n, default, islice_=islice, next_=next):
         return lambda x: next_(islice_(x, n, None), default)
 
+    @staticmethod
+    def _choice(
+        size, weight, seed, s=islice, g=generator, r=reservoir, w=weighted,
+    ):
+        rng = g(seed)
+        if weight is not None:
+            return lambda x: w(x, 1, weight, rng)
+        if size:
+            # pick an index if the number of things is known
+            def choice(iterable): #@IgnorePep8
+                i = rng.randrange(size)
+                return s(iterable, i, i + 1)
+            return choice
+        return lambda x: r(x, 1, rng)
+
     @staticmethod
     @memoize
-    def _choice(t=tee, n=next, s=islice, rr=randrange, c=count):
-        def choice(iterable):
-            i1, i2 = t(iterable)
-            yield n(s(i1, rr(0, c(i2)), None))
-        return choice
+    def _batch(size, most, partial_=partial, batch_=batch):
+        return partial_(batch_, size, most)
 
     @staticmethod
     @memoize
@@ -409,36 +539,30 @@ class _SliceMixin(local):
 
     @staticmethod
     @memoize
-    def _first(n=0, islice_=islice, next_=deferiter):
-        return lambda x: islice_(x, n) if n else next_(x)
+    def _first(n=0, partial_=partial, head_=head):
+        return partial_(head_, n)
 
     @staticmethod
-    def _initial(iterable, islice_=islice, tee_=tee, count_=count):
-        i1, i2 = tee_(iterable)
-        return islice_(i1, count_(i2) - 1)
+    def _initial(size, islice_=islice, initial_=initial):
+        if size is not None:
+            # skip looking behind if the number of things is known
+            return lambda x: islice_(x, max(size - 1, 0))
+        return initial_
 
     @staticmethod
-    @memoize
-    def _last(n, s=islice, d=deque, t=tee, f=deferfunc, c=count):
-        if n:
-            def last(iterable):
-                i1, i2 = t(iterable)
-                return s(i1, c(i2) - n, None)
-            return last
-        return lambda x: f(d(x, maxlen=1).pop)
+    def _last(n, size, partial_=partial, tail_=tail):
+        return partial_(tail_, n, size)
 
     @staticmethod
     def _rest(iterable, islice_=islice):
         return islice_(iterable, 1, None)
 
     @staticmethod
-    @memoize
-    def _sample(n, t=tee, s=slice, rr=randrange, m=map, c=count):
-        def sample(iterable):
-            i1, i2 = t(iterable)
-            length = c(i1)
-            return m(lambda x: s(x, rr(0, length)), t(i2, n))
-        return sample
+    def _sample(n, weight, seed, g=generator, r=reservoir, w=weighted):
+        rng = g(seed)
+        if weight is not None:
+            return lambda x: w(x, n, weight, rng)
+        return lambda x: r(x, n, rng)
 
     @staticmethod
     def _slice(start, stop, step, islice_=islice):
@@ -447,3 +571,8 @@ class _SliceMixin(local):
         elif stop:
             return lambda x: islice_(x, start, stop)
         return lambda x: islice_(x, start)
+
+    @staticmethod
+    @memoize
+    def _window(n, step, partial_=partial, window_=window):
+        return partial_(window_, n, step)
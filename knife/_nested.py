@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+'''knife nested things'''
+
+from stuf.six import strings
+
+# things not flattened by default
+ATOMS = (bytes, bytearray, dict)
+# things never iterable
+SCALARS = frozenset((int, type(1 << 64), float, complex, bool, type(None)))
+
+
+def flatten(
+    depth, atoms, iterable, iter_=iter, type_=type, len_=len,
+    isinstance_=isinstance, strings=strings, scalars=SCALARS,
+):
+    '''
+    Things nested in `iterable` down to `depth` levels, walked with a stack
+    of iterators instead of recursion.
+
+    :argument depth: most nesting levels to flatten or :const:`None` for all
+    :argument tuple atoms: types to yield whole instead of iterating
+    '''
+    if depth is None:
+        depth = float('inf')
+    # strings iterate into more strings forever
+    atoms = strings + tuple(atoms)
+    # lists and tuples are most nested things so skip checking them further
+    fast = frozenset(k for k in (list, tuple) if not issubclass(k, atoms))
+    stack = [iter_(iterable)]
+    push, pop = stack.append, stack.pop
+    while stack:
+        deep = len_(stack) > depth
+        for thing in stack[-1]:
+            if deep:
+                yield thing
+                continue
+            kind = type_(thing)
+            if kind in fast:
+                push(iter_(thing))
+                break
+            if kind in scalars or isinstance_(thing, atoms):
+                yield thing
+                continue
+            try:
+                push(iter_(thing))
+            except TypeError:
+                # not iterable
+                yield thing
+                continue
+            break
+        else:
+            pop()
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+'''knife ordering and slicing steps'''
+
+from sys import getsizeof
+from copy import deepcopy
+from heapq import nlargest, merge
+from itertools import islice
+from collections import deque, namedtuple
+
+from stuf.six import items, map
+from stuf.utils import OrderedDict, deferiter, deferfunc
+
+from knife._compat import pickler
+
+GroupBy = namedtuple('Group', 'keys groups')
+# most sorted runs merged at once
+FANIN = 16
+
+
+def head(n, iterable, islice_=islice, next_=deferiter):
+    '''First `n` things in `iterable` or just the first thing.'''
+    return islice_(iterable, n) if n else next_(iterable)
+
+
+def initial(iterable, i=iter):
+    '''Every thing in `iterable` but the last, holding back one thing.'''
+    iterable = i(iterable)
+    for previous in iterable:
+        break
+    else:
+        return
+    for thing in iterable:
+        yield previous
+        previous = thing
+
+
+def tail(n, size, iterable, s=islice, d=deque, f=deferfunc, i=iter, m=max):
+    '''
+    Last `n` things in `iterable` or just the last thing.
+
+    :argument size: number of things in `iterable` if known
+    '''
+    if not n:
+        return f(d(iterable, maxlen=1).pop)
+    if size is not None:
+        # skip buffering things if their number is known
+        return s(iterable, m(size - n, 0), None)
+    return i(d(iterable, maxlen=n))
+
+
+def window(
+    n, step, iterable, s=islice, d=deque, t=tuple, i=iter, len_=len,
+    max_=max, min_=min,
+):
+    '''
+    Sliding windows of `n` things in `iterable` starting `step` things apart.
+    '''
+    iterable = i(iterable)
+    things = d(s(iterable, n), maxlen=n)
+    # things between windows are skipped, things shared by windows are kept
+    skip, take = max_(step - n, 0), min_(step, n)
+    while len_(things) == n:
+        yield t(things)
+        if skip:
+            d(s(iterable, skip), maxlen=0)
+        more = t(s(iterable, take))
+        if len_(more) < take:
+            return
+        things.extend(more)
+
+
+def batch(
+    size, most, iterable, s=islice, sizeof=getsizeof, list_=list, i=iter,
+    len_=len,
+):
+    '''
+    Lists of up to `size` things in `iterable` holding up to `most` bytes.
+
+    :argument most: most bytes per batch measured with
+      :func:`~sys.getsizeof` or :const:`None` for no limit
+    '''
+    iterable = i(iterable)
+    if most is None:
+        while 1:
+            things = list_(s(iterable, size))
+            if not things:
+                return
+            yield things
+    things, total = [], 0
+    for thing in iterable:
+        nbytes = sizeof(thing)
+        # things too big for any batch still get a batch of their own
+        if things and (len_(things) == size or total + nbytes > most):
+            yield things
+            things, total = [], 0
+        things.append(thing)
+        total += nbytes
+    if things:
+        yield things
+
+
+def unbatch(results):
+    '''Outgoing things of every batch's result that isn't :const:`None`.'''
+    for result in results:
+        if result is not None:
+            for thing in result:
+                yield thing
+
+
+def last(n, key, iterable, nlargest_=nlargest, enumerate_=enumerate):
+    '''
+    Last `n` things of `iterable` sorted by `key` found with a heap instead of
+    sorting everything.
+    '''
+    if key is None:
+        key = lambda x: x
+    # later things among equals come last when sorted so they win ties
+    things = nlargest_(
+        n, enumerate_(iterable), key=lambda x: (key(x[1]), x[0]),
+    )
+    things.reverse()
+    return [thing for _, thing in things]
+
+
+def spillfile():
+    '''Temporary file deleted once closed.'''
+    # tempfile is only loaded once things are spilled
+    from tempfile import TemporaryFile
+    return TemporaryFile()
+
+
+def unspill(spilled, load):
+    '''Read back and close things pickled one after another to `spilled`.'''
+    spilled.seek(0)
+    try:
+        while 1:
+            yield load(spilled)
+    except EOFError:
+        pass
+    finally:
+        spilled.close()
+
+
+def spillrun(things, block, spilled, dump, protocol, s=islice, list_=list):
+    '''
+    Pickle `things` to the end of file `spilled` in blocks of `block` things.
+
+    :return: (*start*, *end*) offsets of the run in `spilled`
+    '''
+    start = spilled.tell()
+    things = iter(things)
+    chunk = list_(s(things, block))
+    while chunk:
+        dump(chunk, spilled, protocol)
+        chunk = list_(s(things, block))
+    return start, spilled.tell()
+
+
+def readrun(spilled, start, end, load):
+    '''Read back the run between offsets `start` and `end` of `spilled`.'''
+    # runs share a file so each one keeps its own place in it
+    while start < end:
+        spilled.seek(start)
+        chunk = load(spilled)
+        start = spilled.tell()
+        for thing in chunk:
+            yield thing
+
+
+def merged(spilled, runs, load, merge_=merge):
+    '''Merge `runs` of file `spilled`, closing it once they're read.'''
+    try:
+        for thing in merge_(*[
+            readrun(spilled, start, end, load) for start, end in runs
+        ]):
+            yield thing
+    finally:
+        spilled.close()
+
+
+def spillsort(
+    key, budget, iterable, fanin=FANIN, s=islice, i=iter, list_=list,
+    len_=len, range_=range, pickler_=pickler, merge_=merge, max_=max,
+    min_=min,
+):
+    '''
+    Number of things in `iterable` and an iterator over them sorted by `key`
+    holding at most `budget` things in memory.
+
+    Sorted runs of `budget` things are pickled to a temporary file and merged
+    with :func:`heapq.merge` `fanin` runs at a time, through further
+    temporary files if there are more runs than that. Runs are read back in
+    blocks of ``budget // fanin`` things so merging holds about `budget`
+    things in memory, and at most two temporary files are open at once.
+    '''
+    iterable = i(iterable)
+    run = list_(s(iterable, budget))
+    if len_(run) < budget:
+        # everything fits so skip spilling
+        run.sort(key=key)
+        return len_(run), i(run)
+    fanin = max_(2, min_(fanin, budget))
+    block = max_(1, budget // fanin)
+    pickle = pickler_()
+    dump, protocol, load = pickle.dump, pickle.HIGHEST_PROTOCOL, pickle.load
+    spilled = spillfile()
+    runs = []
+    n = 0
+    while run:
+        # sequence numbers keep equal keys stable and never compare things
+        if key is None:
+            run = [(thing, n + j, thing) for j, thing in enumerate(run)]
+        else:
+            run = [(key(thing), n + j, thing) for j, thing in enumerate(run)]
+        run.sort()
+        n += len_(run)
+        runs.append(spillrun(run, block, spilled, dump, protocol))
+        del run
+        run = list_(s(iterable, budget))
+    while len_(runs) > fanin:
+        # merge runs into fewer, longer runs until one merge takes them all
+        merging, spilled = spilled, spillfile()
+        try:
+            runs = [spillrun(
+                merge_(*[
+                    readrun(merging, start, end, load)
+                    for start, end in runs[j:j + fanin]
+                ]),
+                block, spilled, dump, protocol,
+            ) for j in range_(0, len_(runs), fanin)]
+        finally:
+            merging.close()
+    return n, (thing for _, _, thing in merged(spilled, runs, load, merge_))
+
+
+def sort(key, budget, iterable):
+    '''Things in `iterable` sorted by `key` holding `budget` in memory.'''
+    return spillsort(key, budget, iterable)[1]
+
+
+class Spill(object):
+
+    '''
+    Temporary files holding (*position*, *key*, *thing*) triples partitioned
+    by key.
+    '''
+
+    __slots__ = ('depth', 'files', 'dump', 'protocol')
+
+    def __init__(self, depth, fanout, pickler_=pickler):
+        # depth salts the hash so keys split differently every pass
+        self.depth = depth
+        self.files = [None] * fanout
+        pickle = pickler_()
+        self.dump, self.protocol = pickle.dump, pickle.HIGHEST_PROTOCOL
+
+    def add(self, n, key, thing, hash_=hash, len_=len):
+        files = self.files
+        slot = hash_((self.depth, key)) % len_(files)
+        partition = files[slot]
+        if partition is None:
+            partition = files[slot] = spillfile()
+        self.dump((n, key, thing), partition, self.protocol)
+
+    def partitions(self, pickler_=pickler):
+        '''Read back spilled triples one partition at a time.'''
+        load = pickler_().load
+        for partition in self.files:
+            if partition is None:
+                continue
+            yield unspill(partition, load)
+
+
+def firstgroup(
+    reduce, initial, budget, triples, fanout, depth=0, M=OrderedDict,
+    S=Spill, tuple_=tuple, copy_=deepcopy, pickler_=pickler, max_=max,
+):
+    '''
+    (*position*, *key*, *group*) for (*position*, *key*, *thing*) `triples`
+    in the order keys first turn up, *position* being where they did.
+
+    Groups spilled past `budget` are regrouped one partition at a time into
+    runs of a temporary file that are merged back into first-seen order.
+    '''
+    groups = M()
+    spill = None
+    for n, key, thing in triples:
+        if key in groups:
+            held = groups[key]
+            if reduce is None:
+                held[1].append(thing)
+            else:
+                held[1] = reduce(held[1], thing)
+        elif budget is not None and len(groups) >= budget:
+            if spill is None:
+                spill = S(depth, fanout)
+            spill.add(n, key, thing)
+        elif reduce is None:
+            groups[key] = [n, [thing]]
+        elif initial is None:
+            groups[key] = [n, thing]
+        else:
+            # every group folds into its own copy of a mutable initial
+            groups[key] = [n, reduce(copy_(initial), thing)]
+    # no new groups are held once spilling starts so held groups come first
+    for key, (n, value) in items(groups):
+        yield n, key, tuple_(value) if reduce is None else value
+    if spill is not None:
+        # free held groups before regrouping what was spilled
+        del groups
+        pickle = pickler_()
+        dump, protocol = pickle.dump, pickle.HIGHEST_PROTOCOL
+        spilled = spillfile()
+        try:
+            runs = [spillrun(
+                firstgroup(
+                    reduce, initial, budget, partition, fanout, depth + 1,
+                ),
+                max_(1, budget // fanout), spilled, dump, protocol,
+            ) for partition in spill.partitions()]
+        except BaseException:
+            spilled.close()
+            raise
+        for grouped in merged(spilled, runs, pickle.load):
+            yield grouped
+
+
+def hashgroup(
+    reduce, initial, budget, pairs, fanout=16, G=GroupBy,
+    enumerate_=enumerate,
+):
+    '''
+    Group (*key*, *thing*) `pairs` in a hash table instead of sorting them.
+
+    Groups come out in the order their keys first turn up. Once `budget`
+    groups are held, things with new keys are spilled to temporary files that
+    are grouped again one at a time after the groups held are given.
+
+    :argument reduce: binary function folding every group into one thing
+    :argument initial: starting value for `reduce`, copied for every group
+    :argument budget: most groups held in memory at once
+    '''
+    for _, key, value in firstgroup(reduce, initial, budget, (
+        (n, key, thing) for n, (key, thing) in enumerate_(pairs)
+    ), fanout):
+        yield G(key, value)
+
+
+def group(key, reduce, initial, budget, iterable, map_=map):
+    '''
+    Group `iterable` by `key` without sorting.
+
+    :argument key: key function
+    '''
+    if key is None:
+        return hashgroup(reduce, initial, budget, map_(
+            lambda x: (x, x), iterable,
+        ))
+    return hashgroup(reduce, initial, budget, map_(
+        lambda x: (key(x), x), iterable,
+    ))
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+'''knife parallel engine'''
+
+from itertools import islice
+from collections import deque, namedtuple
+
+Parallel = namedtuple('Parallel', 'workers kind chunksize unordered')
+# kinds of worker pools
+KINDS = ('process', 'thread')
+
+
+def executor(kind, workers):
+    '''
+    `concurrent.futures` pool of `kind` with `workers` workers.
+
+    :argument string kind: ``'process'`` or ``'thread'``
+    :argument integer workers: number of workers
+    '''
+    try:
+        from concurrent import futures
+    except ImportError:
+        raise ImportError(
+            'parallel knives need concurrent.futures (pip install futures)'
+        )
+    if kind == 'process':
+        return futures.ProcessPoolExecutor(workers)
+    return futures.ThreadPoolExecutor(workers)
+
+
+# chunk workers live at module level so process pools can pickle them
+
+def mapchunk(call, chunk):
+    return [call(thing) for thing in chunk]
+
+
+def argchunk(call, arg, chunk):
+    return [call(*(thing + arg)) for thing in chunk]
+
+
+def kwargchunk(call, arg, kw, chunk):
+    results = []
+    append = results.append
+    for args, kwargs in chunk:
+        if kw:
+            kwargs.update(kw)
+        append(call(*(args + arg), **kwargs))
+    return results
+
+
+def invokechunk(name, args, kw, chunk, getattr_=getattr):
+    results = []
+    append = results.append
+    for thing in chunk:
+        read = getattr_(thing, name)(*args, **kw)
+        append(thing if read is None else read)
+    return results
+
+
+def filterchunk(true, chunk):
+    return [thing for thing in chunk if true(thing)]
+
+
+def falsechunk(true, chunk):
+    return [thing for thing in chunk if not true(thing)]
+
+
+def fanout(engine, work, params, iterable, islice_=islice, list_=list):
+    '''
+    Fan `work` over chunks of `iterable` across a pool of workers.
+
+    :argument engine: :class:`Parallel` settings
+    :argument work: chunk worker called with `params` and a chunk
+    :argument tuple params: leading arguments for `work`
+    :argument iterable: incoming things
+    '''
+    workers, kind, chunksize, unordered = engine
+    if workers is None:
+        from multiprocessing import cpu_count
+        workers = cpu_count()
+    pool = executor(kind, workers)
+    submit = pool.submit
+    iterable = iter(iterable)
+    chunks = iter(lambda: list_(islice_(iterable, chunksize)), [])
+    # bound chunks in flight so huge inputs aren't read all at once
+    window = 2 * workers
+    if unordered:
+        from concurrent.futures import wait, as_completed, FIRST_COMPLETED
+        pending = set()
+    else:
+        pending = deque()
+    try:
+        if unordered:
+            for chunk in chunks:
+                pending.add(submit(work, *(params + (chunk,))))
+                if len(pending) >= window:
+                    done, pending = wait(
+                        pending, return_when=FIRST_COMPLETED,
+                    )
+                    for future in done:
+                        for thing in future.result():
+                            yield thing
+            for future in as_completed(pending):
+                for thing in future.result():
+                    yield thing
+            pending = ()
+        else:
+            popleft = pending.popleft
+            for chunk in chunks:
+                pending.append(submit(work, *(params + (chunk,))))
+                if len(pending) >= window:
+                    for thing in popleft().result():
+                        yield thing
+            while pending:
+                for thing in popleft().result():
+                    yield thing
+    finally:
+        # don't run chunks nobody will collect
+        for future in pending:
+            future.cancel()
+        pool.shutdown()
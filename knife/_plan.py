@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+'''knife pipeline plans'''
+
+from heapq import nsmallest
+from functools import partial
+from itertools import starmap
+
+from stuf.six import map, filter
+
+from knife._cache import memoize
+from knife._compat import ifilterfalse
+from knife._order import head, tail, last
+
+# ways steps feed outgoing things on
+ITER, ONE, MANY = 'iter', 'one', 'many'
+# steps that can be fused keyed by what they wrap
+FUSABLE = {
+    map: 'map', starmap: 'starmap', filter: 'filter',
+    ifilterfalse: 'filterfalse',
+}
+FUSED = dict((v, k) for k, v in FUSABLE.items())
+# loop body lines for fused steps
+LINES = {
+    'map': 'thing = c{0}(thing)',
+    'starmap': 'thing = c{0}(*thing)',
+    'filter': 'if not c{0}(thing): continue',
+    'filterfalse': 'if c{0}(thing): continue',
+}
+
+
+@memoize
+def fuser(kinds):
+    '''
+    Compile generator function running fused steps of `kinds` in one loop.
+
+    :argument tuple kinds: kinds of fused steps in order
+    '''
+    calls = ', '.join('c{0}'.format(i) for i in range(len(kinds)))
+    lines = ['def fused(iterable, {0}):'.format(calls)]
+    lines.append('    for thing in iterable:')
+    lines.extend('        ' + LINES[k].format(i) for i, k in enumerate(kinds))
+    lines.append('        yield thing')
+    namespace = {}
+    exec(compile('\n'.join(lines), '<knife plan>', 'exec'), namespace)
+    return namespace['fused']
+
+
+def fusable(mode, call, isinstance_=isinstance, partial_=partial):
+    '''
+    (*kind*, *worker*) of step `call` if it can be fused with its neighbors
+    or :const:`None`.
+    '''
+    if (
+        mode is MANY and isinstance_(call, partial_) and not call.keywords
+        and len(call.args) == 1
+    ):
+        kind = FUSABLE.get(call.func)
+        if kind is not None:
+            return kind, call.args[0]
+
+
+def fuse(run, tuple_=tuple, partial_=partial):
+    # single steps already run at C speed
+    if len(run) == 1:
+        kind, call = run[0]
+        return partial_(FUSED[kind], call)
+    fused = fuser(tuple_(kind for kind, _ in run))
+    calls = tuple_(call for _, call in run)
+    return lambda iterable: fused(iterable, *calls)
+
+
+def sorting(mode, call, isinstance_=isinstance, partial_=partial):
+    '''
+    `key function` of step `call` if it sorts everything or :const:`False`.
+    '''
+    if (
+        mode is MANY and isinstance_(call, partial_) and call.func is sorted
+        and not call.args
+    ):
+        return call.keywords.get('key')
+    return False
+
+
+def rewrite(plan, isinstance_=isinstance, partial_=partial):
+    '''
+    Replace full sorts in `plan` that only feed a slice of their first or
+    last things with heap selections keeping just that slice in memory.
+
+    :argument plan: :class:`list` of (*mode*, *step*) pairs
+    '''
+    steps = []
+    for mode, call in plan:
+        if steps and isinstance_(call, partial_):
+            key = sorting(*steps[-1])
+            if key is not False:
+                if call.func is head:
+                    n = call.args[0] or 1
+                    steps[-1] = (MANY, partial_(nsmallest, n, key=key))
+                    continue
+                if call.func is tail:
+                    n = call.args[0] or 1
+                    steps[-1] = (MANY, partial_(last, n, key))
+                    continue
+        steps.append((mode, call))
+    return steps
+
+
+def compose(plan, iterable, iter_=iter):
+    '''
+    Run steps recorded in `plan` over `iterable`, fusing runs of adjacent
+    mapping and filtering steps into one loop and selecting sorted slices
+    with a heap.
+
+    :argument plan: :class:`list` of (*mode*, *step*) pairs
+    :argument iterable: incoming things
+    '''
+    run = []
+    for mode, call in rewrite(plan):
+        stage = fusable(mode, call)
+        if stage is not None:
+            run.append(stage)
+            continue
+        if run:
+            iterable = fuse(run)(iterable)
+            run = []
+        if mode is MANY or mode is ITER:
+            # steps like sorting and heap selection give lists
+            iterable = iter_(call(iterable))
+        else:
+            iterable = iter_([call(iterable)])
+    if run:
+        iterable = fuse(run)(iterable)
+    return iterable
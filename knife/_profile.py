@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+'''knife profiling'''
+
+from sys import getsizeof
+from timeit import default_timer
+
+from stuf.six import binaries
+from stuf.utils import OrderedDict
+
+from knife._cache import caches
+
+# fields in step reports
+FIELDS = (
+    'method', 'worker', 'seconds', 'incoming', 'outgoing', 'snapshot', 'hits',
+    'misses',
+)
+
+
+def counts(values=caches.values):
+    # hits and misses across every knife cache
+    hits = misses = 0
+    for cache in values():
+        hits += cache.hits
+        misses += cache.misses
+    return hits, misses
+
+
+def size(snapshot, isinstance_=isinstance, b=binaries, getsizeof_=getsizeof):
+    '''Bytes taken by `snapshot` or :const:`None` if unknown.'''
+    if isinstance_(snapshot, b):
+        return len(snapshot)
+    if isinstance_(snapshot, tuple):
+        return sum(getsizeof_(chunk) for chunk in snapshot)
+    return None
+
+
+def name(worker):
+    '''Name of `worker`.'''
+    if worker is None:
+        return None
+    return getattr(worker, '__name__', None) or repr(worker)
+
+
+class Meter(object):
+
+    '''Iterator counting things produced by an iterator and time spent.'''
+
+    __slots__ = ('_iterator', '_done', 'count', 'seconds', 'exhausted')
+
+    def __init__(self, iterable, done=None):
+        self._iterator = iter(iterable)
+        # called once iterator is exhausted
+        self._done = done
+        self.count = 0
+        self.seconds = 0.0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self, timer=default_timer):
+        start = timer()
+        try:
+            thing = next(self._iterator)
+        except StopIteration:
+            # polling an exhausted iterator again isn't time spent
+            if not self.exhausted:
+                self.seconds += timer() - start
+                self.exhausted = True
+                if self._done is not None:
+                    self._done()
+            raise
+        self.seconds += timer() - start
+        self.count += 1
+        return thing
+
+    next = __next__
+
+
+class Step(object):
+
+    '''Profile of one chained step.'''
+
+    __slots__ = FIELDS + ('_start', '_in', '_out')
+
+    def __init__(self, method, worker):
+        self.method = method
+        self.worker = worker
+        self.seconds = 0.0
+        self.incoming = self.outgoing = self.snapshot = None
+        self.hits = self.misses = 0
+        self._start = default_timer()
+        # lazy knives meter things as they flow through the step
+        self._in = self._out = None
+
+    def report(self):
+        '''Step profile as :class:`dict`.'''
+        report = OrderedDict((f, getattr(self, f)) for f in FIELDS)
+        if self._out is not None:
+            # time spent in this step excluding time spent in earlier steps
+            report['seconds'] += self._out.seconds - self._in.seconds
+            report['incoming'] = self._in.count
+            report['outgoing'] = self._out.count
+        return report
+
+
+class Profiler(object):
+
+    '''Profiles steps chained on a knife.'''
+
+    def __init__(self, callback=None):
+        '''
+        :keyword callback: called with report of each step once it's done
+        '''
+        self.callback = callback
+        self.steps = []
+
+    def start(self, knife, method):
+        '''
+        Start profiling a step.
+
+        :argument knife: knife the step is chained on
+        :argument string method: name of the step's method
+        '''
+        step = Step(method, name(knife._worker))
+        step.hits, step.misses = counts()
+        self.steps.append(step)
+        return step
+
+    def stop(self, step, incoming=None, outgoing=None, timer=default_timer):
+        '''
+        Stop profiling `step` with `incoming` and `outgoing` things counted if
+        known.
+        '''
+        step.seconds = timer() - step._start
+        hits, misses = counts()
+        step.hits = hits - step.hits
+        step.misses = misses - step.misses
+        step.incoming, step.outgoing = incoming, outgoing
+        if outgoing is not None:
+            self.done(step)
+
+    def meter(self, step, incoming):
+        '''Meter `incoming` things feeding lazy `step`.'''
+        step._in = Meter(incoming)
+        return step._in
+
+    def metered(self, step, outgoing):
+        '''Meter `outgoing` things of lazy `step`.'''
+        step._out = Meter(outgoing, lambda: self.done(step))
+        return step._out
+
+    def done(self, step):
+        if self.callback is not None:
+            self.callback(step.report())
+
+    def report(self):
+        ''':class:`list` of step profiles.'''
+        return [step.report() for step in self.steps]
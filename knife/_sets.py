@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+'''knife set operations'''
+
+from heapq import merge
+from itertools import groupby
+
+from stuf.six import map
+
+from knife._compat import count
+
+# marks an exhausted iterator
+_MISSING = object()
+_INFINITY = float('inf')
+
+
+def size(iterable, hasattr_=hasattr, len_=len):
+    '''Number of things in `iterable` if known or infinity.'''
+    return len_(iterable) if hasattr_(iterable, '__len__') else _INFINITY
+
+
+def difference(iterables, set_=set, iter_=iter, next_=next):
+    '''Things in the first of `iterables` and none of the others.'''
+    iterables = iter_(iterables)
+    result = set_(next_(iterables, ()))
+    update = result.difference_update
+    for iterable in iterables:
+        # nothing left to take away from
+        if not result:
+            break
+        update(iterable)
+    return result
+
+
+def symmetric(iterables, set_=set):
+    '''Things in an odd number of `iterables`.'''
+    result = set_()
+    update = result.symmetric_difference_update
+    for iterable in iterables:
+        update(iterable)
+    return result
+
+
+def intersection(iterables, set_=set, list_=list, size_=size):
+    '''Things in all of `iterables`.'''
+    iterables = list_(iterables)
+    if not iterables:
+        return set_()
+    # smallest first so the working set only shrinks from its smallest size
+    iterables.sort(key=size_)
+    result = set_(iterables[0])
+    update = result.intersection_update
+    for iterable in iterables[1:]:
+        if not result:
+            break
+        update(iterable)
+    return result
+
+
+def union(iterables, set_=set):
+    '''Things in any of `iterables` in the order they first turn up.'''
+    seen = set_()
+    seenadd = seen.add
+    for iterable in iterables:
+        for thing in iterable:
+            if thing not in seen:
+                seenadd(thing)
+                yield thing
+
+
+def dedupe(iterable, key=None, groupby_=groupby, next_=next):
+    '''Sorted `iterable` without adjacent duplicates.'''
+    for _, group in groupby_(iterable, key):
+        yield next_(group)
+
+
+def sorted_difference(iterables, iter_=iter, next_=next, d=dedupe, m=merge):
+    '''
+    Things in the first of sorted `iterables` and none of the others in
+    sorted order.
+    '''
+    iterables = iter_(iterables)
+    first = next_(iterables, ())
+    others = m(*iterables)
+    other = next_(others, _MISSING)
+    for thing in d(first):
+        while other is not _MISSING and other < thing:
+            other = next_(others, _MISSING)
+        if other is _MISSING or thing < other:
+            yield thing
+
+
+def sorted_symmetric(iterables, g=groupby, m=merge, d=dedupe, c=count):
+    '''Things in an odd number of sorted `iterables` in sorted order.'''
+    for thing, group in g(m(*map(d, iterables))):
+        if c(group) % 2:
+            yield thing
+
+
+def sorted_intersection(iterables, list_=list, max_=max, next_=next):
+    '''Things in all of sorted `iterables` in sorted order.'''
+    iterators = list_(map(iter, iterables))
+    if not iterators:
+        return
+    try:
+        heads = [next_(i) for i in iterators]
+        while 1:
+            top = max_(heads)
+            # leapfrog every iterator up to the largest head
+            for n, iterator in enumerate(iterators):
+                while heads[n] < top:
+                    heads[n] = next_(iterator)
+            if any(top < head for head in heads):
+                continue
+            yield top
+            for n, iterator in enumerate(iterators):
+                while not top < heads[n]:
+                    heads[n] = next_(iterator)
+    except StopIteration:
+        # nothing can be in all of them once one runs out
+        return
+
+
+def sorted_union(iterables, d=dedupe, m=merge):
+    '''Things in any of sorted `iterables` in sorted order.'''
+    return d(m(*iterables))
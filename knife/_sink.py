@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+'''knife file, database and queue sinks'''
+
+from functools import partial
+from contextlib import contextmanager
+
+from stuf.six import PY3, map, tobytes
+
+from knife._order import batch
+
+# things written at once
+FLUSH = 1024
+
+
+def drain(things):
+    '''Take things from the left of deque `things` until none are left.'''
+    popleft = things.popleft
+    while things:
+        yield popleft()
+
+
+@contextmanager
+def target(path, mode, open_=open, hasattr_=hasattr, **kw):
+    '''File at `path` opened with `mode` or `path` if it's already a file.'''
+    if hasattr_(path, 'write'):
+        # files handed over are left open
+        yield path
+    else:
+        with open_(path, mode, **kw) as sink:
+            yield sink
+
+
+def encode(encoding, thing, isinstance_=isinstance, bytes_=bytes):
+    '''`thing` as bytes encoded with `encoding` if it isn't bytes already.'''
+    if isinstance_(thing, memoryview):
+        return thing.tobytes()
+    if isinstance_(thing, (bytes_, bytearray)):
+        return bytes_(thing)
+    return tobytes(thing, encoding)
+
+
+def tofile(path, encoding, newline, flush, things, b=batch, len_=len):
+    '''
+    Write `things` as lines to file at `path` `flush` lines at a time.
+
+    :return: number of lines written
+    '''
+    newline, n = encode(encoding, newline), 0
+    line = partial(encode, encoding)
+    with target(path, 'wb') as sink:
+        write = sink.write
+        for chunk in b(flush, None, things):
+            write(newline.join([line(thing) for thing in chunk]) + newline)
+            n += len_(chunk)
+    return n
+
+
+def tojsonl(path, flush, kw, things):
+    '''
+    Write `things` as JSON lines to file at `path` `flush` lines at a time.
+
+    :return: number of lines written
+    '''
+    # json is only loaded once something is written with it
+    from json import dumps
+    dump = partial(dumps, **kw)
+    return tofile(path, 'utf-8', '\n', flush, map(dump, things))
+
+
+def tocsv(path, fields, encoding, flush, kw, things, b=batch, len_=len):
+    '''
+    Write `things` as CSV rows to file at `path` `flush` rows at a time.
+
+    :return: number of rows written
+    '''
+    from csv import writer, DictWriter
+    # csv wants text files under Python 3 and binary files under Python 2
+    if PY3:
+        opened = target(path, 'w', encoding=encoding, newline='')
+    else:
+        opened = target(path, 'wb')
+    n = 0
+    with opened as sink:
+        if fields is None:
+            write = writer(sink, **kw).writerows
+        else:
+            rows = DictWriter(sink, fields, **kw)
+            rows.writeheader()
+            write = rows.writerows
+        for chunk in b(flush, None, things):
+            write(chunk)
+            n += len_(chunk)
+    return n
+
+
+def quote(name):
+    '''SQL identifier `name` quoted.'''
+    return '"{0}"'.format(name.replace('"', '""'))
+
+
+def insert(table, columns, width, q=quote):
+    '''Statement inserting `width` values into `columns` of `table`.'''
+    names = '' if columns is None else ' ({0})'.format(
+        ', '.join(map(q, columns))
+    )
+    return 'INSERT INTO {0}{1} VALUES ({2})'.format(
+        q(table), names, ', '.join('?' * width),
+    )
+
+
+def tosqlite(
+    database, table, columns, flush, things, b=batch, len_=len,
+    hasattr_=hasattr,
+):
+    '''
+    Insert `things` as rows into `table` of SQLite `database` with one
+    :meth:`~sqlite3.Cursor.executemany` per `flush` rows.
+
+    :return: number of rows inserted
+    '''
+    from sqlite3 import connect
+    connection = database
+    if not hasattr_(database, 'executemany'):
+        connection = connect(database)
+    n = 0
+    try:
+        # commit once everything is in or roll everything back
+        with connection:
+            execute, statement = connection.executemany, None
+            for chunk in b(flush, None, things):
+                if statement is None:
+                    # the first row gives the width if columns aren't named
+                    statement = insert(table, columns, len_(
+                        chunk[0] if columns is None else columns
+                    ))
+                execute(statement, chunk)
+                n += len_(chunk)
+    finally:
+        # connections handed over are left open
+        if connection is not database:
+            connection.close()
+    return n
+
+
+def toqueue(queue, flush, things, b=batch, len_=len):
+    '''
+    Put `things` on `queue` one at a time or in lists of `flush` things.
+
+    :return: number of things put on `queue`
+    '''
+    put, n = queue.put, 0
+    if flush == 1:
+        for thing in things:
+            put(thing)
+            n += 1
+        return n
+    for chunk in b(flush, None, things):
+        put(chunk)
+        n += len_(chunk)
+    return n
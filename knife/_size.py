@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+'''knife size propagation'''
+
+
+def same(n):
+    '''Size of steps giving one outgoing thing per incoming thing.'''
+    return n
+
+
+def single(n):
+    '''Size of steps giving one outgoing thing from all incoming things.'''
+    return 1
+
+
+def fewer(n, max_=max):
+    '''Size of steps dropping one incoming thing.'''
+    return max_(n - 1, 0)
+
+
+def most(m, min_=min):
+    '''Size of steps giving at most `m` incoming things.'''
+    return lambda n: min_(m, n)
+
+
+def sliced(start, stop, step, max_=max, min_=min):
+    '''Size of steps slicing incoming things like :func:`~itertools.islice`.'''
+    if not stop:
+        return most(start)
+    step = step or 1
+    # ceiling division
+    return lambda n: max_(-(-(min_(stop, n) - start) // step), 0)
+
+
+def diced(m):
+    '''Size of steps grouping incoming things `m` at a time.'''
+    return lambda n: -(-n // m)
+
+
+def windowed(m, step, max_=max):
+    '''Size of steps sliding windows of `m` things `step` things apart.'''
+    return lambda n: max_((n - m) // step + 1, 0)
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+'''knife fixed memory sketches of unbounded streams'''
+
+from math import ceil, log
+
+from stuf.six import map
+
+_MASK = (1 << 64) - 1
+_LOG2 = log(2)
+
+
+def rate(error):
+    '''`error` if it's a rate between 0 and 1.'''
+    if not 0 < error < 1:
+        raise ValueError('error must be between 0 and 1')
+    return error
+
+
+def mix(x, mask=_MASK):
+    '''Spread bits of hash `x` over 64 bits (splitmix64 finalizer).'''
+    x &= mask
+    x ^= x >> 30
+    x = (x * 0xbf58476d1ce4e5b9) & mask
+    x ^= x >> 27
+    x = (x * 0x94d049bb133111eb) & mask
+    return x ^ (x >> 31)
+
+
+class Bloom(object):
+
+    '''
+    `Bloom filter <https://en.wikipedia.org/wiki/Bloom_filter>`_ remembering
+    hashable things in a fixed number of bits.
+    '''
+
+    __slots__ = ('bits', 'size', 'hashes')
+
+    def __init__(self, capacity, error, ceil_=ceil, log_=log, int_=int):
+        '''
+        :argument integer capacity: number of things expected
+        :argument float error: false positive rate once `capacity` things
+          are added
+        '''
+        capacity = float(max(capacity, 1))
+        error = rate(error)
+        self.size = int_(ceil_(-capacity * log_(error) / (_LOG2 * _LOG2)))
+        self.hashes = max(int_(round(self.size / capacity * _LOG2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, thing, mix_=mix, hash_=hash, range_=range):
+        '''
+        Remember `thing`, :const:`True` if it was definitely not seen before.
+        '''
+        first = mix_(hash_(thing))
+        # double hashing derives every probe from two hashes
+        step = mix_(first) | 1
+        bits, size, new = self.bits, self.size, False
+        for i in range_(self.hashes):
+            bit = (first + i * step) % size
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        return new
+
+
+class HyperLogLog(object):
+
+    '''
+    `HyperLogLog <https://en.wikipedia.org/wiki/HyperLogLog>`_ estimating the
+    number of distinct hashable things in a fixed number of registers.
+    '''
+
+    __slots__ = ('registers', 'precision')
+
+    def __init__(self, error, ceil_=ceil, log_=log, int_=int):
+        '''
+        :argument float error: standard error of the estimate
+        '''
+        precision = int_(ceil_(log_((1.04 / rate(error)) ** 2, 2)))
+        self.precision = min(max(precision, 4), 18)
+        self.registers = bytearray(1 << self.precision)
+
+    def add(self, thing, mix_=mix, hash_=hash):
+        '''Count `thing`.'''
+        x = mix_(hash_(thing))
+        precision = self.precision
+        width = 64 - precision
+        # leading bits pick a register, the rest give the run of zeros
+        index = x >> width
+        rank = width - (x & ((1 << width) - 1)).bit_length() + 1
+        registers = self.registers
+        if rank > registers[index]:
+            registers[index] = rank
+
+    def count(self, log_=log, sum_=sum, float_=float):
+        '''Estimated number of distinct things added.'''
+        registers = self.registers
+        m = len(registers)
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / sum_(2.0 ** -r for r in registers)
+        zeros = registers.count(b'\0')
+        # linear counting is more accurate for small numbers of things
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * log_(m / float_(zeros))
+        return int(round(estimate))
+
+
+def approxunique(key, capacity, error, iterable, B=Bloom):
+    '''
+    Things in `iterable` with keys not seen before, remembered in a Bloom
+    filter so things mistaken for ones already seen are dropped at `error`
+    rate.
+    '''
+    add = B(capacity, error).add
+    for thing in iterable:
+        if add(key(thing)):
+            yield thing
+
+
+def distinct(key, error, iterable, H=HyperLogLog, map_=map):
+    '''Estimated number of distinct keys of things in `iterable`.'''
+    sketch = H(error)
+    add = sketch.add
+    for k in map_(key, iterable):
+        add(k)
+    return sketch.count()
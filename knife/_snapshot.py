@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+'''knife snapshot stores'''
+
+from knife._compat import ichain, loads, optimize
+
+
+class SnapshotStore(object):
+
+    '''base snapshot store'''
+
+    def take(self, things):
+        '''
+        Snapshot `things`.
+
+        :argument things: incoming things
+        '''
+        raise NotImplementedError
+
+    def load(self, snapshot):
+        '''
+        Restore things from `snapshot`.
+
+        :argument snapshot: snapshot taken with :meth:`take`
+        '''
+        raise NotImplementedError
+
+    def prepend(self, snapshot, things):
+        '''
+        Derive a snapshot of `things` placed **before** the things in
+        `snapshot` or :const:`None` if the store can't derive it.
+        '''
+
+    def append(self, snapshot, things):
+        '''
+        Derive a snapshot of `things` placed **after** the things in
+        `snapshot` or :const:`None` if the store can't derive it.
+        '''
+
+
+class PickleStore(SnapshotStore):
+
+    '''
+    Snapshot store that pickles incoming things.
+
+    Snapshots are deep copies so later changes to mutable incoming things
+    never leak into them.
+    '''
+
+    def take(self, things, d=optimize):
+        return d(things)
+
+    def load(self, snapshot, l=loads):
+        return l(snapshot)
+
+
+class CowStore(SnapshotStore):
+
+    '''
+    Copy-on-write snapshot store.
+
+    Snapshots are tuples of immutable chunks. Chunks are shared between
+    snapshots so inserting things only adds a chunk for the inserted things.
+    Incoming things themselves are shared, not copied.
+    '''
+
+    def __init__(self, chunks=32):
+        '''
+        :keyword integer chunks: chunks per snapshot before they're compacted
+          into one chunk (default: ``32``)
+        '''
+        self.chunks = chunks
+
+    def take(self, things, tuple_=tuple):
+        return (tuple_(things),)
+
+    def load(self, snapshot, ichain_=ichain):
+        return ichain_(snapshot)
+
+    def prepend(self, snapshot, things, tuple_=tuple):
+        return self._compact((tuple_(things),) + snapshot)
+
+    def append(self, snapshot, things, tuple_=tuple):
+        return self._compact(snapshot + (tuple_(things),))
+
+    def _compact(self, snapshot, len_=len, tuple_=tuple, ichain_=ichain):
+        # merge chunks once there are too many of them
+        if len_(snapshot) > self.chunks:
+            return (tuple_(ichain_(snapshot)),)
+        return snapshot
+
+
+# default snapshot store
+cowstore = CowStore()
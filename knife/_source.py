@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+'''knife file sources'''
+
+from codecs import getdecoder
+
+# ways files split into records
+MODES = ('lines', 'records', 'fixed')
+# bytes read at once from buffered files
+BUFFERING = 1 << 20
+
+
+def delimiter(mode, size, delimiter):
+    '''Bytes ending each record in `mode` or :const:`None` for fixed size.'''
+    if mode not in MODES:
+        raise ValueError('mode must be one of {0}'.format(', '.join(MODES)))
+    if mode == 'fixed':
+        if not size or size < 1:
+            raise ValueError('fixed size records need a size of at least 1')
+        return None
+    if mode == 'lines':
+        return b'\n'
+    if not delimiter:
+        raise ValueError('records need a delimiter')
+    return delimiter
+
+
+def decoded(encoding, records):
+    '''`records` decoded with `encoding` as they are pulled.'''
+    if encoding is None:
+        return records
+    decode = getdecoder(encoding)
+    return (decode(record)[0] for record in records)
+
+
+def view(buffer):
+    '''Zero-copy view of `buffer` if it can be viewed.'''
+    try:
+        return memoryview(buffer)
+    except (NameError, TypeError):
+        # slicing copies where buffers can't be viewed
+        return buffer
+
+
+def split(data, delimiter, start=0, view_=view, len_=len):
+    '''
+    Records in `data` ending with `delimiter` sliced from a view of `data`,
+    and where the unfinished last record starts.
+    '''
+    find, step, records = data.find, len_(delimiter), []
+    append, whole = records.append, view_(data)
+    end = find(delimiter, start)
+    while end != -1:
+        append(whole[start:end])
+        start = end + step
+        end = find(delimiter, start)
+    return records, start
+
+
+def readfile(path, delimiter, size, buffering, open_=open, view_=view):
+    '''Records in file at `path` read in blocks of `buffering` bytes.'''
+    with open_(path, 'rb') as source:
+        read = source.read
+        if delimiter is None:
+            # read whole records at once
+            buffering = max(buffering // size, 1) * size
+            while 1:
+                data = read(buffering)
+                if not data:
+                    return
+                whole = view_(data)
+                for start in range(0, len(data), size):
+                    yield whole[start:start + size]
+        # blocks of the unfinished record and its last bytes a delimiter
+        # could start in
+        pieces, keep, edge = [], len(delimiter) - 1, b''
+        while 1:
+            data = read(buffering)
+            if not data:
+                break
+            if pieces:
+                pieces.append(data)
+                if data.find(delimiter) == -1 and not (
+                    keep and delimiter in edge + data[:keep]
+                ):
+                    # join blocks only once the record ends so records
+                    # spanning many blocks aren't copied over and over
+                    if keep:
+                        edge = (edge + data)[-keep:]
+                    continue
+                data = b''.join(pieces)
+                del pieces[:]
+            records, start = split(data, delimiter)
+            for record in records:
+                yield record
+            if start < len(data):
+                # carry the unfinished record over to the next block
+                pieces.append(data[start:])
+                if keep:
+                    edge = data[-keep:]
+        if pieces:
+            yield view_(b''.join(pieces))
+
+
+def readmap(path, delimiter, size, open_=open, view_=view):
+    '''Records in file at `path` sliced from a memory map.'''
+    from mmap import mmap, ACCESS_READ
+    with open_(path, 'rb') as source:
+        try:
+            mapped = mmap(source.fileno(), 0, access=ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            return
+    whole = None
+    try:
+        whole, length = view_(mapped), len(mapped)
+        if delimiter is None:
+            for start in range(0, length, size):
+                yield whole[start:start + size]
+            return
+        find, step, start = mapped.find, len(delimiter), 0
+        end = find(delimiter, start)
+        while end != -1:
+            yield whole[start:end]
+            start = end + step
+            end = find(delimiter, start)
+        if start < length:
+            yield whole[start:]
+    finally:
+        del whole
+        try:
+            mapped.close()
+        except BufferError:
+            # records still viewed close the map when they're collected
+            pass
@@ -0,0 +1,398 @@
+# -*- coding: utf-8 -*-
+'''knife statistics'''
+
+from itertools import islice
+from operator import truediv
+from heapq import heappush, heapreplace
+from math import exp, floor, fsum, log, log1p, sqrt
+
+from stuf.six import integers
+
+from knife._order import spillsort
+
+
+def moments(iterable, float_=float):
+    '''
+    Number of things, mean and sum of squared deviations from the mean of
+    `iterable` in one pass (Welford's algorithm).
+    '''
+    n = 0
+    mean = m2 = 0.0
+    for thing in iterable:
+        n += 1
+        delta = thing - mean
+        mean += delta / float_(n)
+        m2 += delta * (thing - mean)
+    return n, mean, m2
+
+
+def degrees(n, population):
+    '''
+    Degrees of freedom of the variance of `n` things or :class:`ValueError`
+    if there are too few things.
+    '''
+    if not n:
+        raise ValueError('variance() arg is an empty sequence')
+    if population:
+        return n
+    if n < 2:
+        raise ValueError('variance() of a sample needs at least two things')
+    return n - 1
+
+
+def minmax(iterable, iter_=iter, next_=next):
+    '''Smallest and largest thing in `iterable` in one pass.'''
+    iterable = iter_(iterable)
+    try:
+        low = high = next_(iterable)
+    except StopIteration:
+        raise ValueError('minmax() arg is an empty sequence')
+    for thing in iterable:
+        if thing < low:
+            low = thing
+        elif thing > high:
+            high = thing
+    return low, high
+
+
+def select(data, k, len_=len, sorted_=sorted):
+    '''
+    `k`-th smallest (counting from ``0``) thing in :class:`list` `data` by
+    quickselect.
+    '''
+    from random import choice
+    while 1:
+        # sorting is faster for few things
+        if len_(data) < 512:
+            return sorted_(data)[k]
+        pivot = choice(data)
+        lows = [i for i in data if i < pivot]
+        nlow = len_(lows)
+        if k < nlow:
+            data = lows
+            continue
+        highs = [i for i in data if i > pivot]
+        # things equal to the pivot
+        nlow += len_(data) - nlow - len_(highs)
+        if k < nlow:
+            return pivot
+        k -= nlow
+        data = highs
+
+
+def median(data, len_=len, t=truediv):
+    '''Exact median of :class:`list` `data`.'''
+    n = len_(data)
+    if not n:
+        raise ValueError('median() arg is an empty sequence')
+    middle = n // 2
+    if n % 2:
+        return select(data, middle)
+    return t(select(data, middle - 1) + select(data, middle), 2)
+
+
+def quantile(data, q, len_=len, int_=int, floor_=floor):
+    '''
+    Exact `q` quantile of :class:`list` `data` interpolated linearly between
+    the closest ranks.
+    '''
+    n = len_(data)
+    if not n:
+        raise ValueError('quantile() arg is an empty sequence')
+    position = (n - 1) * q
+    low = int_(floor_(position))
+    value = select(data, low)
+    fraction = position - low
+    if fraction:
+        value += fraction * (select(data, low + 1) - value)
+    return value
+
+
+def spilledmedian(budget, iterable, s=spillsort, i=islice, t=truediv):
+    '''
+    Exact median of `iterable` sorted holding at most `budget` things in
+    memory.
+    '''
+    n, things = s(None, budget, iterable)
+    if not n:
+        raise ValueError('median() arg is an empty sequence')
+    middle = n // 2
+    if n % 2:
+        return next(i(things, middle, None))
+    return t(next(i(things, middle - 1, None)) + next(things), 2)
+
+
+def spilledquantile(
+    budget, q, iterable, s=spillsort, i=islice, int_=int, floor_=floor,
+):
+    '''
+    Exact `q` quantile of `iterable` sorted holding at most `budget` things
+    in memory.
+    '''
+    n, things = s(None, budget, iterable)
+    if not n:
+        raise ValueError('quantile() arg is an empty sequence')
+    position = (n - 1) * q
+    low = int_(floor_(position))
+    value = next(i(things, low, None))
+    fraction = position - low
+    if fraction:
+        value += fraction * (next(things) - value)
+    return value
+
+
+class P2(object):
+
+    '''
+    Streaming `q` quantile estimate in constant memory using the P-square
+    algorithm (Jain & Chlamtac, 1985).
+    '''
+
+    __slots__ = ('q', '_heights', '_positions', '_desired', '_increments')
+
+    def __init__(self, q):
+        self.q = q
+        # marker heights start out as the first five things
+        self._heights = []
+        # actual marker positions
+        self._positions = [0, 1, 2, 3, 4]
+        # desired marker positions and their increments
+        self._desired = [0, 2 * q, 4 * q, 2 + 2 * q, 4]
+        self._increments = [0, q / 2.0, q, (1 + q) / 2.0, 1]
+
+    def add(self, thing):
+        heights = self._heights
+        if len(heights) < 5:
+            heights.append(thing)
+            heights.sort()
+            return
+        positions = self._positions
+        # find cell of thing and adjust extreme markers
+        if thing < heights[0]:
+            heights[0] = thing
+            k = 0
+        elif thing >= heights[4]:
+            heights[4] = thing
+            k = 3
+        else:
+            k = 0
+            while thing >= heights[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            positions[i] += 1
+        desired = self._desired
+        increments = self._increments
+        for i in range(5):
+            desired[i] += increments[i]
+        # adjust middle markers that are off their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - positions[i]
+            if (
+                (d >= 1 and positions[i + 1] - positions[i] > 1) or
+                (d <= -1 and positions[i - 1] - positions[i] < -1)
+            ):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + d * truediv(
+                        heights[i + d] - heights[i],
+                        positions[i + d] - positions[i],
+                    )
+                heights[i] = height
+                positions[i] += d
+
+    def _parabolic(self, i, d, t=truediv):
+        h, n = self._heights, self._positions
+        return h[i] + t(d, n[i + 1] - n[i - 1]) * (
+            t((n[i] - n[i - 1] + d) * (h[i + 1] - h[i]), n[i + 1] - n[i]) +
+            t((n[i + 1] - n[i] - d) * (h[i] - h[i - 1]), n[i] - n[i - 1])
+        )
+
+    def value(self):
+        heights = self._heights
+        if len(heights) < 5:
+            # exact for too few things to estimate
+            return quantile(list(heights), self.q)
+        q = self.q
+        # extreme markers are exact
+        if q <= 0:
+            return heights[0]
+        if q >= 1:
+            return heights[4]
+        return heights[2]
+
+
+def estimate(iterable, q):
+    '''Estimate `q` quantile of `iterable` in one pass and constant memory.'''
+    estimator = P2(q)
+    add = estimator.add
+    for thing in iterable:
+        add(thing)
+    return estimator.value()
+
+
+# NumPy (if installed) once imported
+_numpy = []
+
+
+def generator(seed=None):
+    '''
+    Random number generator seeded with `seed` or the shared generator of
+    :mod:`random` if `seed` is :const:`None`.
+    '''
+    import random
+    return random if seed is None else random.Random(seed)
+
+
+def uniform(rng):
+    # random number greater than 0 and less than 1
+    u = rng.random()
+    while not u:
+        u = rng.random()
+    return u
+
+
+def reservoir(iterable, n, rng, log_=log, exp_=exp, floor_=floor):
+    '''
+    `n` randomly chosen things from `iterable` in one pass using O(`n`)
+    memory (reservoir sampling, Algorithm L).
+
+    :argument iterable: incoming things
+    :argument integer n: sample size
+    :argument rng: random number generator
+    '''
+    iterable = iter(iterable)
+    sample = list(islice(iterable, n))
+    if len(sample) < n or not n:
+        return sample
+    randrange = rng.randrange
+    w = exp_(log_(uniform(rng)) / n)
+    while 1:
+        # skip things that won't be chosen without drawing numbers for them
+        skip = int(floor_(log_(uniform(rng)) / log1p(-w)))
+        for thing in islice(iterable, skip, skip + 1):
+            break
+        else:
+            return sample
+        sample[randrange(n)] = thing
+        w *= exp_(log_(uniform(rng)) / n)
+
+
+def weighted(iterable, n, weight, rng, log_=log):
+    '''
+    `n` things from `iterable` chosen with probability proportional to
+    `weight` of each thing in one pass using O(`n`) memory
+    (Efraimidis-Spirakis A-Res).
+
+    :argument iterable: incoming things
+    :argument integer n: sample size
+    :argument weight: function returning weight of a thing
+    :argument rng: random number generator
+    '''
+    heap = []
+    if not n:
+        return heap
+    push, replace = heappush, heapreplace
+    for i, thing in enumerate(iterable):
+        w = weight(thing)
+        # things weighing nothing are never chosen
+        if w <= 0:
+            continue
+        # keep things with the largest u ** (1 / w) keys
+        key = log_(uniform(rng)) / w
+        if len(heap) < n:
+            push(heap, (key, i, thing))
+        elif key > heap[0][0]:
+            replace(heap, (key, i, thing))
+    return [thing for _, _, thing in heap]
+
+
+def numpy():
+    '''NumPy module or :const:`None` if NumPy isn't installed.'''
+    if not _numpy:
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        _numpy.append(np)
+    return _numpy[0]
+
+
+def pack(things, integers_=integers, set_=set, map_=map, type_=type):
+    '''
+    Pack :class:`list` of homogeneous numeric `things` into a contiguous NumPy
+    array or return :const:`None` if they can't be packed.
+    '''
+    np = numpy()
+    if np is None or not things:
+        return None
+    kinds = set_(map_(type_, things))
+    if kinds.issubset(integers_):
+        dtype = np.int64
+    elif kinds.issubset(integers_ + (float,)):
+        dtype = np.float64
+    else:
+        return None
+    try:
+        return np.fromiter(things, dtype, len(things))
+    except OverflowError:
+        # integers too big for machine integers
+        return None
+
+
+def vaverage(array):
+    return array.mean().item()
+
+
+def vmax(array):
+    return array.max().item()
+
+
+def vmin(array):
+    return array.min().item()
+
+
+def vminmax(array):
+    return array.min().item(), array.max().item()
+
+
+def vrange(array):
+    return array.max().item() - array.min().item()
+
+
+def vmedian(array, len_=len, t=truediv):
+    n = len_(array)
+    middle = n // 2
+    if n % 2:
+        return numpy().partition(array, middle)[middle].item()
+    array = numpy().partition(array, (middle - 1, middle))
+    return t(array[middle - 1].item() + array[middle].item(), 2)
+
+
+def vquantile(q, array, len_=len, int_=int, floor_=floor):
+    position = (len_(array) - 1) * q
+    low = int_(floor_(position))
+    high = low + 1 if low + 1 < len_(array) else low
+    array = numpy().partition(array, (low, high))
+    value = array[low].item()
+    fraction = position - low
+    if fraction:
+        value += fraction * (array[high].item() - value)
+    return value
+
+
+def vsum(start, floats, array, fsum_=fsum, abs_=abs, len_=len):
+    if floats:
+        return fsum_(array.tolist())
+    if array.dtype.kind == 'i':
+        # machine integers could overflow
+        bound = max(abs_(array.min().item()), abs_(array.max().item()))
+        if bound * len_(array) >= 1 << 63:
+            return sum(array.tolist(), start)
+    return array.sum().item() + start
+
+
+def vvariance(population, root, array, sqrt_=sqrt, d=degrees, len_=len):
+    d(len_(array), population)
+    value = array.var(ddof=0 if population else 1).item()
+    return sqrt_(value) if root else value
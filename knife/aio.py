@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+'''Asynchronously evaluated knives (Python 3.6 or later).'''
+
+from knife.base import OutMixin
+from knife.mixins import MapMixin, SliceMixin, ReduceMixin, FilterMixin
+
+from knife._base import _KnifeMixin
+from knife._mixins import _ReduceMixin
+from knife._aio import (
+    SLOTS, _OutMixin, _AsyncMapMixin, _AsyncFilterMixin, _AsyncSliceMixin)
+
+
+class asyncknife(
+    _OutMixin, _KnifeMixin, _AsyncFilterMixin, _AsyncMapMixin, _ReduceMixin,
+    _AsyncSliceMixin, OutMixin, FilterMixin, MapMixin, ReduceMixin, SliceMixin,
+):
+
+    '''
+    Asynchronously evaluated combo knife.
+
+    Combines mapping, filtering, reducing and slicing features for async
+    iterables and coroutine workers. Up to `limit` coroutine results
+    are awaited at once so IO-bound workers overlap. Outgoing things come out
+    with ``async for`` or ``await get()``.
+
+    >>> from knife.aio import asyncknife
+    '''
+
+    __slots__ = SLOTS
+
+
+class filterknife(
+    _OutMixin, _KnifeMixin, OutMixin, FilterMixin, _AsyncFilterMixin,
+):
+
+    '''
+    Asynchronously evaluated filtering knife.
+
+    Filtering operations for incoming things.
+
+    >>> from knife.aio import filterknife
+    '''
+
+    __slots__ = SLOTS
+
+
+class mapknife(_OutMixin, _KnifeMixin, OutMixin, MapMixin, _AsyncMapMixin):
+
+    '''
+    Asynchronously evaluated mapping knife.
+
+    `Map <http://docs.python.org/library/functions.html#map>`_ operations for
+    incoming things.
+
+    >>> from knife.aio import mapknife
+    '''
+
+    __slots__ = SLOTS
+
+
+class reduceknife(_OutMixin, _KnifeMixin, OutMixin, ReduceMixin, _ReduceMixin):
+
+    '''
+    Asynchronously evaluated reducing knife.
+
+    `Reducing <http://docs.python.org/library/functions.html#map>`_ operations
+    for incoming things.
+
+    >>> from knife.aio import reduceknife
+    '''
+
+    __slots__ = SLOTS
+
+
+class sliceknife(
+    _OutMixin, _KnifeMixin, OutMixin, SliceMixin, _AsyncSliceMixin,
+):
+
+    '''
+    Asynchronously evaluated slicing knife.
+
+    `Slicing <http://docs.python.org/library/functions.html#slice>`_ operations
+    for incoming things.
+
+    >>> from knife.aio import sliceknife
+    '''
+
+    __slots__ = SLOTS
@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+'''knife benchmarks'''
+
+import sys
+import json
+import platform
+from timeit import default_timer
+from collections import namedtuple
+from operator import add, truth, itemgetter
+
+from stuf.utils import OrderedDict
+
+import knife
+from knife.lazy import lazyknife
+from knife.active import activeknife
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+MODES = OrderedDict([('active', activeknife), ('lazy', lazyknife)])
+SIZES = (10, 1000, 100000)
+CHAINS = (1, 10, 100)
+Result = namedtuple(
+    'Result',
+    'mode method type size seconds ops items peak overhead error',
+)
+
+
+class Thing(object):
+
+    '''benchmark class for traversing'''
+
+    name = 'moe'
+    age = 40
+
+    class Inner(object):
+        name = 'larry'
+
+
+# incoming things of each element type
+TYPES = OrderedDict([
+    ('int', lambda n: list(range(n))),
+    ('float', lambda n: [i * 0.5 for i in range(n)]),
+    ('str', lambda n: ['thing {0}'.format(i) for i in range(n)]),
+])
+NUMBERS = ('int', 'float')
+# how incoming things of an element type are shaped for a method
+SHAPES = dict(
+    pairs=lambda t: [(i, i) for i in t],
+    params=lambda t: [((i,), {'i': i}) for i in t],
+    split=lambda t: [t, t[::2], t[::3]],
+    chunks=lambda t: [t[i:i + 10] for i in range(0, len(t), 10)],
+    nested=lambda t: [[i, [i, [i]]] for i in t],
+    mappings=lambda t: [{'key': i} for i in t],
+    classes=lambda t: [Thing] * len(t),
+)
+
+
+# how to benchmark one method
+Case = namedtuple('Case', 'call types shape maxsize')
+# statements timed in a fresh interpreter for startup benchmarks
+STARTUP = (
+    'import knife',
+    'from knife import __; __(1, 2, 3).get()',
+    'from knife import knife; knife(1, 2, 3).get()',
+)
+
+
+def case(call, types=tuple(TYPES), shape=None, maxsize=None, get=True):
+    '''
+    Benchmark case for a method.
+
+    :argument call: callable running method on a knife
+    :keyword tuple types: element types to benchmark with
+    :keyword string shape: key of :data:`SHAPES` to shape incoming things
+    :keyword integer maxsize: largest number of incoming things to try
+    :keyword boolean get: collect outgoing things after `call`
+    '''
+    if get:
+        step = call
+        call = lambda k: step(k).get()
+    return Case(call, types, shape, maxsize)
+
+
+# files read by source benchmarks keyed by number of lines
+SOURCES = {}
+
+
+def sourced(size):
+    '''Path to a temporary file of `size` lines.'''
+    path = SOURCES.get(size)
+    if path is None:
+        import os
+        import atexit
+        from tempfile import NamedTemporaryFile
+        with NamedTemporaryFile('wb', delete=False) as source:
+            source.writelines(
+                'thing {0}\n'.format(i).encode('ascii') for i in range(size)
+            )
+        atexit.register(os.remove, source.name)
+        path = SOURCES[size] = source.name
+    return path
+
+
+class discard(object):
+
+    '''sink writing and putting nowhere for sink benchmarks'''
+
+    write = put = staticmethod(lambda thing: None)
+
+
+def database():
+    '''In-memory SQLite database with a table of pairs.'''
+    import sqlite3
+    db = sqlite3.connect(':memory:')
+    db.execute('CREATE TABLE pairs (a, b)')
+    return db
+
+
+# literals searched for by multi-pattern benchmarks
+WORDS = tuple('thing {0}7'.format(i) for i in range(0, 1000, 10))
+identity = lambda x: x
+CASES = OrderedDict([
+    # comparing
+    ('all', case(lambda k: k.worker(truth).all())),
+    ('any', case(lambda k: k.worker(truth).any())),
+    ('count_distinct', case(lambda k: k.count_distinct())),
+    ('difference', case(lambda k: k.difference(), shape='split')),
+    ('intersection', case(lambda k: k.intersection(), shape='split')),
+    ('union', case(lambda k: k.union(), shape='split')),
+    ('unique', case(lambda k: k.unique())),
+    # mathing
+    ('average', case(lambda k: k.average(), NUMBERS)),
+    ('count', case(lambda k: k.count())),
+    ('max', case(lambda k: k.max())),
+    ('median', case(lambda k: k.median(), NUMBERS)),
+    ('min', case(lambda k: k.min())),
+    ('minmax', case(lambda k: k.minmax())),
+    ('quantile', case(lambda k: k.quantile(0.9), NUMBERS)),
+    ('range', case(lambda k: k.range(), NUMBERS)),
+    ('stdev', case(lambda k: k.stdev(), NUMBERS)),
+    ('sum', case(lambda k: k.sum(), NUMBERS)),
+    ('variance', case(lambda k: k.variance(), NUMBERS)),
+    ('vectorize', case(lambda k: k.vectorize().variance(), NUMBERS)),
+    # ordering
+    ('bottom', case(lambda k: k.bottom(10))),
+    ('group', case(lambda k: k.group())),
+    ('reverse', case(lambda k: k.reverse())),
+    ('shuffle', case(lambda k: k.shuffle())),
+    ('sort', case(lambda k: k.sort())),
+    ('top', case(lambda k: k.top(10))),
+    # repeating
+    ('combinate', case(lambda k: k.combinate(2), maxsize=1000)),
+    ('copy', case(lambda k: k.copy())),
+    ('permutate', case(lambda k: k.permutate(2), maxsize=1000)),
+    ('repeat', case(lambda k: k.repeat(3))),
+    # mapping
+    ('argmap', case(lambda k: k.worker(add).argmap(), shape='pairs')),
+    ('chunked', case(lambda k: k.chunked().worker(identity).map())),
+    ('invoke', case(lambda k: k.invoke('upper'), ('str',))),
+    ('kwargmap', case(
+        lambda k: k.worker(lambda *a, **kw: a).kwargmap(), shape='params',
+    )),
+    ('map', case(lambda k: k.worker(identity).map())),
+    ('mapping', case(
+        lambda k: k.worker(lambda x, y: y).mapping(), shape='mappings',
+    )),
+    ('parallel', case(
+        lambda k: k.parallel(2, 'thread').worker(identity).map(),
+    )),
+    ('profile', case(lambda k: k.profile().worker(identity).map())),
+    # filtering
+    ('attrs', case(lambda k: k.attrs('real'), NUMBERS)),
+    ('duality', case(lambda k: k.worker(truth).duality())),
+    ('filter', case(lambda k: k.worker(truth).filter())),
+    ('items', case(lambda k: k.items(0), shape='pairs')),
+    ('pattern', case(
+        lambda k: k.pattern('thing 1*', type='glob').filter(), ('str',),
+    )),
+    ('patterns', case(
+        lambda k: k.patterns(WORDS, type='literal').filter(), ('str',),
+    )),
+    ('traverse', case(
+        lambda k: k.traverse(), ('int',), 'classes', maxsize=1000,
+    )),
+    # reducing
+    ('flatten', case(lambda k: k.flatten(), shape='nested')),
+    ('merge', case(lambda k: k.merge(), shape='chunks')),
+    ('reduce', case(lambda k: k.worker(add).reduce(), NUMBERS)),
+    ('zip', case(lambda k: k.zip(), shape='split')),
+    # slicing
+    ('at', case(lambda k: k.at(5))),
+    ('batch', case(lambda k: k.batch(64))),
+    ('choice', case(lambda k: k.choice())),
+    ('dice', case(lambda k: k.dice(2))),
+    ('first', case(lambda k: k.first(5))),
+    ('initial', case(lambda k: k.initial())),
+    ('last', case(lambda k: k.last(5))),
+    ('rest', case(lambda k: k.rest())),
+    ('sample', case(lambda k: k.sample(5))),
+    ('slice', case(lambda k: k.slice(1, 100, 2))),
+    ('window', case(lambda k: k.window(3))),
+    # sources (lazy knives only)
+    ('from_file', case(
+        lambda k: lazyknife.from_file(
+            sourced(len(k)), encoding='ascii',
+        ).peek(), ('str',), get=False,
+    )),
+    ('from_mmap', case(
+        lambda k: lazyknife.from_mmap(
+            sourced(len(k)), encoding='ascii',
+        ).peek(), ('str',), get=False,
+    )),
+    # chaining
+    ('worker', case(lambda k: k.worker(identity), get=False)),
+    ('params', case(lambda k: k.params(1, a=1), get=False)),
+    ('prepend', case(lambda k: k.prepend(1, 2, 3).peek(), get=False)),
+    ('append', case(lambda k: k.append(1, 2, 3).peek(), get=False)),
+    ('pipe', case(lambda k: k.pipe(type(k)()).back())),
+    ('back', case(lambda k: k.pipe(type(k)()).reverse().back())),
+    # outputting
+    ('get', case(lambda k: k.get(), get=False)),
+    ('peek', case(lambda k: k.peek(), get=False)),
+    ('report', case(
+        lambda k: k.profile().worker(identity).map().get() and k.report(),
+        get=False,
+    )),
+    ('wrap', case(lambda k: k.wrap(tuple))),
+    ('oneach', case(lambda k: k.oneach().wrap(str))),
+    ('ascii', case(lambda k: k.ascii(), ('str',))),
+    ('bytes', case(lambda k: k.bytes(), ('str',))),
+    ('unicode', case(lambda k: k.unicode(), ('str',))),
+    ('__iter__', case(list, get=False)),
+    ('to_file', case(
+        lambda k: k.worker(identity).map().to_file(discard()), get=False,
+    )),
+    ('to_jsonl', case(
+        lambda k: k.worker(identity).map().to_jsonl(discard()), get=False,
+    )),
+    ('to_csv', case(
+        lambda k: k.worker(identity).map().to_csv(discard()),
+        shape='pairs', get=False,
+    )),
+    ('to_sqlite', case(
+        lambda k: k.worker(identity).map().to_sqlite(database(), 'pairs'),
+        shape='pairs', get=False,
+    )),
+    ('to_queue', case(
+        lambda k: k.worker(identity).map().to_queue(discard(), 64),
+        get=False,
+    )),
+    ('__len__', case(len, get=False)),
+    # history
+    ('undo', case(lambda k: k.worker(identity).map().undo())),
+    ('snapshot', case(lambda k: k.snapshot(), get=False)),
+    ('baseline', case(lambda k: k.snapshot().append(1).baseline())),
+    ('original', case(lambda k: k.worker(identity).map().original())),
+    ('clear', case(lambda k: k.clear(), get=False)),
+])
+
+
+def incoming(type_, size, shape=None):
+    '''Incoming things of element `type_` and `size` shaped by `shape`.'''
+    things = TYPES[type_](size)
+    return SHAPES[shape](things) if shape is not None else things
+
+
+def timed(knives, call, timer=default_timer):
+    '''Seconds it takes to `call` every knife in `knives`.'''
+    start = timer()
+    for k in knives:
+        call(k)
+    return timer() - start
+
+
+def best(make, call, repeat=3, minimum=0.02):
+    '''
+    Best seconds per call of `call` on knives built by `make`.
+
+    Calls are batched until a batch takes at least `minimum` seconds so
+    small inputs are timed reliably.
+    '''
+    number = 1
+    while 1:
+        elapsed = timed([make() for _ in range(number)], call)
+        if elapsed >= minimum or number >= 10000:
+            break
+        number *= 10
+    times = [elapsed] + [
+        timed([make() for _ in range(number)], call)
+        for _ in range(repeat - 1)
+    ]
+    return min(times) / number
+
+
+def peak(make, call):
+    '''Peak bytes allocated by `call` or :const:`None` without tracemalloc.'''
+    if tracemalloc is None:
+        return None
+    k = make()
+    tracemalloc.start()
+    try:
+        call(k)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(mode, method, type_, size, repeat=3, memory=True):
+    '''
+    Benchmark `method` on a knife of evaluation `mode` with `size` incoming
+    things of element `type_`.
+
+    :rtype: :class:`Result`
+    '''
+    knife_, spec = MODES[mode], CASES[method]
+    things = incoming(type_, size, spec.shape)
+    make = lambda: knife_(*things)
+    lean = lambda: knife_(*things, history=False)
+    try:
+        seconds = best(make, spec.call, repeat)
+        # cost of taking snapshots relative to not taking them
+        overhead = None
+        if method not in ('undo', 'snapshot', 'baseline', 'original'):
+            overhead = seconds / best(lean, spec.call, repeat) - 1
+        return Result(
+            mode, method, type_, size, seconds, 1 / seconds, size / seconds,
+            peak(make, spec.call) if memory else None, overhead, None,
+        )
+    except Exception as e:
+        return Result(
+            mode, method, type_, size, None, None, None, None, None, repr(e),
+        )
+
+
+def chain(mode, length, size, history=True, repeat=3):
+    '''
+    Benchmark chaining :meth:`map` `length` times on a knife of evaluation
+    `mode` with `size` incoming things.
+    '''
+    knife_ = MODES[mode]
+    things = list(range(size))
+    def call(k): #@IgnorePep8
+        k.worker(identity)
+        for _ in range(length):
+            k.map()
+        return k.get()
+    make = lambda: knife_(*things, history=history)
+    seconds = best(make, call, repeat)
+    return OrderedDict([
+        ('mode', mode), ('length', length), ('size', size),
+        ('history', history), ('seconds', seconds),
+        ('items', size * length / seconds),
+    ])
+
+
+def startup(statement, repeat=5):
+    '''
+    Benchmark running `statement` in a fresh interpreter, less the time the
+    interpreter itself takes to start.
+    '''
+    from subprocess import check_call
+    def started(code): #@IgnorePep8
+        start = default_timer()
+        check_call([sys.executable, '-c', code])
+        return default_timer() - start
+    bare = min(started('pass') for _ in range(repeat))
+    seconds = min(started(statement) for _ in range(repeat))
+    return OrderedDict([
+        ('statement', statement), ('seconds', max(seconds - bare, 0.0)),
+    ])
+
+
+def run(
+    modes=tuple(MODES), methods=tuple(CASES), types=tuple(TYPES),
+    sizes=SIZES, chains=CHAINS, repeat=3, memory=True, report=None,
+    statements=STARTUP,
+):
+    '''
+    Run benchmarks.
+
+    :keyword report: callable called with each result as it's finished
+    :keyword statements: statements benchmarked by :func:`startup`
+
+    :rtype: :class:`dict` of environment, startup, method and chain results
+    '''
+    results, chained, started = [], [], []
+    for statement in statements:
+        started.append(startup(statement, repeat))
+        if report is not None:
+            report(started[-1])
+    for mode in modes:
+        for method in methods:
+            spec = CASES[method]
+            for type_ in types:
+                if type_ not in spec.types:
+                    continue
+                for size in sizes:
+                    if spec.maxsize is not None and size > spec.maxsize:
+                        continue
+                    result = bench(mode, method, type_, size, repeat, memory)
+                    results.append(OrderedDict(zip(Result._fields, result)))
+                    if report is not None:
+                        report(results[-1])
+        for length in chains:
+            for size in sizes:
+                for history in (True, False):
+                    chained.append(chain(mode, length, size, history, repeat))
+                    if report is not None:
+                        report(chained[-1])
+    return OrderedDict([
+        ('knife', '.'.join(map(str, knife.__version__))),
+        ('python', platform.python_version()),
+        ('implementation', platform.python_implementation()),
+        ('platform', platform.platform()),
+        ('startup', started),
+        ('results', results),
+        ('chains', chained),
+    ])
+
+
+def key(result, fields=itemgetter('mode', 'method', 'type', 'size')):
+    return fields(result)
+
+
+def compare(old, new, threshold=0.1):
+    '''
+    Compare method results of two runs.
+
+    :argument old: earlier run
+    :argument new: later run
+    :keyword float threshold: slowdown ratio counted as a regression
+
+    :rtype: :class:`list` of (*key*, *old seconds*, *new seconds*, *ratio*,
+      *regressed*) :class:`tuple`
+    '''
+    before = dict((key(r), r['seconds']) for r in old['results'])
+    compared = []
+    for result in new['results']:
+        was, now = before.get(key(result)), result['seconds']
+        if was and now:
+            ratio = now / was
+            compared.append((
+                key(result), was, now, ratio, ratio > 1 + threshold,
+            ))
+    return compared
+
+
+def save(results, path):
+    '''Save `results` as JSON to `path`.'''
+    with open(path, 'w') as output:
+        json.dump(results, output, indent=2)
+
+
+def load(path):
+    '''Load results saved as JSON at `path`.'''
+    with open(path) as source:
+        return json.load(source, object_pairs_hook=OrderedDict)
+
+
+def show(result, out=sys.stdout):
+    '''Write one `result` line to `out`.'''
+    if 'statement' in result:
+        line = 'startup {seconds:>10.4f}s {statement}'
+    elif 'method' in result:
+        if result['error'] is not None:
+            line = '{mode:6} {method:12} {type:5} {size:>9} ERROR {error}'
+        else:
+            line = (
+                '{mode:6} {method:12} {type:5} {size:>9} '
+                '{ops:>14,.1f} ops/s {items:>16,.0f} items/s'
+            )
+            if result['peak'] is not None:
+                line += ' {peak:>12,} bytes'
+            if result['overhead'] is not None:
+                line += ' snapshots {overhead:+.0%}'
+    else:
+        line = (
+            '{mode:6} chain x{length:<4} {size:>9} history={history!s:5} '
+            '{items:>16,.0f} items/s'
+        )
+    out.write(line.format(**result) + '\n')
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+'''run knife benchmarks: python -m knife.bench'''
+
+import sys
+from argparse import ArgumentParser
+
+from knife.bench import (
+    MODES, CASES, TYPES, SIZES, CHAINS, STARTUP, run, save, load, compare,
+    show)
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog='python -m knife.bench', description='Benchmark knife methods.',
+    )
+    parser.add_argument(
+        '--modes', nargs='+', choices=list(MODES), default=list(MODES),
+    )
+    parser.add_argument(
+        '--methods', nargs='+', choices=list(CASES), default=list(CASES),
+        metavar='METHOD',
+    )
+    parser.add_argument(
+        '--types', nargs='+', choices=list(TYPES), default=list(TYPES),
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', type=int, default=list(SIZES),
+        help='numbers of incoming things (default: %(default)s)',
+    )
+    parser.add_argument(
+        '--chains', nargs='+', type=int, default=list(CHAINS),
+        help='chain lengths (default: %(default)s)',
+    )
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument(
+        '--no-startup', action='store_true',
+        help="don't benchmark import and first knife startup time",
+    )
+    parser.add_argument(
+        '--no-memory', action='store_true', help="don't measure peak memory",
+    )
+    parser.add_argument('--output', help='save results as JSON to OUTPUT')
+    parser.add_argument(
+        '--compare', metavar='JSON', help='compare with earlier results',
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='slowdown ratio reported as a regression (default: 0.1)',
+    )
+    args = parser.parse_args(argv)
+    results = run(
+        args.modes, args.methods, args.types, args.sizes, args.chains,
+        args.repeat, not args.no_memory, show,
+        () if args.no_startup else STARTUP,
+    )
+    if args.output:
+        save(results, args.output)
+    if args.compare:
+        regressed = 0
+        for key, was, now, ratio, regression in compare(
+            load(args.compare), results, args.threshold,
+        ):
+            regressed += regression
+            sys.stdout.write('{0} {1:.3g}s -> {2:.3g}s ({3:+.0%}){4}\n'.format(
+                ' '.join(map(str, key)), was, now, ratio - 1,
+                ' REGRESSION' if regression else '',
+            ))
+        return 1 if regressed else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
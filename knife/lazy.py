@@ -6,8 +6,8 @@ from knife.mixins import (
     RepeatMixin, MapMixin, SliceMixin, ReduceMixin, FilterMixin, MathMixin,
     CmpMixin, OrderMixin)
 
-from knife._lazy import _OutMixin
-from knife._base import SLOTS, _KnifeMixin
+from knife._base import _KnifeMixin
+from knife._lazy import SLOTS, _OutMixin
 from knife._mixins import (
     _RepeatMixin, _MapMixin, _SliceMixin, _ReduceMixin, _FilterMixin,
     _MathMixin, _CmpMixin, _OrderMixin)
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+'''Thread-local knives.'''
+
+from threading import local
+
+
+def _once(thing, iter_=iter, tuple_=tuple):
+    # things that can only be iterated once are read into a tuple
+    try:
+        if iter_(thing) is thing:
+            return tuple_(thing)
+    except TypeError:
+        pass
+    return thing
+
+
+class localknife(object):
+
+    '''
+    Knife with separate state in every thread.
+
+    Knives are plain objects so one knife shared between threads shares its
+    state. :class:`localknife` builds a fresh knife with the same arguments
+    the first time it's used in each thread and forwards to it. Incoming
+    things that are iterators are read into tuples once so every thread
+    gets all of them.
+
+    >>> from knife import knife
+    >>> from knife.local import localknife
+    >>> test = localknife(knife, 1, 2, 3)
+    >>> test.worker(lambda x: x * 2).map().get()
+    [2, 4, 6]
+    '''
+
+    def __init__(self, factory, *things, **kw):
+        '''
+        :argument factory: knife class (or other callable returning a knife)
+        :argument things: incoming things
+        :keyword kw: keyword arguments passed to `factory`
+        '''
+        # iterators would be used up by the first thread to read them
+        self._things = tuple(_once(thing) for thing in things)
+        self._factory, self._kw = factory, kw
+        self._local = local()
+        self._local.knife = factory(*self._things, **kw)
+
+    @property
+    def knife(self):
+        '''Knife of the current thread.'''
+        knife = getattr(self._local, 'knife', None)
+        if knife is None:
+            # built with the same arguments in every other thread
+            knife = self._local.knife = self._factory(
+                *self._things, **self._kw
+            )
+        return knife
+
+    def __getattr__(self, name):
+        return getattr(self.knife, name)
+
+    def __iter__(self):
+        return iter(self.knife)
+
+    def __len__(self):
+        return len(self.knife)
+
+    def __repr__(self):
+        return repr(self.knife)
@@ -1,15 +1,22 @@
 # -*- coding: utf-8 -*-
 '''knife mixins'''
 
-from threading import local
+from functools import partial
 
+from knife._size import (
+    same, single, fewer, most, sliced, diced, windowed)
+from knife._stats import (
+    vaverage, vmax, vmedian, vmin, vquantile, vrange, vsum, vvariance)
 
-class CmpMixin(local):
+
+class CmpMixin(object):
 
     '''
     comparing knife mixin
     '''
 
+    __slots__ = ()
+
     def all(self):
         '''
         Discover if :meth:`worker` is :const:`True` for **every** incoming
@@ -21,7 +28,7 @@ class CmpMixin(local):
         >>> __(2, 4, 6, 8).worker(lambda x: x % 2 == 0).all().get()
         True
         '''
-        with self._chain:
+        with self._chain('all'):
             return self._one(self._all(self._test))
 
     def any(self):
@@ -33,10 +40,31 @@ class CmpMixin(local):
         >>> __(1, 4, 5, 9).worker(lambda x: x % 2 == 0).any().get()
         True
         '''
-        with self._chain:
+        with self._chain('any'):
             return self._one(self._any(self._test))
 
-    def difference(self, symmetric=False):
+    def count_distinct(self, error=0.01):
+        '''
+        Estimate how many distinct incoming things there are using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Counts are estimated with `HyperLogLog <https://en.wikipedia.org/wiki/
+        HyperLogLog>`_ so memory stays fixed however many things come in.
+
+        :keyword float error: standard error of the estimate
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 1, 3, 1, 4).count_distinct().get()
+        4
+        '''
+        if not 0 < error < 1:
+            raise ValueError('error must be between 0 and 1')
+        with self._chain('count_distinct'):
+            return self._one(self._count_distinct(self._identity, error))
+
+    def difference(self, symmetric=False, presorted=False):
         '''
         Discover `difference <http://docs.python.org/library/stdtypes.html#
         set.difference>`_ within a series of `iterable <http://docs.python.
@@ -45,6 +73,9 @@ class CmpMixin(local):
         :keyword boolean symmetric: use `symmetric <http://docs.python.org/
           library/stdtypes.html#set.symmetric_difference>`_ difference
 
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> # default behavior
@@ -54,41 +85,76 @@ class CmpMixin(local):
         >>> # symmetric difference
         >>> test.original().difference(symmetric=True).get()
         [1, 2, 3, 4, 11]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3, 4, 5], [2, 5, 10], [2, 10, 11]).difference(
+        ...   presorted=True
+        ... ).get()
+        [1, 3, 4]
         '''
-        with self._chain:
-            return self._many(self._difference(symmetric))
+        with self._chain('difference'):
+            return self._many(self._difference(symmetric, presorted))
 
-    def intersection(self):
+    def intersection(self, presorted=False):
         '''
         Discover `intersection <http://docs.python.org/library/stdtypes.html#
         set.intersection>`_ within a series of `iterable <http://docs.python.
         org/glossary.html#term-iterable>`_ incoming things.
 
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __([1, 2, 3], [101, 2, 1, 10], [2, 1]).intersection().get()
         [1, 2]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3], [1, 2, 10, 101], [1, 2]).intersection(
+        ...   presorted=True
+        ... ).get()
+        [1, 2]
         '''
-        with self._chain:
-            return self._many(self._intersection)
+        with self._chain('intersection'):
+            return self._many(self._intersection(presorted))
 
-    def union(self):
+    def union(self, presorted=False):
         '''
         Discover `union <http://docs.python.org/py3k/library/stdtypes.html#
         set.union>`_ within a series of `iterable <http://docs.python.org/
-        glossary.html#term-iterable>`_ incoming things.
+        glossary.html#term-iterable>`_ incoming things in the order they
+        first turn up.
+
+        :keyword boolean presorted: incoming iterables are already sorted so
+          merge them in order instead of hashing their things
 
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __([1, 2, 3], [101, 2, 1, 10], [2, 1]).union().get()
-        [1, 10, 3, 2, 101]
+        [1, 2, 3, 101, 10]
+        >>> # merge sorted iterables
+        >>> __([1, 2, 3], [1, 2, 10, 101], [1, 2]).union(presorted=True).get()
+        [1, 2, 3, 10, 101]
         '''
-        with self._chain:
-            return self._many(self._union)
+        with self._chain('union'):
+            return self._many(self._union(presorted))
 
-    def unique(self):
+    def unique(
+        self, presorted=False, approx=False, capacity=1000000, error=0.001,
+    ):
         '''
-        Discover unique incoming things.
+        Discover unique incoming things in the order they first turn up.
+
+        :keyword boolean presorted: incoming things are already sorted so
+          drop repeats next to each other without remembering every thing
+
+        :keyword boolean approx: remember things in a fixed size `Bloom
+          filter <https://en.wikipedia.org/wiki/Bloom_filter>`_ instead of a
+          :class:`set` so some unique things may be mistaken for repeats
+
+        :keyword integer capacity: number of unique things the Bloom filter
+          is sized for
+
+        :keyword float error: rate unique things are mistaken for repeats
+          once `capacity` unique things have come in
 
         :rtype: :const:`self` (:obj:`knife` object)
 
@@ -98,15 +164,27 @@ class CmpMixin(local):
         >>> # using worker as key function
         >>> __(1, 2, 1, 3, 1, 4).worker(round).unique().get()
         [1, 2, 3, 4]
+        >>> # sorted incoming things
+        >>> __(1, 1, 2, 3, 3, 4).unique(presorted=True).get()
+        [1, 2, 3, 4]
+        >>> # fixed memory
+        >>> __(1, 2, 1, 3, 1, 4).unique(approx=True).get()
+        [1, 2, 3, 4]
         '''
-        with self._chain:
-            return self._iter(self._unique(self._identity))
+        if approx and not 0 < error < 1:
+            raise ValueError('error must be between 0 and 1')
+        with self._chain('unique'):
+            return self._iter(self._unique(
+                self._identity, presorted, approx, capacity, error,
+            ))
 
 
-class MathMixin(local):
+class MathMixin(object):
 
     '''mathing knife mixin'''
 
+    __slots__ = ()
+
     def average(self):
         '''
         Discover average value among incoming things.
@@ -117,8 +195,8 @@ class MathMixin(local):
         >>> __(10, 40, 45).average().get()
         31.666666666666668
         '''
-        with self._chain:
-            return self._iter(self._average)
+        with self._chain('average'):
+            return self._iter(self._vector(self._average, vaverage))
 
     def count(self):
         '''
@@ -141,7 +219,7 @@ class MathMixin(local):
         >>> common.overall
         [(11, 3), (3, 2), (5, 2), (7, 1)]
         '''
-        with self._chain:
+        with self._chain('count'):
             return self._iter(self._count)
 
     def max(self):
@@ -164,13 +242,23 @@ class MathMixin(local):
         >>> __(*stooges).worker(lambda x: x['age']).max().get()
         {'age': 60, 'name': 'curly'}
         '''
-        with self._chain:
-            return self._iter(self._max(self._identity))
+        with self._chain('max'):
+            return self._iter(self._vector(
+                self._max(self._identity),
+                vmax if self._worker is None else None,
+            ))
 
-    def median(self):
+    def median(self, approx=False, budget=None):
         '''
         Discover median value among incoming things.
 
+        :keyword boolean approx: estimate median in one pass and constant
+          memory instead of finding it exactly
+
+        :keyword integer budget: most incoming things held in memory at once
+          while sorting them through temporary files (default: hold every
+          incoming thing in memory)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(4, 5, 7, 2, 1).median().get()
@@ -178,8 +266,13 @@ class MathMixin(local):
         >>> __(4, 5, 7, 2, 1, 8).median().get()
         4.5
         '''
-        with self._chain:
-            return self._iter(self._median)
+        if budget is not None and budget < 1:
+            raise ValueError('budget must be at least 1')
+        with self._chain('median'):
+            return self._iter(self._vector(
+                self._median(approx, budget),
+                None if approx or budget is not None else vmedian,
+            ))
 
     def min(self):
         '''
@@ -195,8 +288,11 @@ class MathMixin(local):
         >>> test.original().worker(lambda x: x % 100 == 0).min().get()
         10
         '''
-        with self._chain:
-            return self._iter(self._min(self._identity))
+        with self._chain('min'):
+            return self._iter(self._vector(
+                self._min(self._identity),
+                vmin if self._worker is None else None,
+            ))
 
     def minmax(self):
         '''
@@ -212,8 +308,39 @@ class MathMixin(local):
         >>> minmax.max
         4
         '''
-        with self._chain:
-            return self._iter(self._minmax)
+        with self._chain('minmax'):
+            return self._iter(self._vector(self._minmax, self._vminmax))
+
+    def quantile(self, q, approx=False, budget=None):
+        '''
+        Discover value below which fraction `q` of incoming things fall,
+        interpolating linearly between the closest incoming things.
+
+        :argument float q: quantile between ``0`` and ``1``
+
+        :keyword boolean approx: estimate quantile in one pass and constant
+          memory instead of finding it exactly
+
+        :keyword integer budget: most incoming things held in memory at once
+          while sorting them through temporary files (default: hold every
+          incoming thing in memory)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 3, 4, 5).quantile(0.25).get()
+        2
+        >>> __(1, 2, 3, 4).quantile(0.5).get()
+        2.5
+        '''
+        if budget is not None and budget < 1:
+            raise ValueError('budget must be at least 1')
+        with self._chain('quantile'):
+            return self._iter(self._vector(
+                self._quantile(q, approx, budget),
+                None if approx or budget is not None else partial(
+                    vquantile, q,
+                ),
+            ))
 
     def range(self):
         '''
@@ -225,8 +352,26 @@ class MathMixin(local):
         >>> __(3, 5, 7, 3, 11).range().get()
         8
         '''
-        with self._chain:
-            return self._iter(self._range)
+        with self._chain('range'):
+            return self._iter(self._vector(self._range, vrange))
+
+    def stdev(self, population=False):
+        '''
+        Discover standard deviation of incoming things.
+
+        :keyword boolean population: standard deviation of all possible
+          things rather than of a sample of them
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).stdev(population=True).get()
+        2.0
+        '''
+        with self._chain('stdev'):
+            return self._iter(self._vector(
+                self._variance(population, True),
+                partial(vvariance, population, True),
+            ))
 
     def sum(self, start=0, precision=False):
         '''
@@ -249,19 +394,75 @@ class MathMixin(local):
         >>> __(.1, .1, .1, .1, .1, .1, .1, .1).sum(precision=True).get()
         0.8
         '''
-        with self._chain:
-            return self._iter(self._sum(start, precision))
+        with self._chain('sum'):
+            return self._iter(self._vector(
+                self._sum(start, precision),
+                partial(vsum, start, precision),
+            ))
+
+    def variance(self, population=False):
+        '''
+        Discover variance of incoming things in one pass.
+
+        :keyword boolean population: variance of all possible things rather
+          than of a sample of them
 
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).variance().get()
+        4.571428571428571
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).variance(population=True).get()
+        4.0
+        '''
+        with self._chain('variance'):
+            return self._iter(self._vector(
+                self._variance(population, False),
+                partial(vvariance, population, False),
+            ))
 
-class OrderMixin(local):
+    def vectorize(self, vectorize=True):
+        '''
+        Toggle reducing incoming numbers with `NumPy
+        <http://www.numpy.org/>`_ in later mathing methods.
+
+        Incoming things that aren't all integers or floats, or integers too
+        big for machine integers, are still reduced in pure Python as are all
+        incoming things if NumPy isn't installed.
+
+        :keyword boolean vectorize: reduce with NumPy if installed
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(2, 4, 4, 4, 5, 5, 7, 9).vectorize().variance().get()
+        4.571428571428571
+        '''
+        self._vectorize = vectorize
+        return self
+
+
+class OrderMixin(object):
 
     '''ordering knife mixin'''
 
-    def group(self):
+    __slots__ = ()
+
+    def group(self, reduce=None, initial=None, budget=None):
         '''
         Group incoming things using :meth:`worker` as the `key function
         <http://docs.python.org/glossary.html#term-key-function>`_.
 
+        Groups are collected in a hash table so keys only need to be
+        hashable. Groups come out in the order their keys first turn up.
+
+        :keyword reduce: binary function folding every group into one thing
+          as it is collected (default: keep every thing in a group)
+
+        :keyword initial: starting value for `reduce`, copied for every group
+
+        :keyword integer budget: most groups held in memory at once before
+          things with new keys are spilled to temporary files and regrouped
+          in the same order (default: hold every group in memory)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> from knife import __
@@ -272,9 +473,20 @@ class OrderMixin(local):
         >>> # use worker for key function
         >>> __(1.3, 2.1, 2.4).worker(floor).group().get()
         [Group(keys=1.0, groups=(1.3,)), Group(keys=2.0, groups=(2.1, 2.4))]
-        '''
-        with self._chain:
-            return self._many(self._group(self._identity))
+        >>> # reduce groups as they are collected
+        >>> from operator import add
+        >>> __(1, 2, 3, 4, 5).worker(lambda x: x % 2).group(add).get()
+        [Group(keys=1, groups=9), Group(keys=0, groups=6)]
+        >>> # count things in every group
+        >>> __('a', 'b', 'a').group(lambda x, y: x + 1, 0).get()
+        [Group(keys='a', groups=2), Group(keys='b', groups=1)]
+        '''
+        if budget is not None and budget < 1:
+            raise ValueError('budget must be at least 1')
+        with self._chain('group'):
+            return self._many(self._group(
+                self._identity, reduce, initial, budget,
+            ))
 
     def reverse(self):
         '''
@@ -285,26 +497,35 @@ class OrderMixin(local):
         >>> __(5, 4, 3, 2, 1).reverse().get()
         [1, 2, 3, 4, 5]
         '''
-        with self._chain:
-            return self._many(self._reverse)
+        with self._chain('reverse'):
+            return self._many(self._reverse, same)
 
-    def shuffle(self):
+    def shuffle(self, seed=None):
         '''
         Randomly sort incoming things.
 
+        :keyword seed: seed for a private random number generator so the
+          order can be reproduced (default: shared generator of
+          :mod:`random`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
           >>> __(5, 4, 3, 2, 1).shuffle().get() # doctest: +SKIP
           [3, 1, 5, 4, 2]
         '''
-        with self._chain:
-            return self._iter(self._shuffle)
+        with self._chain('shuffle'):
+            return self._iter(self._shuffle(seed), single)
 
-    def sort(self):
+    def sort(self, budget=None):
         '''
         Reorder incoming things using :meth:`worker` as the `key function
         <http://docs.python.org/glossary.html#term-key-function>`_.
 
+        :keyword integer budget: most incoming things held in memory at once.
+          Sorted runs of `budget` incoming things are spilled to temporary
+          files and merged back (default: sort every incoming thing in
+          memory)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> # default sort
@@ -314,15 +535,63 @@ class OrderMixin(local):
         >>> # using worker as key function
         >>> __(1, 2, 3, 4, 5, 6).worker(sin).sort().get()
         [5, 4, 6, 3, 1, 2]
+        >>> # sort through temporary files
+        >>> __(4, 6, 65, 3, 63, 2, 4).sort(budget=3).get()
+        [2, 3, 4, 4, 6, 63, 65]
+        '''
+        if budget is not None and budget < 1:
+            raise ValueError('budget must be at least 1')
+        with self._chain('sort'):
+            return self._many(self._sort(self._identity, budget), same)
+
+    def bottom(self, n=1):
+        '''
+        Slice off the `n` smallest incoming things, smallest first, using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Only `n` things are kept in memory so this is faster than
+        :meth:`sort` followed by :meth:`~knife.mixins.SliceMixin.first`.
+
+        :keyword integer n: number of incoming things
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(4, 6, 65, 3, 63, 2, 4).bottom(3).get()
+        [2, 3, 4]
+        '''
+        with self._chain('bottom'):
+            return self._many(self._bottom(n, self._identity), most(n))
+
+    def top(self, n=1):
+        '''
+        Slice off the `n` largest incoming things, largest first, using
+        :meth:`worker` as the `key function <http://docs.python.org/glossary.
+        html#term-key-function>`_.
+
+        Only `n` things are kept in memory so this is faster than
+        :meth:`sort` followed by :meth:`~knife.mixins.SliceMixin.last`.
+
+        :keyword integer n: number of incoming things
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(4, 6, 65, 3, 63, 2, 4).top(3).get()
+        [65, 63, 6]
+        >>> # using worker as key function
+        >>> __('moe', 'larry', 'curly').worker(len).top(2).get()
+        ['larry', 'curly']
         '''
-        with self._chain:
-            return self._iter(self._sort(self._identity))
+        with self._chain('top'):
+            return self._many(self._top(n, self._identity), most(n))
 
 
-class RepeatMixin(local):
+class RepeatMixin(object):
 
     '''repeating knife mixin'''
 
+    __slots__ = ()
+
     def combinate(self, n):
         '''
         Discover `combinations <https://en.wikipedia.org/wiki/Combination>`_
@@ -337,7 +606,7 @@ class RepeatMixin(local):
         >>> __(40, 50, 60).combinate(2).get()
         [(40, 50), (40, 60), (50, 60)]
         '''
-        with self._chain:
+        with self._chain('combinate'):
             return self._many(self._combinations(n))
 
     def copy(self):
@@ -349,8 +618,8 @@ class RepeatMixin(local):
         >>> __([[1, [2, 3]], [4, [5, 6]]]).copy().get()
         [[1, [2, 3]], [4, [5, 6]]]
         '''
-        with self._chain:
-            return self._many(self._copy)
+        with self._chain('copy'):
+            return self._many(self._copy, same)
 
     def permutate(self, n):
         '''
@@ -365,7 +634,7 @@ class RepeatMixin(local):
         >>> __(40, 50, 60).permutate(2).get()
         [(40, 50), (40, 60), (50, 40), (50, 60), (60, 40), (60, 50)]
         '''
-        with self._chain:
+        with self._chain('permutate'):
             return self._many(self._permutations(n))
 
     def repeat(self, n=None, call=False):
@@ -387,14 +656,16 @@ class RepeatMixin(local):
         >>> __(40, 50, 60).worker(test).repeat(n=3, call=True).get()
         [[40, 50, 60], [40, 50, 60], [40, 50, 60]]
         '''
-        with self._chain:
+        with self._chain('repeat'):
             return self._many(self._repeat(n, call, self._identity))
 
 
-class MapMixin(local):
+class MapMixin(object):
 
     '''mapping knife mixin'''
 
+    __slots__ = ()
+
     def argmap(self, merge=False):
         '''
         Feed each incoming thing to :meth:`worker` as `wildcard <http://docs.
@@ -418,8 +689,10 @@ class MapMixin(local):
         ... ).params(7, 8, 9).argmap(merge=True).get()
         [1008, 3024, 6048]
         '''
-        with self._chain:
-            return self._many(self._argmap(self._worker, merge, self._args))
+        with self._chain('argmap'):
+            return self._many(self._argmap(
+                self._worker, merge, self._args, self._parallel,
+            ), same)
 
     def invoke(self, name):
         '''
@@ -442,8 +715,10 @@ class MapMixin(local):
         >>> __([5, 1, 7], [3, 2, 1]).invoke('sort').get()
         [[1, 5, 7], [1, 2, 3]]
         '''
-        with self._chain:
-            return self._many(self._invoke(name, (self._args, self._kw)))
+        with self._chain('invoke'):
+            return self._many(self._invoke(
+                name, (self._args, self._kw), self._parallel,
+            ), same)
 
     def kwargmap(self, merge=False):
         '''
@@ -475,22 +750,29 @@ class MapMixin(local):
         ... ).kwargmap(merge=True).get()
         [270, 330, 390]
         '''
-        with self._chain:
+        with self._chain('kwargmap'):
             return self._many(self._kwargmap(
-                self._worker, merge, self._args, self._kw,
-            ))
+                self._worker, merge, self._args, self._kw, self._parallel,
+            ), same)
 
     def map(self):
         '''
         Feed each incoming thing to :meth:`worker`.
 
+        After :meth:`~knife.base.ChainknifeMixin.chunked`, :meth:`worker` is
+        fed batches of incoming things instead.
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(1, 2, 3).worker(lambda x: x * 3).map().get()
         [3, 6, 9]
         '''
-        with self._chain:
-            return self._many(self._map(self._worker))
+        with self._chain('map'):
+            chunked = self._chunked
+            return self._many(
+                self._map(self._worker, self._parallel, chunked),
+                same if chunked is None else None,
+            )
 
     def mapping(self, keys=False, values=False):
         '''
@@ -516,14 +798,16 @@ class MapMixin(local):
         ... ).mapping(values=True).get()
         [2, 3, 4, 2, 3, 4]
         '''
-        with self._chain:
+        with self._chain('mapping'):
             return self._many(self._mapping(self._identity, keys, values))
 
 
-class FilterMixin(local):
+class FilterMixin(object):
 
     '''filtering knife mixin'''
 
+    __slots__ = ()
+
     def attrs(self, *names):
         '''
         Collect `attribute <http://docs.python.org/glossary.html#term-
@@ -550,7 +834,7 @@ class FilterMixin(local):
         >>> __(*stooge).attrs('place').get()
         []
         '''
-        with self._chain:
+        with self._chain('attrs'):
             return self._iter(self._attributes(names))
 
     def duality(self):
@@ -569,7 +853,7 @@ class FilterMixin(local):
         >>> divide.false
         (1, 3, 5)
         '''
-        with self._chain:
+        with self._chain('duality'):
             return self._iter(self._duality(self._test))
 
     def filter(self, invert=False):
@@ -591,8 +875,10 @@ class FilterMixin(local):
         ... ).filter(invert=True).get()
         [1, 3, 5]
         '''
-        with self._chain:
-            return self._many(self._filter(self._test, invert))
+        with self._chain('filter'):
+            return self._many(self._filter(
+                self._test, invert, self._parallel,
+            ))
 
     def items(self, *keys):
         '''
@@ -624,7 +910,7 @@ class FilterMixin(local):
         >>> __(*stooge).items('place').get()
         []
         '''
-        with self._chain:
+        with self._chain('items'):
             return self._iter(self._items(keys))
 
     def traverse(self, invert=False):
@@ -664,7 +950,7 @@ class FilterMixin(local):
         ChainMap(OrderedDict([('classname', 'stooge3'), ('age', 60)]),
         OrderedDict([('age', 969), ('classname', 'stooge4')]))]
         '''
-        with self._chain:
+        with self._chain('traverse'):
             if self._worker is None:
                 test = lambda x: not x[0].startswith('__')
             else:
@@ -672,22 +958,33 @@ class FilterMixin(local):
             return self._many(self._traverse(test, invert))
 
 
-class ReduceMixin(local):
+class ReduceMixin(object):
 
     '''reducing knife mixin'''
 
-    def flatten(self):
+    __slots__ = ()
+
+    def flatten(self, depth=None, atoms=None):
         '''
         Reduce nested incoming things to flattened incoming things.
 
+        :keyword integer depth: most levels of nesting to flatten (default:
+          flatten every level)
+
+        :keyword tuple atoms: types not flattened besides strings (default:
+          bytes, :class:`bytearray`, and :class:`dict`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> from knife import __
         >>> __([[1, [2], [3, [[4]]]], 'here']).flatten().get()
         [1, 2, 3, 4, 'here']
+        >>> # flatten two levels
+        >>> __([[1, [2], [3, [[4]]]], 'here']).flatten(2).get()
+        [1, [2], [3, [[4]]], 'here']
         '''
-        with self._chain:
-            return self._many(self._flatten)
+        with self._chain('flatten'):
+            return self._many(self._flatten(depth, atoms))
 
     def merge(self):
         '''
@@ -700,7 +997,7 @@ class ReduceMixin(local):
         >>> __(['moe', 'larry'], [30, 40], [True, False]).merge().get()
         ['moe', 'larry', 30, 40, True, False]
         '''
-        with self._chain:
+        with self._chain('merge'):
             return self._many(self._merge)
 
     def reduce(self, initial=None, reverse=False):
@@ -734,7 +1031,7 @@ class ReduceMixin(local):
         ... ).reduce([0, 0], True).get()
         [4, 5, 2, 3, 0, 1, 0, 0]
         '''
-        with self._chain:
+        with self._chain('reduce'):
             return self._one(self._reduce(self._worker, initial, reverse))
 
     def zip(self):
@@ -749,14 +1046,16 @@ class ReduceMixin(local):
         >>> test.zip().get()
         [('moe', 30, True), ('larry', 40, False)]
         '''
-        with self._chain:
+        with self._chain('zip'):
             return self._many(self._zip)
 
 
-class SliceMixin(local):
+class SliceMixin(object):
 
     '''slicing knife mixin'''
 
+    __slots__ = ()
+
     def at(self, n, default=None):
         '''
         `Slice <http://docs.python.org/glossary.html#term-slice>`_ off
@@ -776,21 +1075,57 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).at(10, 11).get()
         11
         '''
-        with self._chain:
+        with self._chain('at'):
             return self._one(self._at(n, default))
 
-    def choice(self):
+    def batch(self, size, max_bytes=None):
+        '''
+        `Slice <http://docs.python.org/glossary.html#term-slice>`_ incoming
+        things into :class:`list` batches of up to `size` incoming things.
+
+        :argument integer size: most incoming things per batch
+
+        :keyword integer max_bytes: most bytes per batch, measured with
+          :func:`sys.getsizeof` (default: no limit)
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __('moe', 'larry', 'curly', 30, 40, 50, True).batch(3).get()
+        [['moe', 'larry', 'curly'], [30, 40, 50], [True]]
+        '''
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError('max_bytes must be above 0')
+        with self._chain('batch'):
+            return self._many(
+                self._batch(size, max_bytes),
+                diced(size) if max_bytes is None else None,
+            )
+
+    def choice(self, weighted=False, seed=None):
         '''
         Randomly `slice <http://docs.python.org/glossary.html#term-slice>`_
-        off **one** incoming thing.
+        off **one** incoming thing in one pass.
+
+        :keyword boolean weighted: use :meth:`worker` to weigh incoming things
+          so heavier things are likelier to be chosen
+
+        :keyword seed: seed for a private random number generator so the
+          choice can be reproduced (default: shared generator of
+          :mod:`random`)
 
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(1, 2, 3, 4, 5, 6).choice().get() # doctest: +SKIP
         3
         '''
-        with self._chain:
-            return self._iter(self._choice())
+        if weighted and self._worker is None:
+            raise ValueError('weighted sampling needs a worker')
+        with self._chain('choice'):
+            return self._iter(self._choice(
+                self._worksize, self._worker if weighted else None, seed,
+            ), most(1))
 
     def dice(self, n, fill=None):
         '''
@@ -807,8 +1142,8 @@ class SliceMixin(local):
         >>> __('moe', 'larry', 'curly', 30, 40, 50, True).dice(2, 'x').get()
         [('moe', 'larry'), ('curly', 30), (40, 50), (True, 'x')]
         '''
-        with self._chain:
-            return self._many(self._dice(n, fill))
+        with self._chain('dice'):
+            return self._many(self._dice(n, fill), diced(n))
 
     def first(self, n=0):
         '''
@@ -826,8 +1161,8 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).first(2).get()
         [5, 4]
         '''
-        with self._chain:
-            return self._iter(self._first(n))
+        with self._chain('first'):
+            return self._iter(self._first(n), most(n or 1))
 
     def initial(self):
         '''
@@ -839,8 +1174,8 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).initial().get()
         [5, 4, 3, 2]
         '''
-        with self._chain:
-            return self._many(self._initial)
+        with self._chain('initial'):
+            return self._many(self._initial(self._worksize), fewer)
 
     def last(self, n=0):
         '''
@@ -859,8 +1194,8 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).last(2).get()
         [2, 1]
         '''
-        with self._chain:
-            return self._iter(self._last(n))
+        with self._chain('last'):
+            return self._iter(self._last(n, self._worksize), most(n or 1))
 
     def rest(self):
         '''
@@ -872,23 +1207,39 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).rest().get()
         [4, 3, 2, 1]
         '''
-        with self._chain:
-            return self._many(self._rest)
+        with self._chain('rest'):
+            return self._many(self._rest, fewer)
 
-    def sample(self, n):
+    def sample(self, n, weighted=False, seed=None):
         '''
         Randomly `slice <http://docs.python.org/glossary.html#term-slice>`_ off
-        `n` incoming things.
+        `n` incoming things in one pass, keeping no more than `n` things in
+        memory.
 
         :argument integer n: sample size
 
+        :keyword boolean weighted: use :meth:`worker` to weigh incoming things
+          so heavier things are likelier to be sampled
+
+        :keyword seed: seed for a private random number generator so the
+          sample can be reproduced (default: shared generator of
+          :mod:`random`)
+
         :rtype: :const:`self` (:obj:`knife` object)
 
         >>> __(1, 2, 3, 4, 5, 6).sample(3).get() # doctest: +SKIP
         [2, 4, 5]
-        '''
-        with self._chain:
-            return self._iter(self._sample(n))
+        >>> __(1, 2, 3, 4, 5, 6).worker(lambda x: x).sample(
+        ...   3, weighted=True,
+        ... ).get() # doctest: +SKIP
+        [6, 4, 5]
+        '''
+        if weighted and self._worker is None:
+            raise ValueError('weighted sampling needs a worker')
+        with self._chain('sample'):
+            return self._iter(self._sample(
+                n, self._worker if weighted else None, seed,
+            ), most(n))
 
     def slice(self, start, stop=False, step=False):
         '''
@@ -913,5 +1264,31 @@ class SliceMixin(local):
         >>> __(5, 4, 3, 2, 1).slice(2, 4, 2).get()
         3
         '''
-        with self._chain:
-            return self._many(self._slice(start, stop, step))
+        with self._chain('slice'):
+            return self._many(
+                self._slice(start, stop, step), sliced(start, stop, step),
+            )
+
+    def window(self, n, step=1):
+        '''
+        `Slice <http://docs.python.org/glossary.html#term-slice>`_ incoming
+        things into sliding windows of `n` incoming things.
+
+        :argument integer n: number of incoming things per window
+
+        :keyword integer step: number of incoming things between the starts
+          of windows
+
+        :rtype: :const:`self` (:obj:`knife` object)
+
+        >>> __(1, 2, 3, 4, 5).window(3).get()
+        [(1, 2, 3), (2, 3, 4), (3, 4, 5)]
+        >>> __(1, 2, 3, 4, 5).window(2, 3).get()
+        [(1, 2), (4, 5)]
+        '''
+        if n < 1:
+            raise ValueError('n must be at least 1')
+        if step < 1:
+            raise ValueError('step must be at least 1')
+        with self._chain('window'):
+            return self._many(self._window(n, step), windowed(n, step))
@@ -1,2 +1,7 @@
 # -*- coding: utf-8 -*-
 '''knife tests'''
+
+try:
+    import unittest2 as unittest
+except ImportError:
+    import unittest  # @UnusedImport
@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
 '''ordering test mixins'''
 
+from knife.tests import unittest
+from knife._stats import numpy
+
 
 class stooges: #@IgnorePep8
     name = 'moe'
@@ -57,6 +60,137 @@ class MathMixin(object):
     def test_median(self):
         self.assertEqual(self.mclass(4, 5, 7, 2, 1).median().get(), 4)
         self.assertEqual(self.mclass(4, 5, 7, 2, 1, 8).median().get(), 4.5)
+        self.assertEqual(self.mclass(4, 5, 7).median().get(), 5)
+        things = list(range(1001))
+        self.assertEqual(self.mclass(*things).median().get(), 500)
+        self.assertAlmostEqual(
+            self.mclass(*things).median(approx=True).get(), 500, delta=10,
+        )
+        # sorted through temporary files
+        self.assertEqual(
+            self.mclass(*reversed(things)).median(budget=100).get(), 500,
+        )
+        self.assertEqual(
+            self.mclass(4, 5, 7, 2, 1, 8).median(budget=2).get(), 4.5,
+        )
+        self.assertRaises(ValueError, self.mclass(3, 1, 2).median, budget=0)
+
+    def test_quantile(self):
+        self.assertEqual(self.mclass(1, 2, 3, 4, 5).quantile(0.25).get(), 2)
+        self.assertEqual(self.mclass(1, 2, 3, 4).quantile(0.5).get(), 2.5)
+        self.assertEqual(self.mclass(5, 1, 3).quantile(0).get(), 1)
+        self.assertEqual(self.mclass(5, 1, 3).quantile(1).get(), 5)
+        things = list(range(10000))
+        self.assertAlmostEqual(
+            self.mclass(*things).quantile(0.9, approx=True).get(),
+            8999.1,
+            delta=100,
+        )
+        self.assertAlmostEqual(
+            self.mclass(*reversed(things)).quantile(0.9, budget=500).get(),
+            8999.1,
+        )
+        self.assertRaises(ValueError, self.mclass(1, 2).quantile, 2)
+        self.assertRaises(
+            ValueError, self.mclass(3, 1, 2).quantile, 0.5, budget=0,
+        )
+
+    def test_variance(self):
+        self.assertAlmostEqual(
+            self.mclass(2, 4, 4, 4, 5, 5, 7, 9).variance().get(),
+            4.571428571428571,
+        )
+        self.assertEqual(
+            self.mclass(2, 4, 4, 4, 5, 5, 7, 9).variance(True).get(), 4.0,
+        )
+
+    def test_variance_few(self):
+        # too few things for a variance
+        for test, population in (
+            (lambda: self.mclass(), True),
+            (lambda: self.mclass(), False),
+            (lambda: self.mclass(3), False),
+            (lambda: self.mclass(3).vectorize(), False),
+        ):
+            self.assertRaises(
+                ValueError, lambda: test().variance(population).get(),
+            )
+            self.assertRaises(
+                ValueError, lambda: test().stdev(population).get(),
+            )
+        self.assertEqual(self.mclass(3).variance(True).get(), 0.0)
+
+    def test_stdev(self):
+        self.assertEqual(
+            self.mclass(2, 4, 4, 4, 5, 5, 7, 9).stdev(True).get(), 2.0,
+        )
+
+    def test_vectorize(self):
+        numbers = (2, 4, 4, 4, 5, 5, 7, 9)
+        self.assertEqual(
+            self.mclass(*numbers).vectorize().variance(True).get(), 4.0,
+        )
+        self.assertEqual(self.mclass(*numbers).vectorize().median().get(), 4.5)
+        minmax = self.mclass(*numbers).vectorize().minmax().get()
+        self.assertEqual((minmax.min, minmax.max), (2, 9))
+        self.assertEqual(self.mclass(*numbers).vectorize().sum(1).get(), 41)
+        self.assertEqual(
+            self.mclass(1.5, 2.5, 3).vectorize().quantile(0.5).get(), 2.5,
+        )
+        # falls back on things NumPy can't reduce
+        self.assertEqual(
+            self.mclass(2 ** 70, 1).vectorize().sum().get(), 2 ** 70 + 1,
+        )
+        self.assertEqual(
+            self.mclass('b', 'a', 'c').vectorize().minmax().get(), ('a', 'c'),
+        )
+        self.assertEqual(
+            self.mclass(10, 5, 100, 2, 1000).vectorize().worker(
+                lambda x: x % 100 == 0
+            ).min().get(),
+            10,
+        )
+
+    def _vectorized(self):
+        # reductions give the same with vectorize() as without it
+        for numbers in (
+            (2, 4, 4, 4, 5, 5, 7, 9), (3, -1, 8), (0.5, 2.25, -1.0, 7.5),
+        ):
+            for method, args in (
+                ('average', ()), ('max', ()), ('min', ()), ('range', ()),
+                ('median', ()), ('quantile', (0.25,)), ('quantile', (0.5,)),
+                ('sum', ()), ('sum', (1, True)), ('variance', ()),
+                ('variance', (True,)), ('stdev', ()),
+            ):
+                self.assertAlmostEqual(
+                    getattr(
+                        self.mclass(*numbers).vectorize(), method
+                    )(*args).get(),
+                    getattr(self.mclass(*numbers), method)(*args).get(),
+                )
+            self.assertEqual(
+                tuple(self.mclass(*numbers).vectorize().minmax().get()),
+                tuple(self.mclass(*numbers).minmax().get()),
+            )
+
+    def test_vectorize_dispatch(self):
+        from knife import _stats
+        asked = []
+        def nonumpy(): #@IgnorePep8
+            asked.append(True)
+            return None
+        _stats.numpy = nonumpy
+        self.addCleanup(setattr, _stats, 'numpy', numpy)
+        # vectorized reductions try NumPy before falling back
+        self.assertEqual(self.mclass(1, 2, 3).vectorize().sum().get(), 6)
+        self.assertTrue(asked)
+        del asked[:]
+        self.assertEqual(self.mclass(1, 2, 3).sum().get(), 6)
+        self.assertFalse(asked)
+
+    @unittest.skipUnless(numpy(), 'NumPy is not installed')
+    def test_vectorize_numpy(self):
+        self._vectorized()
 
     def test_min(self):
         self.assertEqual(self.mclass(10, 5, 100, 2, 1000).min().get(), 2)
@@ -119,6 +253,22 @@ class CmpMixin(object):
             ).difference(True).get(),
             [1, 3, 4, 11]
         )
+        self.assertEqual(
+            self.mclass(
+                [1, 2, 3, 4, 5], [2, 5, 10], [2, 10, 11]
+            ).difference(presorted=True).get(),
+            [1, 3, 4],
+        )
+        self.assertEqual(
+            self.mclass(
+                [1, 3, 4, 5], [2, 5, 10], [2, 10, 11]
+            ).difference(True, True).get(),
+            [1, 3, 4, 11]
+        )
+        # nothing left once the first iterable is used up
+        self.assertEqual(
+            self.mclass([1, 2], [1, 2], iter([3])).difference().get(), [],
+        )
 
     def test_intersection(self):
         self.assertEqual(
@@ -126,11 +276,30 @@ class CmpMixin(object):
                 [1, 2, 3], [101, 2, 1, 10], [2, 1]
             ).intersection().get(), [1, 2],
         )
+        self.assertEqual(
+            self.mclass(
+                [1, 1, 2, 3], [1, 2, 2, 10, 101], [1, 2]
+            ).intersection(presorted=True).get(), [1, 2],
+        )
+        self.assertEqual(
+            self.mclass(
+                [1, 3], [2, 4], iter([1, 2, 3, 4])
+            ).intersection(presorted=True).get(), [],
+        )
+        self.assertEqual(
+            self.mclass([1, 3], iter([2, 4]), [3]).intersection().get(), [],
+        )
 
     def test_union(self):
         self.assertEqual(
             self.mclass([1, 2, 3], [101, 2, 1, 10], [2, 1]).union().get(),
-            [1, 10, 3, 2, 101],
+            [1, 2, 3, 101, 10],
+        )
+        self.assertEqual(
+            self.mclass(
+                [1, 2, 3], [1, 2, 10, 101], [1, 2]
+            ).union(presorted=True).get(),
+            [1, 2, 3, 10, 101],
         )
 
     def test_unique(self):
@@ -141,6 +310,57 @@ class CmpMixin(object):
             self.mclass(1, 2, 1, 3, 1, 4).worker(round).unique().get(),
             [1, 2, 3, 4],
         )
+        self.assertEqual(
+            self.mclass(1, 1, 2, 3, 3, 4).unique(presorted=True).get(),
+            [1, 2, 3, 4],
+        )
+        self.assertEqual(
+            self.mclass(1.1, 1.4, 2.2, 2.4, 3.6).worker(round).unique(
+                presorted=True
+            ).get(),
+            [1.1, 2.2, 3.6],
+        )
+        self.assertEqual(
+            self.mclass(1, 2, 1, 3, 1, 4).unique(approx=True).get(),
+            [1, 2, 3, 4],
+        )
+        self.assertEqual(
+            self.mclass(1, 2, 1, 3, 1, 4).worker(str).unique(
+                approx=True, capacity=10, error=0.01,
+            ).get(),
+            [1, 2, 3, 4],
+        )
+        # false positives stay near the error rate at capacity
+        test = self.mclass(*range(2000)).unique(
+            approx=True, capacity=2000, error=0.01,
+        )
+        self.assertTrue(1940 <= len(list(test.get())) <= 2000)
+        # error rates are fractions
+        for error in (0, 1, -0.1, 2):
+            self.assertRaises(
+                ValueError, self.mclass(1, 2).unique, approx=True,
+                error=error,
+            )
+        from knife._sketch import Bloom
+        self.assertRaises(ValueError, Bloom, 10, 0)
+
+    def test_count_distinct(self):
+        self.assertEqual(
+            self.mclass(1, 2, 1, 3, 1, 4).count_distinct().get(), 4,
+        )
+        self.assertEqual(
+            self.mclass(1, 2, 1, 3, 1, 4).worker(
+                lambda x: x % 2
+            ).count_distinct().get(), 2,
+        )
+        count = self.mclass(*range(50000)).count_distinct(0.02).get()
+        self.assertTrue(48000 <= count <= 52000)
+        for error in (0, 1, -0.1, 2):
+            self.assertRaises(
+                ValueError, self.mclass(1, 2).count_distinct, error,
+            )
+        from knife._sketch import HyperLogLog
+        self.assertRaises(ValueError, HyperLogLog, 0)
 
 
 class OrderMixin(object):
@@ -150,6 +370,10 @@ class OrderMixin(object):
             len(self.mclass(1, 2, 3, 4, 5, 6).shuffle()),
             len([5, 4, 6, 3, 1, 2]),
         )
+        self.assertEqual(
+            self.mclass(*range(20)).shuffle(seed=3).get(),
+            self.mclass(*range(20)).shuffle(seed=3).get(),
+        )
 
     def test_group(self,):
         self.assertEqual(
@@ -161,6 +385,54 @@ class OrderMixin(object):
             self.mclass(1.3, 2.1, 2.4).worker(floor).group().get(),
             [(1.0, (1.3,)), (2.0, (2.1, 2.4))]
         )
+        # keys only need to be hashable and keep their first order
+        self.assertEqual(
+            self.mclass(3, 1j, 3, 1j, 2).group().get(),
+            [(3, (3, 3)), (1j, (1j, 1j)), (2, (2,))],
+        )
+        from operator import add
+        self.assertEqual(
+            self.mclass(1, 2, 3, 4, 5).worker(lambda x: x % 2).group(
+                add
+            ).get(),
+            [(1, 9), (0, 6)],
+        )
+        self.assertEqual(
+            self.mclass('a', 'b', 'a').group(lambda x, y: x + 1, 0).get(),
+            [('a', 2), ('b', 1)],
+        )
+        # mutable initial values aren't shared between groups
+        self.assertEqual(
+            self.mclass(1, 2, 3, 4).worker(lambda x: x % 2).group(
+                lambda x, y: x.append(y) or x, [],
+            ).get(),
+            [(1, [1, 3]), (0, [2, 4])],
+        )
+
+    def test_group_spill(self):
+        from operator import add
+        test = self.mclass(*range(500)).worker(lambda x: x % 37)
+        # groups past the budget are spilled and still come out whole
+        spilled = test.group(budget=4).get()
+        self.assertEqual(len(spilled), 37)
+        # spilled groups keep the order their keys first turned up in
+        self.assertEqual(
+            spilled, test.original().worker(lambda x: x % 37).group().get(),
+        )
+        things = [(x * 7919) % 1000 for x in range(3000)]
+        self.assertEqual(
+            self.mclass(*things).worker(lambda x: x % 211).group(
+                budget=3,
+            ).get(),
+            self.mclass(*things).worker(lambda x: x % 211).group().get(),
+        )
+        self.assertEqual(
+            sorted(test.original().worker(lambda x: x % 37).group(
+                add, budget=2,
+            ).get()),
+            [(k, sum(range(k, 500, 37))) for k in range(37)],
+        )
+        self.assertRaises(ValueError, self.mclass(1, 2, 1).group, budget=0)
 
     def test_combo(self):
         self.assertEqual(
@@ -182,6 +454,66 @@ class OrderMixin(object):
             self.mclass(4, 6, 65, 3, 63, 2, 4).sort().get(),
             [2, 3, 4, 4, 6, 63, 65],
         )
+        # sorted runs spilled to temporary files keep equal keys in order
+        self.assertEqual(
+            self.mclass(*range(100)).worker(lambda x: x % 3).sort(
+                budget=7
+            ).get(),
+            sorted(range(100), key=lambda x: x % 3),
+        )
+        self.assertEqual(self.mclass(3, 1, 2).sort(budget=10).get(), [1, 2, 3])
+        self.assertRaises(ValueError, self.mclass(3, 1, 2).sort, budget=0)
+
+    def test_sort_spill(self):
+        from knife import _order
+        opened, merges = [], []
+        spillfile = _order.spillfile
+        def counted(): #@IgnorePep8
+            opened.append(spillfile())
+            return opened[-1]
+        _order.spillfile = counted
+        self.addCleanup(setattr, _order, 'spillfile', spillfile)
+        def merge(*runs): #@IgnorePep8
+            merges.append(len(runs))
+            return _order.merge(*runs)
+        things = [(i * 7919) % 1000 for i in range(1000)]
+        # 100 runs are merged 4 at a time into 25, 7, 2 and then 1 run
+        n, out = _order.spillsort(None, 10, things, fanin=4, merge_=merge)
+        first = next(out)
+        self.assertEqual(n, 1000)
+        self.assertEqual(max(merges), 4)
+        self.assertEqual(len(opened), 4)
+        # only the file of the last runs is still open
+        self.assertEqual(sum(not f.closed for f in opened), 1)
+        self.assertEqual([first] + list(out), sorted(things))
+        self.assertTrue(all(f.closed for f in opened))
+        del opened[:]
+        self.assertEqual(
+            self.mclass(*things).sort(budget=10).get(), sorted(things),
+        )
+        self.assertTrue(opened)
+        self.assertTrue(all(f.closed for f in opened))
+
+    def test_bottom(self):
+        self.assertEqual(
+            self.mclass(4, 6, 65, 3, 63, 2, 4).bottom(3).get(), [2, 3, 4],
+        )
+        self.assertEqual(self.mclass(4, 6, 65, 3).bottom().get(), 3)
+        self.assertEqual(
+            self.mclass('moe', 'larry', 'curly').worker(len).bottom(2).get(),
+            ['moe', 'larry'],
+        )
+
+    def test_top(self):
+        self.assertEqual(
+            self.mclass(4, 6, 65, 3, 63, 2, 4).top(3).get(), [65, 63, 6],
+        )
+        self.assertEqual(self.mclass(4, 6, 65, 3).top().get(), 65)
+        self.assertEqual(self.mclass(4, 6).top(5).get(), [6, 4])
+        self.assertEqual(
+            self.mclass('moe', 'larry', 'curly').worker(len).top(2).get(),
+            ['larry', 'curly'],
+        )
 
 
 class FilterMixin(object):
@@ -205,6 +537,119 @@ class FilterMixin(object):
                 '* second *', type='glob'
             ).filter().get(), 'This is the second test'
         )
+        # globs are only searched for in things holding their literal parts
+        things = ('log: error here', 'log: ok', 'error')
+        for glob, matched in (
+            ('error*', ['log: error here', 'error']),
+            ('**error*', ['log: error here', 'error']),
+            ('*here', 'log: error here'),
+            ('ok', 'log: ok'),
+            ('*', list(things)),
+            ('e?ror', 'error'),
+            ('[!:] ok', []),
+        ):
+            self.assertEqual(
+                self.mclass(*things).pattern(glob, type='glob').filter().get(),
+                matched,
+            )
+        # every kind of pattern gives its matches
+        search = self.mclass().pattern('*error*', type='glob')._worker
+        self.assertEqual(search('log: error here').group(), 'log: error here')
+        self.assertIsNone(search('log: ok'))
+        search = self.mclass().pattern('*', type='glob')._worker
+        self.assertEqual(search('log: ok').group(), 'log: ok')
+        search = self.mclass().pattern(r'(\w+) h[e]re', type='regex')._worker
+        self.assertEqual(search('log: error here').group(1), 'error')
+        self.assertIsNone(search('log: ok'))
+        search = self.mclass().pattern('LOG: {} here')._worker
+        self.assertEqual(search('log: error here')[0], 'error')
+        self.assertIsNone(search('log: ok'))
+
+    def test_patterns(self):
+        from re import IGNORECASE
+        test = self.mclass(
+            'This is the first test',
+            'This is the second test',
+            'This is the third test',
+        ).patterns(['{} first {}', '{} third {}'])
+        self.assertEqual(
+            test.filter().get(),
+            ['This is the first test', 'This is the third test'],
+        )
+        self.assertEqual(
+            test.original().patterns(
+                ['. third .', 'x+', 'second (t)'], type='regex'
+            ).filter().get(),
+            ['This is the second test', 'This is the third test'],
+        )
+        self.assertEqual(
+            test.original().patterns(
+                ['* first *', '* second *'], type='glob'
+            ).filter().get(),
+            ['This is the first test', 'This is the second test'],
+        )
+        self.assertEqual(
+            test.original().patterns(
+                ['SECOND', 'third', 'is'], type='literal', flags=IGNORECASE,
+            ).filter(True).get(),
+            [],
+        )
+        # patterns matched are given
+        things = ('she sells', 'he said', 'hers', 'rush')
+        match = test.patterns(['hers', 'he', 'she'], type='literal')._worker
+        self.assertEqual(
+            [match(thing) for thing in things], ['he', 'he', 'hers', None],
+        )
+        # large literal sets are searched for all at once
+        words = ['word{0}'.format(i) for i in range(250)]
+        match = test.patterns(
+            words + ['SHE', 'US', 'he'], type='literal', flags=IGNORECASE,
+        )._worker
+        self.assertEqual(
+            [match(thing) for thing in things + ('word42 word7',)],
+            ['SHE', 'he', 'he', 'US', 'word4'],
+        )
+        # globs are only tried on things holding their literal parts
+        match = test.patterns(
+            words + ['*[!x]ers', '?u*', '*e*'], type='glob',
+        )._worker
+        self.assertEqual(
+            [match(thing) for thing in things + ('a word42',)],
+            ['*e*', '*e*', '*[!x]ers', '?u*', 'word42'],
+        )
+        match = test.patterns(['hers', 'h.', 's'], type='regex')._worker
+        self.assertEqual(
+            [match(thing) for thing in things], ['h.', 'h.', 'hers', 's'],
+        )
+        # patterns that can't share one regex still match
+        match = test.patterns(
+            [r'(l)\1', r'(?P<x>e)', r'(?P<x>u)'], type='regex',
+        )._worker
+        self.assertEqual(
+            [match(thing) for thing in things],
+            ['(l)\\1', '(?P<x>e)', '(?P<x>e)', '(?P<x>u)'],
+        )
+        self.assertRaises(ValueError, test.patterns, [])
+        # case is folded like regular expressions fold it
+        from re import UNICODE
+        from stuf.six import PY3, u
+        sax, flags = u('\u017fax'), IGNORECASE | UNICODE
+        for patterns, type, single in (
+            ([u('*s?x')], 'glob', 'glob'),
+            (words + [u('*s?x')], 'glob', 'glob'),
+            ([u('sa')], 'literal', 'regex'),
+            (words + [u('sa')], 'literal', 'regex'),
+        ):
+            found = test.patterns(patterns, type, flags)._worker(sax)
+            # as found by the single pattern
+            self.assertEqual(
+                found is not None,
+                test.pattern(
+                    patterns[-1], single, flags,
+                )._worker(sax) is not None,
+            )
+            if PY3:
+                self.assertEqual(found, patterns[-1])
 
     def test_traverse(self):
         from knife._compat import ChainMap, OrderedDict
@@ -296,6 +741,19 @@ class FilterMixin(object):
                 lambda x: x % 2 == 0
             ).filter().get(), [2, 4, 6]
         )
+        from operator import truth
+        self.assertEqual(
+            self.mclass(0, 1, 2, 0, 3, None).parallel(
+                2, chunksize=2,
+            ).worker(truth).filter(invert=True).get(),
+            [0, 0, None],
+        )
+        self.assertEqual(
+            self.mclass(*range(100)).parallel(4, 'thread', 3).worker(
+                lambda x: x % 2 == 0
+            ).filter().get(),
+            list(range(0, 100, 2)),
+        )
 
     def test_duality(self):
         self.assertEqual(
@@ -316,6 +774,29 @@ class SliceMixin(object):
             [('moe', 'larry'), ('curly', 30), (40, 50), (True, 'x')]
         )
 
+    def test_batch(self):
+        self.assertEqual(
+            self.mclass(
+                'moe', 'larry', 'curly', 30, 40, 50, True
+            ).batch(3).get(),
+            [['moe', 'larry', 'curly'], [30, 40, 50], [True]],
+        )
+        from sys import getsizeof
+        things = ['x' * 100] * 5
+        # batches are cut once they would go over max_bytes
+        self.assertEqual(
+            [len(b) for b in self.mclass(*things).batch(
+                4, max_bytes=getsizeof(things[0]) * 2,
+            ).get()],
+            [2, 2, 1],
+        )
+        self.assertEqual(
+            [len(b) for b in self.mclass(*things).batch(4, 1).get()],
+            [1, 1, 1, 1, 1],
+        )
+        self.assertRaises(ValueError, self.mclass(1, 2, 3).batch, 0)
+        self.assertRaises(ValueError, self.mclass(1, 2, 3).batch, 2, 0)
+
     def test_first(self):
         self.assertEqual(self.mclass(5, 4, 3, 2, 1).first().get(), 5)
         self.assertEqual(self.mclass(5, 4, 3, 2, 1).first(2).get(), [5, 4])
@@ -324,11 +805,31 @@ class SliceMixin(object):
         self.assertEqual(self.mclass(
             5, 4, 3, 2, 1).initial().rest().slice(1, 2).last().get(), 3,
         )
+        self.assertEqual(self.mclass(
+            5, 4, 3, 2, 1, history=False
+        ).initial().rest().slice(1, 2).last().get(), 3)
 
     def test_index(self):
         self.assertEqual(self.mclass(5, 4, 3, 2, 1).at(2).get(), 3)
         self.assertEqual(self.mclass(5, 4, 3, 2, 1).at(10, 11).get(), 11)
 
+    def test_window(self):
+        self.assertEqual(
+            self.mclass(1, 2, 3, 4, 5).window(3).get(),
+            [(1, 2, 3), (2, 3, 4), (3, 4, 5)],
+        )
+        self.assertEqual(
+            self.mclass(*range(10)).window(3, 2).get(),
+            [(0, 1, 2), (2, 3, 4), (4, 5, 6), (6, 7, 8)],
+        )
+        self.assertEqual(
+            self.mclass(*range(10)).window(2, 4).get(),
+            [(0, 1), (4, 5), (8, 9)],
+        )
+        self.assertEqual(len(self.mclass(1, 2).window(3).get()), 0)
+        self.assertRaises(ValueError, self.mclass(1, 2, 3).window, 0)
+        self.assertRaises(ValueError, self.mclass(1, 2, 3).window, 2, 0)
+
     def test_slice(self):
         self.assertEqual(self.mclass(5, 4, 3, 2, 1).slice(2).get(), [5, 4])
         self.assertEqual(
@@ -346,6 +847,7 @@ class SliceMixin(object):
         self.assertEqual(
             self.mclass(5, 4, 3, 2, 1).initial().get(), [5, 4, 3, 2]
         )
+        self.assertEqual(self.mclass(5).rest().initial().get(), [])
 
     def test_rest(self):
         self.assertEqual(
@@ -356,11 +858,41 @@ class SliceMixin(object):
         self.assertEqual(
             len(list(self.mclass(1, 2, 3, 4, 5, 6).choice())), 1,
         )
+        self.assertEqual(
+            self.mclass(*range(100)).choice(seed=7).get(),
+            self.mclass(*range(100)).choice(seed=7).get(),
+        )
+        # things weighing nothing are never chosen
+        self.assertEqual(
+            self.mclass(0, 0, 1, 0).worker(lambda x: x).choice(True).get(),
+            1,
+        )
 
     def test_sample(self):
         self.assertEqual(
             len(self.mclass(1, 2, 3, 4, 5, 6).sample(3).get()), 3,
         )
+        sample = self.mclass(*range(1000)).sample(10, seed=7).get()
+        self.assertEqual(len(set(sample)), 10)
+        self.assertTrue(all(0 <= i < 1000 for i in sample))
+        self.assertEqual(
+            self.mclass(*range(1000)).sample(10, seed=7).get(), sample,
+        )
+        # sampling more things than there are gives every thing
+        self.assertEqual(
+            sorted(self.mclass(1, 2, 3).sample(5).get()), [1, 2, 3],
+        )
+        self.assertEqual(
+            sorted(self.mclass(0, 1, 0, 2, 0, 3).worker(
+                lambda x: x
+            ).sample(3, weighted=True, seed=1).get()),
+            [1, 2, 3],
+        )
+        # weighing things takes a worker
+        self.assertRaises(
+            ValueError, self.mclass(1, 2, 3).sample, 2, weighted=True,
+        )
+        self.assertRaises(ValueError, self.mclass(1, 2, 3).choice, True)
 
 
 class ReduceMixin(object):
@@ -370,6 +902,23 @@ class ReduceMixin(object):
             self.mclass([[1, [2], [3, [[4]]]], 'here']).flatten().get(),
             [1, 2, 3, 4, 'here'],
         )
+        self.assertEqual(
+            self.mclass([[1, [2], [3, [[4]]]], 'here']).flatten(2).get(),
+            [1, [2], [3, [[4]]], 'here'],
+        )
+        self.assertEqual(
+            self.mclass([{'a': 1}, (1, (2,)), iter([3, [4]])]).flatten().get(),
+            [{'a': 1}, 1, 2, 3, 4],
+        )
+        self.assertEqual(
+            self.mclass([{'a': 1}, [(1, 2)]]).flatten(atoms=(tuple,)).get(),
+            ['a', (1, 2)],
+        )
+        # deeper than the recursion limit
+        nested = [1]
+        for i in range(5000):
+            nested = [nested, 2]
+        self.assertEqual(len(list(self.mclass(nested).flatten().get())), 5001)
 
     def test_merge(self):
         self.assertEqual(
@@ -494,6 +1043,260 @@ class MapMixin(object):
             self.mclass(1, 2, 3).worker(lambda x: x * 3).map().get(),
             [3, 6, 9],
         )
+        self.assertEqual(
+            self.mclass(1, 2, 3, history=False).worker(
+                lambda x: x * 3
+            ).map().worker(lambda x: x + 1).map().get(),
+            [4, 7, 10],
+        )
+
+    def test_map_history(self):
+        # things added before the first step are kept with or without history
+        for history in (True, False):
+            self.assertEqual(
+                self.mclass(1, -2, history=history).append(-3).prepend(
+                    0,
+                ).worker(abs).map().get(),
+                [0, 1, 2, 3],
+            )
+            self.assertEqual(
+                self.mclass(1, -2, history=history).worker(abs).map().worker(
+                    lambda x: x * 2
+                ).map().get(),
+                [2, 4],
+            )
+
+    def test_chunked(self):
+        batches = []
+        def bulk(things): #@IgnorePep8
+            batches.append(len(things))
+            return [thing * 2 for thing in things]
+        self.assertEqual(
+            self.mclass(*range(10)).chunked(4).worker(bulk).map().get(),
+            [i * 2 for i in range(10)],
+        )
+        self.assertEqual(batches, [4, 4, 2])
+        self.assertEqual(
+            self.mclass(1, 2, 3).chunked(2).worker(
+                lambda x: None
+            ).map().get(),
+            [],
+        )
+        # batching only runs for one step
+        self.assertEqual(
+            self.mclass(1, 2, 3).chunked(2).worker(
+                lambda x: x
+            ).map().worker(lambda x: x + 1).map().get(),
+            [2, 3, 4],
+        )
+        self.assertRaises(ValueError, self.mclass(1).chunked, 0)
+
+    def _sinkfile(self):
+        import os
+        from tempfile import mkstemp
+        fd, path = mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_to_file(self):
+        from io import BytesIO
+        from stuf.six import b
+        path = self._sinkfile()
+        test = self.mclass(*range(5)).worker(lambda x: x * 2).map()
+        self.assertEqual(test.to_file(path, flush=2), 5)
+        with open(path, 'rb') as source:
+            self.assertEqual(source.read(), b('0\n2\n4\n6\n8\n'))
+        # outgoing things are used up
+        self.assertEqual(test.get(), [])
+        sink = BytesIO()
+        self.assertEqual(
+            self.mclass(b('a'), 'b', 1).worker(
+                lambda x: x
+            ).map().to_file(sink, newline=','),
+            3,
+        )
+        self.assertEqual(sink.getvalue(), b('a,b,1,'))
+        self.assertRaises(
+            ValueError, self.mclass(1).worker(abs).map().to_file, sink, flush=0
+        )
+        self.assertRaises(ValueError, self.mclass(1).to_jsonl, sink, flush=0)
+        self.assertRaises(ValueError, self.mclass(1).to_csv, path, flush=0)
+
+    def test_to_jsonl(self):
+        import json
+        path = self._sinkfile()
+        self.assertEqual(
+            self.mclass(*range(3)).worker(
+                lambda x: {'n': x, 'list': [x] * x}
+            ).map().to_jsonl(path, flush=2, sort_keys=True),
+            3,
+        )
+        with open(path) as source:
+            self.assertEqual(
+                [json.loads(line) for line in source],
+                [{'n': 0, 'list': []}, {'n': 1, 'list': [1]},
+                 {'n': 2, 'list': [2, 2]}],
+            )
+
+    def test_to_csv(self):
+        import csv
+        path = self._sinkfile()
+        self.assertEqual(
+            self.mclass(*range(3)).worker(
+                lambda x: (x, x * 2)
+            ).map().to_csv(path, flush=2),
+            3,
+        )
+        with open(path) as source:
+            self.assertEqual(
+                list(csv.reader(source)),
+                [['0', '0'], ['1', '2'], ['2', '4']],
+            )
+        self.assertEqual(
+            self.mclass(*range(2)).worker(
+                lambda x: {'a': x, 'b': -x}
+            ).map().to_csv(path, fields=('b', 'a')),
+            2,
+        )
+        with open(path) as source:
+            self.assertEqual(
+                list(csv.reader(source)),
+                [['b', 'a'], ['0', '0'], ['-1', '1']],
+            )
+
+    def test_to_sqlite(self):
+        import sqlite3
+        db = sqlite3.connect(':memory:')
+        self.addCleanup(db.close)
+        db.execute('CREATE TABLE test (a, b, c DEFAULT 1)')
+        test = self.mclass(*range(5)).worker(lambda x: (x, x * 2)).map()
+        self.assertEqual(
+            test.to_sqlite(db, 'test', ('a', 'b'), flush=2), 5,
+        )
+        self.assertEqual(
+            db.execute('SELECT a, b, c FROM test').fetchall(),
+            [(i, i * 2, 1) for i in range(5)],
+        )
+        self.assertEqual(
+            self.mclass(1, 2).worker(
+                lambda x: (x, x, x)
+            ).map().to_sqlite(db, 'test'),
+            2,
+        )
+        self.assertEqual(
+            db.execute('SELECT count(*) FROM test').fetchone(), (7,),
+        )
+        self.assertRaises(
+            ValueError, self.mclass(1).to_sqlite, db, 'test', flush=0,
+        )
+        # nothing is inserted if any row fails
+        self.assertRaises(
+            sqlite3.Error,
+            self.mclass(1, 2).worker(lambda x: (x,) * x).map().to_sqlite,
+            db, 'test',
+        )
+        self.assertEqual(
+            db.execute('SELECT count(*) FROM test').fetchone(), (7,),
+        )
+
+    def test_to_queue(self):
+        try:
+            from queue import Queue
+        except ImportError:
+            from Queue import Queue
+        queue = Queue()
+        self.assertEqual(
+            self.mclass(1, 2, 3).worker(lambda x: x).map().to_queue(queue),
+            3,
+        )
+        self.assertEqual([queue.get() for _ in range(3)], [1, 2, 3])
+        self.assertEqual(
+            self.mclass(*range(5)).worker(
+                lambda x: x
+            ).map().to_queue(queue, flush=2),
+            5,
+        )
+        self.assertEqual(
+            [queue.get() for _ in range(3)], [[0, 1], [2, 3], [4]],
+        )
+        self.assertTrue(queue.empty())
+        self.assertRaises(
+            ValueError, self.mclass(1).worker(abs).map().to_queue, queue,
+            flush=0,
+        )
+        self.assertTrue(queue.empty())
+
+    def test_parallel(self):
+        from operator import mul
+        things = list(range(-50, 50))
+        self.assertEqual(
+            self.mclass(*things).parallel(2, chunksize=7).worker(
+                abs
+            ).map().get(),
+            [abs(i) for i in things],
+        )
+        self.assertEqual(
+            self.mclass(*things).parallel(
+                3, 'thread', 5, unordered=True,
+            ).worker(lambda x: x * 2).map().wrap(sorted).get(),
+            [i * 2 for i in things],
+        )
+        self.assertEqual(
+            self.mclass((1, 2), (2, 3), (3, 4)).parallel(
+                2, chunksize=1,
+            ).worker(mul).argmap().get(),
+            [2, 6, 12],
+        )
+        self.assertEqual(
+            self.mclass((1,), (2,), (3,)).parallel(
+                2, 'thread', 2,
+            ).worker(pow).params(2).argmap(True).get(),
+            [1, 4, 9],
+        )
+        def test(*args, **kw): #@IgnorePep8
+            return sum(args) * sum(kw.values())
+        self.assertEqual(
+            self.mclass(
+                ((1, 2), {'a': 2}), ((2, 3), {'a': 2}), ((3, 4), {'a': 2})
+            ).parallel(2, 'thread', 1).worker(test).params(
+                1, 2, 3, b=5, w=10, y=13
+            ).kwargmap(True).get(),
+            [270, 330, 390],
+        )
+        self.assertEqual(
+            self.mclass([5, 1, 7], [3, 2, 1]).parallel(
+                2, chunksize=1,
+            ).invoke('sort').get(),
+            [[1, 5, 7], [1, 2, 3]],
+        )
+        # only the next step runs in parallel
+        test = self.mclass(1, 2, 3).parallel(2, 'thread')
+        self.assertEqual(
+            test.worker(lambda x: x * 3).map().worker(
+                lambda x: x + 1
+            ).map().get(),
+            [4, 7, 10],
+        )
+        self.assertIsNone(test._parallel)
+        self.assertRaises(ValueError, self.mclass(1).parallel, kind='fork')
+
+    def test_profile(self):
+        reports = []
+        test = self.mclass(*range(10)).profile(callback=reports.append)
+        test.worker(abs).map().worker(lambda x: x % 2).map()
+        self.assertEqual(test.get(), [0, 1, 0, 1, 0, 1, 0, 1, 0, 1])
+        report = test.report()
+        self.assertEqual([s['method'] for s in report], ['map', 'map'])
+        self.assertEqual(report[0]['worker'], 'abs')
+        self.assertEqual(
+            [(s['incoming'], s['outgoing']) for s in report],
+            [(10, 10), (10, 10)],
+        )
+        self.assertTrue(all(s['seconds'] >= 0 for s in report))
+        # callback is called with every finished step
+        self.assertEqual(reports, report)
+        self.assertEqual(test.profile(False).report(), [])
 
     def test_invoke(self):
         self.assertEqual(
@@ -562,6 +1365,15 @@ class Mixin(object):
         queue.original()
         self.assertEqual(queue.peek(), [1, 2, 3])
 
+    def test_history(self):
+        queue = self.mclass(1, 2, 3, history=False).prepend(0)
+        self.assertEqual(queue.peek(), [0, 1, 2, 3])
+        self.assertEqual(queue.append(4).peek(), [0, 1, 2, 3, 4])
+        self.assertRaises(ValueError, queue.undo)
+        self.assertRaises(ValueError, queue.snapshot)
+        self.assertRaises(ValueError, queue.baseline)
+        self.assertRaises(ValueError, queue.original)
+
     def test_wrap(self):
         self.assertIsInstance(
             self.mclass(1, 2, 3, 4, 5, 6).wrap(tuple).peek(), tuple,
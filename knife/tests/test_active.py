@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 '''active knife tests'''
 
-from knife._compat import unittest
+from knife.tests import unittest
 
 from knife.tests.mixins import (
     Mixin, MapMixin, RepeatMixin, ReduceMixin, SliceMixin, FilterMixin,
@@ -77,5 +77,32 @@ class TestSlice(unittest.TestCase, Mixin, SliceMixin):
         self.mclass = sliceknife
 
 
+class TestPickleStore(unittest.TestCase, Mixin):
+
+    def setUp(self):
+        from functools import partial
+        from knife import activeknife
+        from knife._snapshot import PickleStore
+        self.mclass = partial(activeknife, store=PickleStore())
+
+
+class TestCowStore(unittest.TestCase):
+
+    def test_shared(self):
+        from knife import activeknife
+        test = activeknife(1, 2, 3).prepend(0).append(4)
+        first, second = test._history
+        # snapshots share chunks instead of copying them
+        self.assertIs(first[-1], second[0])
+        self.assertEqual(test.undo().peek(), [0, 1, 2, 3])
+
+    def test_compact(self):
+        from knife._snapshot import CowStore
+        store = CowStore(chunks=2)
+        snapshot = store.append(store.append(store.take([1]), [2]), [3])
+        self.assertEqual(snapshot, ((1, 2, 3),))
+        self.assertEqual(list(store.load(snapshot)), [1, 2, 3])
+
+
 if __name__ == '__main__':
     unittest.main()
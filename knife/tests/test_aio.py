@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+'''async knife tests'''
+
+from sys import version_info
+
+from knife.tests import unittest
+
+
+class things(object):
+
+    '''async iterable over things'''
+
+    def __init__(self, *things):
+        self.things = iter(things)
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        from asyncio import sleep
+        try:
+            return sleep(0, next(self.things))
+        except StopIteration:
+            raise StopAsyncIteration  # @UndefinedVariable
+
+
+class counter(object):
+
+    '''endless async iterable counting up from 0'''
+
+    def __init__(self, read):
+        self.read = read
+        self.n = 0
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        from asyncio import sleep
+        self.read.append(self.n)
+        self.n += 1
+        return sleep(0, self.n - 1)
+
+    def aclose(self):
+        from asyncio import sleep
+        self.read.append('closed')
+        return sleep(0)
+
+
+@unittest.skipIf(version_info < (3, 6), 'async knives need Python 3.6')
+class TestAsync(unittest.TestCase):
+
+    def setUp(self):
+        from asyncio import new_event_loop
+        from knife.aio import asyncknife
+        self.mclass = asyncknife
+        self.loop = new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def run_(self, awaitable):
+        return self.loop.run_until_complete(awaitable)
+
+    def test_map(self):
+        from time import time
+        from asyncio import sleep
+        start = time()
+        self.assertEqual(
+            self.run_(self.mclass(
+                things(*range(10)), limit=10,
+            ).worker(lambda x: sleep(0.05, x * 2)).map().get()),
+            [0, 2, 4, 6, 8, 10, 12, 14, 16, 18],
+        )
+        # awaited at once rather than one after another
+        self.assertLess(time() - start, 0.4)
+        self.assertEqual(
+            self.run_(
+                self.mclass(1, 2, 3).worker(lambda x: x * 3).map().get()
+            ),
+            [3, 6, 9],
+        )
+
+    def test_limit(self):
+        from asyncio import sleep, ensure_future
+        tasks = []
+        running = []
+        def worker(x): #@IgnorePep8
+            # count results still being awaited
+            running.append(sum(1 for t in tasks if not t.done()) + 1)
+            tasks.append(ensure_future(sleep(0.01, x), loop=self.loop))
+            return tasks[-1]
+        self.assertEqual(
+            self.run_(self.mclass(
+                *range(20), limit=3
+            ).worker(worker).map().get()),
+            list(range(20)),
+        )
+        self.assertEqual(max(running), 3)
+
+    def test_argmap(self):
+        from asyncio import sleep
+        self.assertEqual(
+            self.run_(self.mclass((1, 2), (2, 3), (3, 4)).worker(
+                lambda x, y: sleep(0, x * y)
+            ).argmap().get()),
+            [2, 6, 12],
+        )
+
+    def test_kwargmap(self):
+        def test(*args, **kw):
+            return sum(args) * sum(kw.values())
+        self.assertEqual(
+            self.run_(self.mclass(
+                ((1, 2), {'a': 2}), ((2, 3), {'a': 2}), ((3, 4), {'a': 2})
+            ).worker(test).params(
+                1, 2, 3, b=5, w=10, y=13
+            ).kwargmap(True).get()),
+            [270, 330, 390],
+        )
+
+    def test_invoke(self):
+        self.assertEqual(
+            self.run_(
+                self.mclass([5, 1, 7], [3, 2, 1]).invoke('sort').get()
+            ),
+            [[1, 5, 7], [1, 2, 3]],
+        )
+
+    def test_filter(self):
+        from asyncio import sleep
+        self.assertEqual(
+            self.run_(self.mclass(things(1, 2, 3, 4, 5, 6)).worker(
+                lambda x: sleep(0, x % 2 == 0)
+            ).filter(invert=True).get()),
+            [1, 3, 5],
+        )
+
+    def test_chain(self):
+        from asyncio import sleep
+        test = self.mclass(things(1, 2, 3, 4)).worker(
+            lambda x: sleep(0, x * 3)
+        ).map().worker(lambda x, y: x + y).reduce()
+        self.assertEqual(self.run_(test.get()), 30)
+        # outgoing things are kept once collected
+        self.assertEqual(self.run_(test.get()), 30)
+        self.assertEqual(
+            self.run_(self.mclass(things(1, 2, 3, 4)).first(2).get()), [1, 2],
+        )
+
+    def test_slice(self):
+        from asyncio import sleep
+        read = []
+        def endless(): #@IgnorePep8
+            return counter(read)
+        # unbounded async sources are only read as far as slices go
+        self.assertEqual(
+            self.run_(self.mclass(endless()).first(3).get()), [0, 1, 2],
+        )
+        self.assertEqual(read, [0, 1, 2, 'closed'])
+        self.assertEqual(self.run_(self.mclass(endless()).first().get()), 0)
+        self.assertEqual(self.run_(self.mclass(endless()).at(5).get()), 5)
+        self.assertEqual(
+            self.run_(self.mclass(endless()).slice(2, 9, 3).get()), [2, 5, 8],
+        )
+        self.assertEqual(
+            self.run_(self.mclass(endless()).slice(3).get()), [0, 1, 2],
+        )
+        self.assertEqual(
+            self.run_(self.mclass(endless()).worker(
+                lambda x: sleep(0, x * 2)
+            ).map().rest().first(3).get()),
+            [2, 4, 6],
+        )
+        self.assertEqual(self.run_(self.mclass(1, 2).at(5, 'x').get()), 'x')
+        self.assertEqual(self.run_(self.mclass(1, 2, 3).rest().get()), [2, 3])
+
+    def test_aiter(self):
+        from asyncio import sleep
+        test = self.mclass(things(1, 2, 3)).worker(
+            lambda x: sleep(0, x + 1)
+        ).map()
+        async_iter = test.__aiter__()
+        collected = []
+        def collect(): #@IgnorePep8
+            return self.run_(async_iter.__anext__())
+        try:
+            while 1:
+                collected.append(collect())
+        except StopAsyncIteration:  # @UndefinedVariable
+            pass
+        self.assertEqual(collected, [2, 3, 4])
+        self.assertRaises(TypeError, iter, test)
+
+    def test_to_queue(self):
+        from queue import Queue
+        from asyncio import sleep
+        queue = Queue()
+        self.assertEqual(
+            self.run_(self.mclass(things(1, 2, 3)).worker(
+                lambda x: sleep(0, x * 2)
+            ).map().to_queue(queue, 2)),
+            3,
+        )
+        self.assertEqual([queue.get(), queue.get()], [[2, 4], [6]])
+
+    def test_history(self):
+        test = self.mclass(1, 2, 3)
+        self.assertRaises(ValueError, test.undo)
+        self.assertRaises(ValueError, test.worker(abs).parallel().map)
+        self.assertRaises(ValueError, test.worker(abs).chunked().map)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+'''knife benchmark tests'''
+
+from knife.tests import unittest
+
+
+class TestBench(unittest.TestCase):
+
+    def test_cases(self):
+        from knife.bench import CASES, MODES
+        # every public method has a benchmark
+        for knife in MODES.values():
+            public = set(n for n in dir(knife) if not n.startswith('_'))
+            self.assertEqual(public - set(CASES), set())
+
+    def test_run(self):
+        import json
+        from knife.bench import run, compare
+        results = run(
+            methods=('map', 'sum', 'undo'), types=('int',), sizes=(10,),
+            chains=(2,), repeat=1, statements=('import knife',),
+        )
+        self.assertEqual(len(results['startup']), 1)
+        self.assertEqual(len(results['results']), 6)
+        self.assertTrue(all(r['error'] is None for r in results['results']))
+        self.assertEqual(len(results['chains']), 4)
+        # results survive a trip through JSON
+        results = json.loads(json.dumps(results))
+        compared = compare(results, results)
+        self.assertEqual(len(compared), 6)
+        self.assertFalse(any(c[-1] for c in compared))
+
+    def test_startup(self):
+        import sys
+        from subprocess import check_output
+        loaded = check_output([sys.executable, '-c', (
+            'import sys, knife; print(sorted(k for k, v in '
+            'sys.modules.items() if v and k.startswith('
+            '("knife.", "parse", "pickle", "random", "tempfile"))))'
+        )])
+        # importing knife loads no knives or heavy dependencies
+        self.assertEqual(loaded.strip(), b'[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
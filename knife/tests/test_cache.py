@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+'''knife cache tests'''
+
+from knife.tests import unittest
+
+
+class TestCache(unittest.TestCase):
+
+    def test_lru(self):
+        from knife._cache import LRUCache
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        # touch 'a' so 'b' is least recently used
+        self.assertEqual(cache.get('a'), 1)
+        cache.set('c', 3)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        self.assertIn('c', cache)
+        self.assertEqual(cache.get('b', 'missing'), 'missing')
+        info = cache.info()
+        self.assertEqual((info.hits, info.misses, info.size), (1, 1, 2))
+
+    def test_bytes(self):
+        from sys import getsizeof
+        from knife._cache import LRUCache
+        big = 'x' * 1000
+        cache = LRUCache(maxsize=None, maxbytes=getsizeof(big) * 2)
+        cache.set(1, big)
+        cache.set(2, big)
+        self.assertEqual(len(cache), 1)
+        self.assertIn(2, cache)
+        self.assertTrue(cache.info().bytes <= cache.maxbytes)
+        # never cache things bigger than the limit
+        cache.set(3, big * 3)
+        self.assertNotIn(3, cache)
+
+    def test_memoize(self):
+        from knife._cache import memoize
+        calls = []
+        @memoize(maxsize=4)
+        def factory(*args, **kw): #@IgnorePep8
+            calls.append(args)
+            return args
+        self.assertEqual(factory(1), factory(1))
+        self.assertEqual(len(calls), 1)
+        # arguments of different types are cached separately
+        self.assertIsInstance(factory(1.0)[0], float)
+        self.assertEqual(len(calls), 2)
+        # unhashable arguments still cache
+        factory([1], a={})
+        factory([1], a={})
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(factory.cache.info().hits, 2)
+
+    def test_cache_stats(self):
+        from knife import cache_stats, cache_clear, __
+        __(1, 2, 3).worker(lambda x: x * 2).map().get()
+        stats = cache_stats()
+        self.assertIn('knife._mixins._map', stats)
+        self.assertTrue(stats['knife._mixins._map'].misses >= 1)
+        cache_clear()
+        self.assertEqual(cache_stats()['knife._mixins._map'].size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
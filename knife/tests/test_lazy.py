@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 '''lazy knife tests'''
 
-from knife._compat import unittest
+from knife.tests import unittest
 
 from knife.tests.mixins import (
     Mixin, MapMixin, RepeatMixin, ReduceMixin, SliceMixin, FilterMixin,
@@ -18,6 +18,211 @@ class TestLazy(
         self.mclass = lazyknife
         self.pipe = lazyknife
 
+    def test_size(self):
+        test = self.mclass(*range(10))
+        self.assertEqual(test._size, 10)
+        test.worker(lambda x: x * 2).map().rest().initial()
+        self.assertEqual(test._outsize, 8)
+        test.slice(1, 7, 2).reverse()
+        self.assertEqual(test._outsize, 3)
+        self.assertEqual(test.get(), [12, 8, 4])
+        self.assertEqual(len(test.prepend(1, 2)), 5)
+        self.assertEqual(test.last(2).get(), [8, 4])
+        # filtering makes sizes unknown until counted
+        test.worker(lambda x: x > 4).filter()
+        self.assertIsNone(test._outsize)
+        self.assertEqual(test.get(), 8)
+        self.assertEqual(test._outsize, 1)
+        self.assertIsNone(test.undo()._size)
+        self.assertEqual(len(test), 3)
+        self.assertEqual(test._size, 3)
+
+    def test_initial(self):
+        test = self.mclass._source(iter([]))
+        self.assertIsNone(test._size)
+        self.assertEqual(test.initial().get(), [])
+        self.assertEqual(
+            self.mclass._source(iter(range(5))).initial().get(), [0, 1, 2, 3],
+        )
+
+    def _sourced(self, data):
+        from tempfile import NamedTemporaryFile
+        source = NamedTemporaryFile(delete=False)
+        source.write(data)
+        source.close()
+        import os
+        self.addCleanup(os.remove, source.name)
+        return source.name
+
+    def test_from_file(self):
+        path = self._sourced(b'alpha\nbeta\n\ngamma')
+        self.assertEqual(
+            self.mclass.from_file(path, encoding='utf-8').peek(),
+            ['alpha', 'beta', '', 'gamma'],
+        )
+        # records span blocks
+        test = self.mclass.from_file(path, buffering=3)
+        self.assertIsNone(test._size)
+        self.assertEqual(
+            [r.tobytes() for r in test.peek()],
+            [b'alpha', b'beta', b'', b'gamma'],
+        )
+        self.assertEqual(len(test), 4)
+        self.assertEqual(
+            self.mclass.from_file(
+                path, 'records', delimiter=b'ta', encoding='ascii',
+                buffering=2,
+            ).worker(len).map().get(),
+            [8, 7],
+        )
+        self.assertEqual(
+            [r.tobytes() for r in self.mclass.from_file(
+                path, 'fixed', 4, buffering=5,
+            ).peek()],
+            [b'alph', b'a\nbe', b'ta\n\n', b'gamm', b'a'],
+        )
+        # records spanning many blocks with delimiters split between blocks
+        path = self._sourced(b'x' * 50 + b'--y' * 3 + b'-' + b'z' * 20)
+        self.assertEqual(
+            self.mclass.from_file(
+                path, 'records', delimiter=b'--', encoding='ascii',
+                buffering=3,
+            ).peek(),
+            ['x' * 50, 'y', 'y', 'y-' + 'z' * 20],
+        )
+        self.assertRaises(ValueError, self.mclass.from_file, path, 'fixed')
+        self.assertRaises(ValueError, self.mclass.from_file, path, 'records')
+        self.assertRaises(ValueError, self.mclass.from_file, path, 'words')
+
+    def test_from_mmap(self):
+        path = self._sourced(b'alpha\nbeta\n\ngamma\n')
+        self.assertEqual(
+            self.mclass.from_mmap(path, encoding='utf-8', plan=True).worker(
+                lambda x: x.upper()
+            ).map().get(),
+            ['ALPHA', 'BETA', '', 'GAMMA'],
+        )
+        self.assertEqual(
+            self.mclass.from_mmap(path, 'fixed', 8, encoding='ascii').peek(),
+            ['alpha\nbe', 'ta\n\ngamm', 'a\n'],
+        )
+        self.assertEqual(
+            self.mclass.from_mmap(self._sourced(b'')).peek(), [],
+        )
+        # failing to view the map isn't hidden by cleaning up after it
+        from knife._source import readmap
+
+        def broken(mapped):
+            raise TypeError('no view')
+        self.assertRaises(
+            TypeError, list, readmap(path, b'\n', None, view_=broken),
+        )
+
+    def test_sink_memory(self):
+        try:
+            import tracemalloc
+        except ImportError:
+            self.skipTest('tracemalloc needs Python 3.4')
+        from io import BytesIO
+
+        class Discard(object):
+            def write(self, data):
+                pass
+
+        def peak(n):
+            test = self.mclass._source(iter(range(n))).worker(
+                lambda x: x * 2
+            ).map()
+            tracemalloc.start()
+            try:
+                self.assertEqual(test.to_file(Discard(), flush=64), n)
+                return tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+        # snapshots don't hold on to written things
+        self.assertLess(peak(200000), 1024 * 1024)
+        self.assertLess(peak(400000), 1024 * 1024)
+        # snapshots are dropped
+        test = self.mclass(1, 2).worker(abs).map()
+        test.to_file(BytesIO())
+        self.assertRaises(IndexError, test.undo)
+
+
+class TestPlan(
+    unittest.TestCase, Mixin, CmpMixin, MapMixin, ReduceMixin, OrderMixin,
+    SliceMixin, RepeatMixin, MathMixin, FilterMixin
+):
+
+    def setUp(self):
+        from functools import partial
+        from knife import lazyknife
+        self.mclass = partial(lazyknife, plan=True)
+        self.pipe = lazyknife
+
+    def test_fuse(self):
+        from knife._plan import MANY, fusable
+        test = self.mclass(*range(10)).worker(lambda x: x + 1).map().worker(
+            lambda x: x % 3
+        ).filter().worker(lambda x: x * 2).map().first(2)
+        # steps are recorded, not run
+        self.assertEqual(len(test._plan), 4)
+        self.assertEqual(
+            [fusable(m, c) is not None for m, c in test._plan],
+            [True, True, True, False],
+        )
+        self.assertEqual(MANY, test._plan[0][0])
+        self.assertEqual(test.get(), [2, 4])
+        self.assertEqual(test._plan, [])
+        # one snapshot for the whole plan
+        self.assertEqual(len(test._history), 1)
+
+    def test_rewrite(self):
+        from knife._plan import rewrite
+        things = 5, 1, 4, 1, 5, 9, 2, 6
+        test = self.mclass(*things).worker(lambda x: x % 4).sort().first(3)
+        # sort and slice are run as one heap selection
+        self.assertEqual(len(rewrite(test._plan)), 1)
+        self.assertEqual(test.get(), [4, 5, 1])
+        test = self.mclass(*things).worker(lambda x: x % 4).sort().last(3)
+        self.assertEqual(len(rewrite(test._plan)), 1)
+        self.assertEqual(test.get(), [9, 2, 6])
+        self.assertEqual(self.mclass(*things).sort().first().get(), 1)
+        self.assertEqual(self.mclass(*things).sort().last().get(), 9)
+        test = self.mclass(*things).sort().worker(abs).map().first(2)
+        self.assertEqual(len(rewrite(test._plan)), 3)
+        self.assertEqual(test.get(), [1, 1])
+
+    def test_many(self):
+        # steps giving lists feed steps wanting iterators
+        self.assertEqual(self.mclass(7, 1, 9).bottom(2).first().get(), 1)
+        self.assertEqual(self.mclass(7, 1, 9).top(2).first().get(), 9)
+        self.assertEqual(self.mclass(7, 1, 9).sort().rest().first().get(), 7)
+        self.assertEqual(
+            self.mclass(7, 1, 9).sort().reverse().first().get(), 9,
+        )
+
+    def test_size(self):
+        test = self.mclass(*range(10)).worker(abs).map().rest().last(4)
+        self.assertEqual(test._worksize, 4)
+        self.assertEqual(len(test), 10)
+        self.assertEqual(test._outsize, 4)
+        self.assertEqual(test.get(), [6, 7, 8, 9])
+        test.worker(lambda x: x % 2).filter().dice(2)
+        self.assertIsNone(test._worksize)
+        self.assertEqual(test.get(), (7, 9))
+
+    def test_profile(self):
+        test = self.mclass(*range(10)).profile().worker(abs).map().worker(
+            lambda x: x % 2
+        ).filter()
+        self.assertEqual(test.get(), [1, 3, 5, 7, 9])
+        # recorded steps are profiled as one step
+        self.assertEqual(
+            [(s['method'], s['incoming'], s['outgoing'])
+            for s in test.report()],
+            [('plan', 10, 5)],
+        )
+
 
 class TestCompare(unittest.TestCase, Mixin, CmpMixin):
 
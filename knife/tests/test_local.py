@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+'''thread-local knife tests'''
+
+from knife.tests import unittest
+
+
+class TestLocal(unittest.TestCase):
+
+    def test_threads(self):
+        from threading import Thread
+        from knife import knife
+        from knife.local import localknife
+        test = localknife(knife, 1, 2, 3, snapshots=2)
+        test.worker(lambda x: x * 2).map()
+        seen = []
+        def run(): #@IgnorePep8
+            # other threads start from the original arguments
+            seen.append(test.peek())
+            test.worker(lambda x: x + 1).map()
+            seen.append(test.get())
+        thread = Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [[1, 2, 3], [2, 3, 4]])
+        self.assertEqual(test.get(), [2, 4, 6])
+        self.assertEqual(list(test), [2, 4, 6])
+        self.assertEqual(len(test), 3)
+
+    def test_iterator(self):
+        from threading import Thread
+        from knife import knife
+        from knife.local import localknife
+        test = localknife(knife, iter([1, 2, 3]), (x for x in (4, 5)))
+        seen = []
+        def run(): #@IgnorePep8
+            # iterators aren't used up by the first thread to read them
+            seen.append(test.flatten().get())
+        run()
+        thread = Thread(target=run)
+        thread.start()
+        thread.join()
+        self.assertEqual(seen, [[1, 2, 3, 4, 5], [1, 2, 3, 4, 5]])
+
+    def test_shared(self):
+        from threading import Thread
+        from knife import knife
+        test = knife(1, 2, 3)
+        # plain knives share their state between threads
+        thread = Thread(target=lambda: test.worker(lambda x: x * 2).map())
+        thread.start()
+        thread.join()
+        self.assertEqual(test.get(), [2, 4, 6])
+        self.assertFalse(hasattr(test, '__dict__'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,7 +24,7 @@ setup(
     author='L. C. Rees',
     author_email='lcrees@gmail.com',
     url='https://bitbucket.org/lcrees/knife',
-    packages=['knife'],
+    packages=['knife', 'knife.bench'],
     test_suite='knife.tests',
     zip_safe=False,
     install_requires=install_requires,